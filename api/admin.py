@@ -0,0 +1,33 @@
+from django.contrib import admin
+from .models import ApiToken
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = [
+        'name',
+        'user',
+        'created_at',
+        'last_used_at'
+    ]
+
+    list_filter = [
+        'user'
+    ]
+
+    readonly_fields = [
+        'key',
+        'created_at',
+        'last_used_at'
+    ]
+
+    fieldsets = (
+        ('Token', {
+            'fields': ('name', 'user', 'key'),
+            'description': 'The key is generated when the token is saved'
+        }),
+        ('Metadata', {
+            'fields': ('created_at', 'last_used_at'),
+            'classes': ('collapse',)
+        }),
+    )
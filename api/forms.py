@@ -0,0 +1,30 @@
+from sales_tracker.forms import InlineUpdateFormMixin, SalesEnquiryEditForm
+from monthly_awards.forms import MonthlyAwardForm
+from invoiced_jobs.forms import QuickInvoiceForm
+
+
+class SalesEnquiryApiForm(InlineUpdateFormMixin, SalesEnquiryEditForm):
+    """Sales enquiry validation for API upserts - omitted fields keep their current value
+
+    New enquiries may leave out job_number to have the next one allocated.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is None:
+            self.fields['job_number'].required = False
+
+
+class MonthlyAwardApiForm(InlineUpdateFormMixin, MonthlyAwardForm):
+    """Monthly award validation for API upserts - omitted fields keep their current value"""
+
+
+class InvoicedJobApiForm(InlineUpdateFormMixin, QuickInvoiceForm):
+    """Invoiced job validation for API upserts - omitted fields keep their current value
+
+    Built on QuickInvoiceForm plus the award field, as InvoicedJobForm loads
+    every award to build its select choices each time it is instantiated.
+    """
+
+    class Meta(QuickInvoiceForm.Meta):
+        fields = ['award'] + QuickInvoiceForm.Meta.fields
@@ -0,0 +1,30 @@
+import secrets
+
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class ApiToken(models.Model):
+    """Key an integration sends as `Authorization: Token <key>` to use the JSON API"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, help_text="What this token is used for, e.g. 'Accounting sync'")
+    key = models.CharField(max_length=64, unique=True, editable=False)
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'API Token'
+        verbose_name_plural = 'API Tokens'
+
+    def __str__(self):
+        return f"{self.name} ({self.user})"
+
+    def save(self, *args, **kwargs):
+        """Generate the key on first save"""
+        if not self.key:
+            self.key = secrets.token_hex(32)
+        super().save(*args, **kwargs)
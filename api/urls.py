@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import (
+    resource_list,
+    resource_bulk_upsert
+)
+
+urlpatterns = [
+    path('<slug:resource>/', resource_list, name='api_resource_list'),
+    path('<slug:resource>/bulk/', resource_bulk_upsert, name='api_resource_bulk_upsert'),
+]
@@ -0,0 +1,282 @@
+import hashlib
+import json
+from datetime import timedelta, timezone as dt_timezone
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from psl_app_project.pagination import keyset_page, parse_cursor
+from psl_app_project.replica import use_replica
+from search import indexing as search_index
+from margins import rollup as margin_rollup
+from forecast import cash_flow
+from sales_tracker.job_numbers import next_majors
+from sales_tracker.models import SalesEnquiry
+from monthly_awards.models import MonthlyAward
+from invoiced_jobs.models import InvoicedJob
+from .forms import SalesEnquiryApiForm, MonthlyAwardApiForm, InvoicedJobApiForm
+from .models import ApiToken
+
+# Rows per list page unless ?limit= asks for fewer/more (capped at MAX_PAGE_SIZE)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Largest bulk upsert accepted, and rows per INSERT/UPDATE statement
+MAX_BULK_OBJECTS = 1000
+BULK_BATCH_SIZE = 200
+
+# last_used_at is only rewritten when older than this, so most calls stay read-only
+TOKEN_TOUCH_INTERVAL = timedelta(hours=1)
+
+RESOURCES = {
+    'sales-enquiries': {'model': SalesEnquiry, 'form': SalesEnquiryApiForm},
+    'monthly-awards': {'model': MonthlyAward, 'form': MonthlyAwardApiForm},
+    'invoiced-jobs': {'model': InvoicedJob, 'form': InvoicedJobApiForm},
+}
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_token_required(view_func):
+    """Authenticate the request from an `Authorization: Token <key>` header"""
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'token' or not key:
+            return _error('Authentication credentials were not provided.', 401)
+
+        token = ApiToken.objects.select_related('user').filter(key=key.strip()).first()
+        if token is None or not token.user.is_active:
+            return _error('Invalid token.', 401)
+
+        now = timezone.now()
+        if token.last_used_at is None or now - token.last_used_at > TOKEN_TOUCH_INTERVAL:
+            ApiToken.objects.filter(pk=token.pk).update(last_used_at=now)
+
+        request.user = token.user
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def _resource_or_404(resource):
+    config = RESOURCES.get(resource)
+    if config is None:
+        return None, _error(f"Unknown resource '{resource}'.", 404)
+    return config, None
+
+
+@csrf_exempt
+@require_GET
+@api_token_required
+@use_replica
+def resource_list(request, resource):
+    """
+    List rows of a resource, oldest change first.
+
+    Query parameters:
+        fields         comma separated field names (id and updated_at are always included)
+        updated_since  ISO 8601 datetime, only rows changed at or after it
+        fiscal_year    only rows dated in this fiscal year (e.g. 2026 for 2026/27)
+        fiscal_period  only rows in this period of the fiscal year (1 = its first month)
+        after          cursor from the previous page's `next_cursor`
+        limit          page size, up to MAX_PAGE_SIZE
+    """
+    config, error = _resource_or_404(resource)
+    if error:
+        return error
+    model = config['model']
+
+    # Sparse field selection
+    available = [field.name for field in model._meta.concrete_fields]
+    if request.GET.get('fields'):
+        requested = [name.strip() for name in request.GET['fields'].split(',') if name.strip()]
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            return _error(f"Unknown field(s): {', '.join(unknown)}.", 400)
+        fields = ['id', 'updated_at'] + [name for name in requested if name not in ('id', 'updated_at')]
+    else:
+        fields = available
+
+    queryset = model.objects.all()
+
+    # Incremental sync
+    if request.GET.get('updated_since'):
+        updated_since = parse_datetime(request.GET['updated_since'])
+        if updated_since is None:
+            return _error('updated_since must be an ISO 8601 datetime.', 400)
+        if timezone.is_naive(updated_since):
+            updated_since = timezone.make_aware(updated_since, dt_timezone.utc)
+        queryset = queryset.filter(updated_at__gte=updated_since)
+
+    # Fiscal period filters, on the indexed generated columns
+    for param in ('fiscal_year', 'fiscal_period'):
+        if request.GET.get(param):
+            try:
+                queryset = queryset.filter(**{param: int(request.GET[param])})
+            except ValueError:
+                return _error(f'{param} must be an integer.', 400)
+
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return _error('limit must be an integer.', 400)
+
+    after = request.GET.get('after')
+    if after and parse_cursor(model, after, field='updated_at') is None:
+        return _error('after must be the next_cursor of a previous page.', 400)
+
+    rows, next_cursor = keyset_page(
+        queryset.values(*fields), after, limit,
+        field='updated_at', descending=False
+    )
+
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['after'] = next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    body = json.dumps(
+        {'results': rows, 'next_cursor': next_cursor, 'next': next_url},
+        cls=DjangoJSONEncoder
+    ).encode()
+
+    # Clients re-polling an unchanged page get a 304 and no body
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+@csrf_exempt
+@require_POST
+@api_token_required
+def resource_bulk_upsert(request, resource):
+    """
+    Create or update many rows of a resource in one request.
+
+    Body: a JSON list of objects (or {"objects": [...]}). Objects with an
+    "id" update that row, omitted fields keeping their current value; the
+    rest are created. Every object is validated with the app's own form
+    first - if any fail nothing is written and the errors are returned
+    keyed by position in the list.
+    """
+    config, error = _resource_or_404(resource)
+    if error:
+        return error
+    model, form_class = config['model'], config['form']
+
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return _error('Request body must be JSON.', 400)
+    objects = payload.get('objects') if isinstance(payload, dict) else payload
+    if not isinstance(objects, list) or not all(isinstance(item, dict) for item in objects):
+        return _error('Expected a list of objects.', 400)
+    if len(objects) > MAX_BULK_OBJECTS:
+        return _error(f'At most {MAX_BULK_OBJECTS} objects per request.', 400)
+
+    # One query for every row being updated
+    ids = [item['id'] for item in objects if item.get('id') is not None]
+    try:
+        existing = model.objects.in_bulk(ids)
+    except (ValueError, TypeError):
+        return _error('Object ids must be integers.', 400)
+
+    forms, errors = [], {}
+    for index, item in enumerate(objects):
+        instance = None
+        if item.get('id') is not None:
+            instance = existing.get(int(item['id']))
+            if instance is None:
+                errors[index] = {'id': ['No such object.']}
+                continue
+        form = form_class(data=item, instance=instance)
+        if form.is_valid():
+            forms.append(form)
+        else:
+            errors[index] = form.errors
+
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    now = timezone.now()
+    to_create, to_update, old_statuses, old_award_ids = [], [], {}, []
+    for form in forms:
+        obj = form.save(commit=False)
+        if isinstance(obj, InvoicedJob):
+            obj.update_calculated_fields()
+        if obj.pk is None:
+            obj.created_by = request.user
+            to_create.append(obj)
+        else:
+            # bulk_update() skips auto_now and the version check; bump the
+            # version so edit forms opened before this write see it
+            obj.updated_at = now
+            obj.version = F('version') + 1
+            to_update.append(obj)
+            if isinstance(obj, SalesEnquiry):
+                old_statuses[obj.pk] = form.initial.get('status')
+            elif isinstance(obj, InvoicedJob):
+                old_award_ids.append(form.initial.get('award'))
+
+    update_fields = list(form_class._meta.fields) + ['updated_at', 'version']
+    if model is InvoicedJob:
+        update_fields.append('psl_value')
+
+    if model is SalesEnquiry:
+        unnumbered = [enquiry for enquiry in to_create if not enquiry.job_number]
+        if unnumbered:
+            for enquiry, job_number in zip(unnumbered, next_majors(len(unnumbered))):
+                enquiry.job_number = job_number
+        # Each row was checked against the table, not against the rest of the batch
+        job_numbers = [enquiry.job_number for enquiry in to_create + to_update]
+        if len(job_numbers) != len(set(job_numbers)):
+            return _error('Job numbers must be unique within a request.', 400)
+
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+            model.objects.bulk_update(to_update, update_fields, batch_size=BULK_BATCH_SIZE)
+            # bulk_create()/bulk_update() send no signals
+            search_index.reindex(model, [obj.pk for obj in to_create + to_update])
+            if model is InvoicedJob:
+                # Including the awards invoices were moved off
+                margin_rollup.refresh([obj.award_id for obj in to_create + to_update] + old_award_ids)
+            if model is not SalesEnquiry:
+                transaction.on_commit(cash_flow.invalidate)
+
+            # Keep the enquiry -> award -> invoice links in step, as the edit views do
+            if model is SalesEnquiry:
+                for enquiry in to_create:
+                    enquiry.sync_linked_awards('Pending', request.user)
+                for enquiry in to_update:
+                    enquiry.sync_linked_awards(old_statuses[enquiry.pk], request.user)
+            elif model is MonthlyAward:
+                for award in to_update:
+                    award.sync_linked_sale()
+    except IntegrityError:
+        # A job number taken by a concurrent request since validation
+        return _error('Conflicts with a concurrent change; retry the request.', 409)
+
+    return JsonResponse({
+        'created': [obj.pk for obj in to_create],
+        'updated': [obj.pk for obj in to_update],
+    })
@@ -0,0 +1,29 @@
+from django.contrib import admin
+from .models import Attachment
+
+
+@admin.register(Attachment)
+class AttachmentAdmin(admin.ModelAdmin):
+    list_display = [
+        'filename',
+        'award',
+        'invoice',
+        'uploaded_by',
+        'uploaded_at'
+    ]
+
+    search_fields = [
+        'filename',
+        'award__job_number',
+        'invoice__award__job_number'
+    ]
+
+    list_select_related = ['award', 'invoice__award', 'uploaded_by']
+
+    readonly_fields = [
+        'document',
+        'award',
+        'invoice',
+        'uploaded_by',
+        'uploaded_at'
+    ]
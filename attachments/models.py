@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from invoiced_jobs.models import InvoicedJob
+from monthly_awards.models import MonthlyAward
+
+
+class Document(models.Model):
+    """One stored PDF, kept once however many attachments share its content (see attachments/storage.py)"""
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Document'
+        verbose_name_plural = 'Documents'
+
+    def __str__(self):
+        return self.sha256
+
+    @property
+    def relative_path(self):
+        """Path of the file under ATTACHMENTS_ROOT"""
+        return f'{self.sha256[:2]}/{self.sha256}.pdf'
+
+
+class Attachment(models.Model):
+    """A PDF attached to a monthly award or an invoiced job"""
+
+    document = models.ForeignKey(Document, on_delete=models.PROTECT, related_name='attachments')
+    award = models.ForeignKey(MonthlyAward, on_delete=models.CASCADE, null=True, blank=True,
+                              related_name='attachments')
+    invoice = models.ForeignKey(InvoicedJob, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='attachments')
+    filename = models.CharField(max_length=255)
+
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='attachments')
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['uploaded_at', 'id']
+        verbose_name = 'Attachment'
+        verbose_name_plural = 'Attachments'
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(award__isnull=False, invoice__isnull=True)
+                | models.Q(award__isnull=True, invoice__isnull=False),
+                name='attachment_has_one_owner',
+            ),
+        ]
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def owner(self):
+        return self.award or self.invoice
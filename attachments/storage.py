@@ -0,0 +1,181 @@
+"""
+Storing and serving attachment PDFs.
+
+Uploads never sit in memory or Django's temp directory: HashingUploadHandler
+takes the request body chunk by chunk as the multipart parser reads it,
+writing each chunk to a temporary file under ATTACHMENTS_ROOT/tmp and
+feeding it to a SHA-256 on the way. store() then files the upload under its
+hash (ab/abcd....pdf): content already stored just gets another Attachment
+row pointing at the same Document, and the duplicate bytes are thrown away.
+
+Downloads are checked by Django but sent by nginx: file_response() returns an
+empty response with X-Accel-Redirect pointing at nginx's internal
+/protected-attachments/ location (ATTACHMENTS_ACCEL_REDIRECT), so a gunicorn
+worker is only busy for the permission check, not for the transfer. Without
+nginx (runserver) the file is streamed by Django instead.
+
+A Document goes when its last attachment does (release()); ones left behind
+by cascades from deleted awards and invoices are purged by the nightly
+purge_unused_documents task.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import content_disposition_header
+
+from .models import Document
+
+FIELD_NAME = 'document'
+PDF_SIGNATURE = b'%PDF-'
+
+
+def root():
+    return Path(settings.ATTACHMENTS_ROOT)
+
+
+def document_path(document):
+    return root() / document.relative_path
+
+
+class HashedUpload(UploadedFile):
+    """An upload written to a temporary file by HashingUploadHandler, with its SHA-256"""
+
+    def __init__(self, file, name, size, sha256):
+        super().__init__(file, name, 'application/pdf', size)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Stream the `document` PDF field to disk, hashing it as it arrives
+
+    Anything else is discarded. If the file is not a PDF or is over
+    ATTACHMENTS_MAX_BYTES the upload stops and `error` says why.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.error = None
+        self.file = None
+        self.hash = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        if field_name != FIELD_NAME or self.file is not None:
+            self.hash = None
+            return
+        tmp = root() / 'tmp'
+        tmp.mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=tmp, suffix='.upload', delete=False)
+        self.hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.hash is None:
+            return None
+        if start == 0 and not raw_data.startswith(PDF_SIGNATURE):
+            self._stop('Only PDF files can be attached.')
+        if start + len(raw_data) > settings.ATTACHMENTS_MAX_BYTES:
+            self._stop(f'Attachments are limited to {settings.ATTACHMENTS_MAX_BYTES // (1024 * 1024)} MB.')
+        self.file.write(raw_data)
+        self.hash.update(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.hash is None:
+            return None
+        if file_size == 0:
+            self.error = 'The file is empty.'
+            self.hash = None
+            self.discard()
+            return None
+        self.file.flush()
+        self.file.seek(0)
+        upload = HashedUpload(self.file, os.path.basename(self.file_name)[:255], file_size, self.hash.hexdigest())
+        self.hash = None
+        return upload
+
+    def upload_interrupted(self):
+        self.discard()
+
+    def discard(self):
+        """Remove the temporary file, unless store() has already moved it into place"""
+        if self.file is not None:
+            self.file.close()
+            try:
+                os.unlink(self.file.name)
+            except FileNotFoundError:
+                pass
+
+    def _stop(self, error):
+        self.error = error
+        self.hash = None
+        self.discard()
+        # Read (and drop) the rest of the body so the browser gets the error page
+        raise StopUpload(connection_reset=False)
+
+
+def store(upload):
+    """The Document for a HashedUpload, moving its file into the store unless that content is there already
+
+    Call inside the transaction that creates the Attachment, so the row lock
+    keeps release() from deleting the Document in between.
+    """
+    document, created = Document.objects.select_for_update().get_or_create(
+        sha256=upload.sha256, defaults={'size': upload.size}
+    )
+    path = document_path(document)
+    if created or not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        upload.file.close()
+        os.replace(upload.temporary_file_path(), path)
+    return document
+
+
+def release(documents=None):
+    """Delete the given Documents (default: all of them) no attachment uses any more, with their files
+
+    Returns how many were deleted.
+    """
+    unused = Document.objects.exclude(attachments__isnull=False)
+    if documents is not None:
+        unused = unused.filter(pk__in=[document.pk for document in documents])
+
+    deleted = 0
+    with transaction.atomic():
+        for document in unused.select_for_update(skip_locked=True):
+            try:
+                document.delete()
+            except ProtectedError:
+                # Attached again since the query started
+                continue
+            # Unlinked before commit, while the row is still locked: an upload
+            # of the same content waits for the lock and then writes the file again
+            document_path(document).unlink(missing_ok=True)
+            deleted += 1
+    return deleted
+
+
+def file_response(attachment):
+    """The download response for an attachment: handed to nginx, or streamed when ATTACHMENTS_ACCEL_REDIRECT is off"""
+    document = attachment.document
+    if settings.ATTACHMENTS_ACCEL_REDIRECT:
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = settings.ATTACHMENTS_ACCEL_PREFIX + document.relative_path
+    else:
+        try:
+            response = FileResponse(document_path(document).open('rb'), content_type='application/pdf')
+        except FileNotFoundError:
+            raise Http404('Attachment file missing')
+    response['Content-Disposition'] = content_disposition_header(False, attachment.filename)
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
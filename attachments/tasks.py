@@ -0,0 +1,9 @@
+from taskqueue.registry import task
+
+from .storage import release
+
+
+@task(priority=-10)
+def purge_unused_documents():
+    """Delete stored PDFs no attachment uses - left behind when awards and invoices are deleted"""
+    return {'deleted': release()}
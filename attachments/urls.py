@@ -0,0 +1,12 @@
+from django.urls import path
+from .views import (
+    upload_attachment,
+    download_attachment,
+    delete_attachment
+)
+
+urlpatterns = [
+    path('<str:owner>/<int:pk>/upload/', upload_attachment, name='upload_attachment'),
+    path('<int:pk>/', download_attachment, name='download_attachment'),
+    path('<int:pk>/delete/', delete_attachment, name='delete_attachment'),
+]
@@ -0,0 +1,74 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_POST
+from invoiced_jobs.models import InvoicedJob
+from monthly_awards.models import MonthlyAward
+from . import storage
+from .models import Attachment
+
+# URL owner kind -> (model, Attachment field, edit page)
+OWNERS = {
+    'award': (MonthlyAward, 'award', 'edit_monthly_award'),
+    'invoice': (InvoicedJob, 'invoice', 'edit_invoiced_job'),
+}
+
+
+@login_required
+@require_POST
+@csrf_exempt
+def upload_attachment(request, owner, pk):
+    """Attach an uploaded PDF to a monthly award or invoiced job"""
+    # The streaming handler has to be in place before anything reads the
+    # body - the CSRF check included, so it runs in the inner view
+    handler = storage.HashingUploadHandler(request)
+    request.upload_handlers = [handler]
+    try:
+        return _upload_attachment(request, owner, pk, handler)
+    finally:
+        handler.discard()
+
+
+@csrf_protect
+def _upload_attachment(request, owner, pk, handler):
+    if owner not in OWNERS:
+        raise Http404('No such attachment owner')
+    model, field, edit_page = OWNERS[owner]
+    obj = get_object_or_404(model, pk=pk)
+
+    upload = request.FILES.get(storage.FIELD_NAME)
+    if handler.error:
+        messages.error(request, f'Not attached. {handler.error}')
+    elif upload is None:
+        messages.error(request, 'Choose a PDF to attach.')
+    else:
+        with transaction.atomic():
+            document = storage.store(upload)
+            Attachment.objects.create(document=document, filename=upload.name, uploaded_by=request.user,
+                                      **{field: obj})
+        messages.success(request, f'{upload.name} attached.')
+    return redirect(edit_page, pk=obj.pk)
+
+
+@login_required
+def download_attachment(request, pk):
+    """The PDF itself - sent by nginx after this check (see attachments/storage.py)"""
+    attachment = get_object_or_404(Attachment.objects.select_related('document'), pk=pk)
+    return storage.file_response(attachment)
+
+
+@login_required
+@require_POST
+def delete_attachment(request, pk):
+    attachment = get_object_or_404(Attachment.objects.select_related('document'), pk=pk)
+    edit_page, owner_pk = (
+        ('edit_monthly_award', attachment.award_id) if attachment.award_id
+        else ('edit_invoiced_job', attachment.invoice_id)
+    )
+    attachment.delete()
+    storage.release([attachment.document])
+    messages.success(request, f'{attachment.filename} removed.')
+    return redirect(edit_page, pk=owner_pk)
@@ -1,7 +1,7 @@
-from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from psl_app_project.concurrency import arender
 
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """Main dashboard view after login"""
-    return render(request, 'dashboard.html')
\ No newline at end of file
+    return await arender(request, 'dashboard.html')
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ForecastConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'forecast'
+
+    def ready(self):
+        from .cash_flow import connect_signals
+        connect_signals()
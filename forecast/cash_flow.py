@@ -0,0 +1,197 @@
+"""
+Cash-flow forecast: what is expected to be invoiced in each of the coming months.
+
+Two sources, both from one grouped SQL statement:
+
+- Pending invoices, by the month of their projected date and by component
+  (utility, CAD, topo, contractor). Pending invoices dated before this month
+  count in this month, as InvoicedJob.save() would move them there.
+- Run-rate projection of the award backlog: award value from the last
+  BACKLOG_MONTHS not yet on any invoice, invoiced or pending. Each month a
+  fixed share of what is left gets invoiced - the run rate, 1 / (1 + the
+  value-weighted average months from award to invoice over the last
+  HISTORY_MONTHS) - and is split into components in the mix invoiced over
+  the same period. The projection over the months is done in the same
+  statement (generate_series), not row by row in Python.
+
+The result is cached in the shared `reports` cache for FORECAST_CACHE_SECONDS.
+Saving or deleting an invoice or an award invalidates it (after the
+transaction commits) by moving the cache generation on; writes that skip
+signals - update(), bulk_update(), raw SQL - call invalidate() themselves.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from invoiced_jobs.models import InvoicedJob
+from monthly_awards.models import MonthlyAward
+
+HORIZONS = [12, 24, 36]
+DEFAULT_HORIZON = 12
+# Invoiced history the run rate and component mix are taken from
+HISTORY_MONTHS = 24
+# Older awards still short of their value are taken to be finished, not backlog
+BACKLOG_MONTHS = 24
+
+COMPONENTS = ['utility', 'cad', 'topo', 'contractor']
+CACHE_ALIAS = 'reports'
+GENERATION_KEY = 'cash_flow_forecast:generation'
+
+_TOTAL = 'i.utility_value + i.cad_value + i.topo_value + i.contractor_value'
+
+
+def _month(column):
+    """SQL: months since year 0 of a date column, so months apart is a subtraction"""
+    return f"(date_part('year', {column}) * 12 + date_part('month', {column}) - 1)::int"
+
+
+_FORECAST_SQL = f"""
+    WITH pending AS (
+        SELECT greatest({_month('i.date')} - %(first_month)s, 0) AS month_offset,
+               count(*) AS invoices,
+               sum(i.utility_value) AS utility, sum(i.cad_value) AS cad,
+               sum(i.topo_value) AS topo, sum(i.contractor_value) AS contractor
+        FROM invoiced_jobs_invoicedjob i
+        WHERE i.status = 'Pending' AND i.date < %(horizon_end)s
+        GROUP BY 1
+    ), backlog AS (
+        SELECT count(*) AS awards, coalesce(sum(a.value - coalesce(inv.total, 0)), 0) AS remaining
+        FROM monthly_awards_monthlyaward a
+        LEFT JOIN LATERAL (
+            SELECT sum({_TOTAL}) AS total FROM invoiced_jobs_invoicedjob i WHERE i.award_id = a.id
+        ) inv ON TRUE
+        WHERE a.date >= %(backlog_start)s AND a.value > coalesce(inv.total, 0)
+    ), history AS (
+        SELECT sum(({_TOTAL}) * greatest({_month('i.date')} - {_month('a.date')}, 0))
+                   / nullif(sum({_TOTAL}), 0) AS mean_lag,
+               nullif(sum({_TOTAL}), 0) AS total,
+               sum(i.utility_value) AS utility, sum(i.cad_value) AS cad,
+               sum(i.topo_value) AS topo, sum(i.contractor_value) AS contractor
+        FROM invoiced_jobs_invoicedjob i
+        JOIN monthly_awards_monthlyaward a ON a.id = i.award_id
+        WHERE i.status = 'Invoiced' AND i.date >= %(history_start)s AND i.date < %(first_day)s
+    ), rate AS (
+        SELECT h.*, 1 / (1 + h.mean_lag) AS run_rate FROM history h
+    ), projection AS (
+        SELECT m.month_offset, b.remaining * r.run_rate * power(1 - r.run_rate, m.month_offset) AS value
+        FROM generate_series(0, %(months)s - 1) AS m(month_offset)
+        CROSS JOIN backlog b
+        CROSS JOIN rate r
+    )
+    SELECT p.month_offset,
+           coalesce(q.invoices, 0) AS invoices,
+           {', '.join(f'coalesce(q.{name}, 0) AS pending_{name}' for name in COMPONENTS)},
+           {', '.join(f'coalesce(round(p.value * r.{name} / r.total, 2), 0) AS projected_{name}'
+                      for name in COMPONENTS)},
+           b.awards AS backlog_awards, b.remaining AS backlog, r.run_rate, r.mean_lag
+    FROM projection p
+    CROSS JOIN backlog b
+    CROSS JOIN rate r
+    LEFT JOIN pending q ON q.month_offset = p.month_offset
+    ORDER BY p.month_offset
+"""
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def forecast(months=DEFAULT_HORIZON, today=None):
+    """The forecast for `months` months from this one, from the cache when nothing has changed since
+
+    A dict: rows (one per month, with the pending and projected value of
+    each component, their totals and the running total), totals, backlog,
+    backlog_awards, run_rate and mean_lag (None without invoiced history)
+    and computed_at.
+    """
+    first_day = (today or timezone.localdate()).replace(day=1)
+    cache = caches[CACHE_ALIAS]
+    # Read before computing: a write meanwhile moves the generation on, so
+    # this (possibly stale) result is stored under a key no one reads again
+    generation = cache.get(GENERATION_KEY, 0)
+    key = f'cash_flow_forecast:{generation}:{first_day:%Y-%m}:{months}'
+    result = cache.get(key)
+    if result is None:
+        result = _compute(months, first_day)
+        cache.set(key, result, settings.FORECAST_CACHE_SECONDS)
+    return result
+
+
+def _compute(months, first_day):
+    params = {
+        'months': months,
+        'first_day': first_day,
+        'first_month': first_day.year * 12 + first_day.month - 1,
+        'horizon_end': _add_months(first_day, months),
+        'history_start': _add_months(first_day, -HISTORY_MONTHS),
+        'backlog_start': _add_months(first_day, -BACKLOG_MONTHS),
+    }
+    # The primary, not a replica: a result computed from a lagging replica
+    # would be cached past the invalidation of the write it missed
+    with connection.cursor() as cursor:
+        cursor.execute(_FORECAST_SQL, params)
+        columns = [column[0] for column in cursor.description]
+        records = [dict(zip(columns, record)) for record in cursor.fetchall()]
+
+    rows = []
+    running_total = 0
+    for record in records:
+        row = {
+            'month': _add_months(first_day, record['month_offset']),
+            'invoices': record['invoices'],
+            'pending': {name: record[f'pending_{name}'] for name in COMPONENTS},
+            'projected': {name: record[f'projected_{name}'] for name in COMPONENTS},
+        }
+        row['expected'] = {name: row['pending'][name] + row['projected'][name] for name in COMPONENTS}
+        row['pending_total'] = sum(row['pending'].values())
+        row['projected_total'] = sum(row['projected'].values())
+        row['total'] = row['pending_total'] + row['projected_total']
+        running_total += row['total']
+        row['running_total'] = running_total
+        rows.append(row)
+
+    totals = {
+        'invoices': sum(row['invoices'] for row in rows),
+        'expected': {name: sum(row['expected'][name] for row in rows) for name in COMPONENTS},
+        'pending_total': sum(row['pending_total'] for row in rows),
+        'projected_total': sum(row['projected_total'] for row in rows),
+        'total': running_total,
+    }
+    first = records[0] if records else {}
+    return {
+        'rows': rows,
+        'totals': totals,
+        'backlog': first.get('backlog', 0),
+        'backlog_awards': first.get('backlog_awards', 0),
+        'run_rate': first.get('run_rate'),
+        'mean_lag': first.get('mean_lag'),
+        'computed_at': timezone.now(),
+    }
+
+
+def invalidate():
+    """Make every cached forecast stale"""
+    cache = caches[CACHE_ALIAS]
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # First write since the cache was cleared
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def _changed(sender, raw=False, **kwargs):
+    if not raw:
+        # After commit, or a forecast computed meanwhile would cache the old rows under the new generation
+        transaction.on_commit(invalidate)
+
+
+def connect_signals():
+    # Awards too: their value is the backlog the projection works through
+    for model in (InvoicedJob, MonthlyAward):
+        post_save.connect(_changed, sender=model, dispatch_uid=f'forecast.saved.{model._meta.model_name}')
+        post_delete.connect(_changed, sender=model, dispatch_uid=f'forecast.deleted.{model._meta.model_name}')
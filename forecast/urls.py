@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import (
+    cash_flow_forecast
+)
+
+urlpatterns = [
+    path('', cash_flow_forecast, name='cash_flow_forecast'),
+]
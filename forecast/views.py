@@ -0,0 +1,43 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+from . import cash_flow
+
+
+def _horizon(request):
+    """Months ahead to forecast: ?months= if it is one of HORIZONS"""
+    try:
+        months = int(request.GET.get('months', cash_flow.DEFAULT_HORIZON))
+    except ValueError:
+        return cash_flow.DEFAULT_HORIZON
+    return months if months in cash_flow.HORIZONS else cash_flow.DEFAULT_HORIZON
+
+
+@login_required
+def cash_flow_forecast(request):
+    """Expected invoicing per month and component: pending invoices plus a run-rate projection of the award backlog
+
+    The figures come from cash_flow.forecast(), cached until an invoice or award changes.
+    """
+    months = _horizon(request)
+    result = cash_flow.forecast(months)
+
+    chart_max = max((row['total'] for row in result['rows']), default=0) or 1
+    chart = [
+        {
+            'row': row,
+            'pending_height': float(row['pending_total'] / chart_max * 100),
+            'projected_height': float(row['projected_total'] / chart_max * 100),
+        }
+        for row in result['rows']
+    ]
+
+    context = {
+        **result,
+        'chart': chart,
+        'months': months,
+        'horizons': cash_flow.HORIZONS,
+        'run_rate_percent': result['run_rate'] * 100 if result['run_rate'] is not None else None,
+        'history_months': cash_flow.HISTORY_MONTHS,
+        'backlog_months': cash_flow.BACKLOG_MONTHS,
+    }
+    return render(request, 'cash_flow_forecast.html', context)
@@ -0,0 +1,158 @@
+"""
+Gunicorn settings, picked up automatically from the working directory
+(`gunicorn`, which serves the app named by wsgi_app below).
+
+Worker and thread counts are derived from the CPUs and memory actually
+available to the process - the container's cgroup limits when there are
+any, otherwise the host's - and every setting can be overridden from env:
+
+    GUNICORN_BIND              address to listen on (default 0.0.0.0:8000)
+    GUNICORN_SERVER_MODE       wsgi (default) or asgi - uvicorn workers serving
+                               psl_app_project.asgi, one event loop per worker
+    GUNICORN_WORKER_CLASS      sync (default) or gthread, in wsgi mode
+    GUNICORN_WORKERS           worker processes (default: from CPUs, capped by memory)
+    GUNICORN_THREADS           threads per gthread worker (default 4)
+    GUNICORN_WORKER_MEMORY_MB  memory to allow per worker when capping (default 200)
+    GUNICORN_MEMORY_FRACTION   share of memory gunicorn may use (default 0.5, the
+                               rest is left for Postgres, nginx and the task worker)
+    GUNICORN_MAX_REQUESTS      restart a worker after this many requests (default 1000,
+                               0 disables)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests so workers don't restart together
+                               (default 10% of max_requests)
+    GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT / GUNICORN_KEEPALIVE
+    GUNICORN_PRELOAD           load Django once in the master before forking (default True)
+    GUNICORN_ACCESS_LOG        gunicorn's own access log (default: off - Django writes
+                               structured lines to logs/access.log)
+    GUNICORN_ERROR_LOG / GUNICORN_LOG_LEVEL
+
+gthread serves more concurrent requests per MB (slow clients and DB waits
+block a thread, not a process), but when a gthread worker is recycled by
+max_requests gunicorn closes connections it has accepted and not yet read,
+so an occasional request gets a reset. Sync workers finish theirs first,
+hence the default; with gthread, raise GUNICORN_MAX_REQUESTS to make the
+restarts rarer.
+
+In asgi mode a worker is not tied up by a slow client (uvicorn reads the
+request and writes the response without blocking other requests) and the
+async list views run their independent queries concurrently. Worker count
+is CPUs + 1; each worker serves many requests at once.
+
+`python -m gunicorn --print-config` shows the values in effect.
+"""
+import os
+
+# Not `config`: gunicorn would read that name as its own setting
+from decouple import config as env
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def available_cpus():
+    """CPUs this process may use, honouring affinity and cgroup (v2, then v1) quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota, period = None, None
+    cpu_max = _read('/sys/fs/cgroup/cpu.max')
+    if cpu_max:
+        limit, _, cgroup_period = cpu_max.partition(' ')
+        if limit != 'max':
+            quota, period = int(limit), int(cgroup_period)
+    else:
+        v1_quota = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        v1_period = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        if v1_quota and v1_period and int(v1_quota) > 0:
+            quota, period = int(v1_quota), int(v1_period)
+
+    if quota and period:
+        cpus = min(cpus, max(1, -(-quota // period)))
+    return max(1, cpus)
+
+
+def available_memory_mb():
+    """Memory this process may use in MB: the cgroup limit if set, else the host's total"""
+    total = None
+    meminfo = _read('/proc/meminfo')
+    if meminfo:
+        for line in meminfo.splitlines():
+            if line.startswith('MemTotal:'):
+                total = int(line.split()[1]) // 1024
+                break
+
+    limit = _read('/sys/fs/cgroup/memory.max') or _read('/sys/fs/cgroup/memory/memory.limit_in_bytes')
+    if limit and limit.isdigit():
+        limit_mb = int(limit) // (1024 * 1024)
+        # v1 reports "no limit" as a number near 2**63
+        if total is None or limit_mb < total:
+            total = limit_mb
+    return total
+
+
+def default_workers(worker_class, cpus, memory_mb):
+    """(2 x CPUs) + 1 sync workers, or CPUs + 1 threaded/async ones, capped by memory"""
+    workers = cpus * 2 + 1 if worker_class == 'sync' else cpus + 1
+    if memory_mb:
+        budget = memory_mb * env('GUNICORN_MEMORY_FRACTION', default=0.5, cast=float)
+        per_worker = env('GUNICORN_WORKER_MEMORY_MB', default=200, cast=int)
+        workers = min(workers, int(budget // per_worker))
+    return max(1, workers)
+
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+
+server_mode = env('GUNICORN_SERVER_MODE', default='wsgi')
+if server_mode == 'asgi':
+    wsgi_app = 'psl_app_project.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'psl_app_project.wsgi:application'
+    worker_class = env('GUNICORN_WORKER_CLASS', default='sync')
+threads = env('GUNICORN_THREADS', default=4, cast=int) if worker_class == 'gthread' else 1
+workers = env(
+    'GUNICORN_WORKERS',
+    default=default_workers(worker_class, available_cpus(), available_memory_mb()),
+    cast=int
+)
+
+# Import Django and the apps once in the master; forked workers share those
+# pages copy-on-write instead of each importing their own copy
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool)
+
+# Recycle workers to cap slow memory growth; the jitter staggers restarts
+max_requests = env('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', default=max_requests // 10, cast=int)
+
+timeout = env('GUNICORN_TIMEOUT', default=120, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+# nginx keeps upstream connections short; a few seconds is plenty
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Heartbeat files on tmpfs - a container's overlay filesystem can stall them
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = env('GUNICORN_ACCESS_LOG', default=None)
+errorlog = env('GUNICORN_ERROR_LOG', default='-')
+loglevel = env('GUNICORN_LOG_LEVEL', default='info')
+
+
+def pre_fork(server, worker):
+    # Never hand a database connection opened while preloading to the workers
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def when_ready(server):
+    server.log.info(
+        'Gunicorn ready (%s): %s %s worker(s) x %s thread(s), preload=%s, max_requests=%s (+0..%s)',
+        server_mode, workers, worker_class, threads, preload_app, max_requests, max_requests_jitter
+    )
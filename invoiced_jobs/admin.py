@@ -1,9 +1,13 @@
 from django.contrib import admin
+from search.admin import IndexedSearchAdminMixin
+from search.models import SearchEntry
 from .models import InvoicedJob
 
 
 @admin.register(InvoicedJob)
-class InvoicedJobAdmin(admin.ModelAdmin):
+class InvoicedJobAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
+    search_entity_type = SearchEntry.INVOICE
+
     list_display = [
         'get_job_number',
         'get_client',
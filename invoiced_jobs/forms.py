@@ -1,9 +1,11 @@
 from django import forms
+from psl_app_project.versioning import VersionedFormMixin
 from .models import InvoicedJob
 from monthly_awards.models import MonthlyAward
+from sales_tracker.forms import InlineUpdateFormMixin
 
 
-class InvoicedJobForm(forms.ModelForm):
+class InvoicedJobForm(VersionedFormMixin, forms.ModelForm):
     """Form for creating/editing invoiced jobs with better award selection"""
 
     # Add a search field for award selection
@@ -140,4 +142,12 @@ class QuickInvoiceForm(forms.ModelForm):
             'cad_value': 'CAD Value (£)',
             'topo_value': 'Topo Value (£)',
             'contractor_value': 'Contractor Value (£)',
-        }
\ No newline at end of file
+        }
+
+
+class InvoicedJobInlineForm(InlineUpdateFormMixin, forms.ModelForm):
+    """Form for inline status/value updates from the invoiced jobs table"""
+
+    class Meta:
+        model = InvoicedJob
+        fields = ['status', 'utility_value', 'cad_value', 'topo_value', 'contractor_value']
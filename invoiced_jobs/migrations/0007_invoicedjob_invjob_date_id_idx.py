@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoiced_jobs', '0006_alter_invoicedjob_created_by'),
+        ('monthly_awards', '0004_monthlyaward_award_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoicedjob',
+            index=models.Index(fields=['-date', '-id'], name='invjob_date_id_idx'),
+        ),
+    ]
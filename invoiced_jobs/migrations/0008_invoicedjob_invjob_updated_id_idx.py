@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoiced_jobs', '0007_invoicedjob_invjob_date_id_idx'),
+        ('monthly_awards', '0005_monthlyaward_award_updated_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoicedjob',
+            index=models.Index(fields=['updated_at', 'id'], name='invjob_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoiced_jobs', '0009_fiscal_period'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicedjob',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,10 +1,16 @@
+from decimal import Decimal
+
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
+from psl_app_project.fiscal import FiscalPeriod, FiscalYear
+from psl_app_project.versioning import VersionedModel
 from monthly_awards.models import MonthlyAward
 
 
-class InvoicedJob(models.Model):
+class InvoicedJob(VersionedModel):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
         ('Invoiced', 'Invoiced'),
@@ -27,6 +33,17 @@ class InvoicedJob(models.Model):
 
     # Date invoiced
     date = models.DateField(default=timezone.now, help_text="Date the job was invoiced")
+    # Generated from date by the database - see psl_app_project/fiscal.py
+    fiscal_year = models.GeneratedField(
+        expression=FiscalYear('date', start_month=settings.FISCAL_YEAR_START_MONTH),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+    fiscal_period = models.GeneratedField(
+        expression=FiscalPeriod('date', start_month=settings.FISCAL_YEAR_START_MONTH),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
 
     # Value breakdown
     utility_value = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -49,6 +66,14 @@ class InvoicedJob(models.Model):
         ordering = ['-date', '-created_at']
         verbose_name = 'Invoiced Job'
         verbose_name_plural = 'Invoiced Jobs'
+        indexes = [
+            # Month range filter + keyset pagination on (date, id)
+            models.Index(fields=['-date', '-id'], name='invjob_date_id_idx'),
+            # Incremental sync for the JSON API (updated_since + keyset on updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='invjob_updated_id_idx'),
+            # Fiscal period filters and per-period rollups, rows in keyset order
+            models.Index(fields=['fiscal_year', 'fiscal_period', '-date', '-id'], name='invjob_fiscal_idx'),
+        ]
 
     def __str__(self):
         desc = f" - {self.description[:30]}" if self.description else ""
@@ -61,16 +86,33 @@ class InvoicedJob(models.Model):
 
         Also auto-update date for old pending invoices
         """
-        if self.award:
-            self.psl_value = self.utility_value + self.cad_value + self.topo_value
+        self.update_calculated_fields()
+        super().save(*args, **kwargs)
 
-        # Auto-move old pending invoices to current month
+    def clean(self):
+        # Invoices dated in a closed month are frozen, except pending ones rolling forward (see periods/closing.py)
+        from periods.closing import check_writable
+        check_writable(self, self.date_after_save(), pending_may_leave=True)
+
+    def date_after_save(self):
+        """The date save() gives this invoice: old pending invoices move to the current month"""
         if self.status == 'Pending':
             current_date = timezone.now().date()
             if self.date < current_date.replace(day=1):  # If before current month
-                self.date = current_date
+                return current_date
+        return self.date
 
-        super().save(*args, **kwargs)
+    def update_calculated_fields(self):
+        """
+        Apply the PSL value and pending-date rules from save().
+
+        Called directly by bulk writes, which bypass save().
+        """
+        if self.award_id:
+            self.psl_value = self.utility_value + self.cad_value + self.topo_value
+
+        # Auto-move old pending invoices to current month
+        self.date = self.date_after_save()
 
     def get_total_invoice_value(self):
         """Get total value of this invoice's components"""
@@ -92,6 +134,23 @@ class InvoicedJob(models.Model):
         )
         return total
 
+    @staticmethod
+    def award_invoice_totals(award_ref):
+        """(count, total) of an award's invoices as subqueries, for annotating rows that
+        refer to the award (award_ref: an OuterRef to its id)"""
+        invoices = InvoicedJob.objects.filter(award=award_ref).order_by().values('award')
+        total = (
+            models.F('utility_value') + models.F('cad_value') +
+            models.F('topo_value') + models.F('contractor_value')
+        )
+        return (
+            Coalesce(models.Subquery(invoices.annotate(count=models.Count('id')).values('count')), 0),
+            Coalesce(
+                models.Subquery(invoices.annotate(total=models.Sum(total)).values('total')),
+                Decimal(0), output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+
     @staticmethod
     def award_has_value_mismatch(award):
         """Check if sum of all invoices doesn't match award value"""
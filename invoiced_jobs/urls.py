@@ -1,16 +1,22 @@
 from django.urls import path
 from .views import (
     invoiced_jobs_list,
+    invoiced_jobs_rows,
+    invoiced_job_text,
     add_invoiced_job,
     edit_invoiced_job,
     add_invoice_to_award,
-    delete_invoiced_job
+    delete_invoiced_job,
+    inline_update_invoiced_job
 )
 
 urlpatterns = [
     path('', invoiced_jobs_list, name='invoiced_jobs_list'),
+    path('rows/', invoiced_jobs_rows, name='invoiced_jobs_rows'),
+    path('text/<int:pk>/<str:field>/', invoiced_job_text, name='invoiced_job_text'),
     path('add/', add_invoiced_job, name='add_invoiced_job'),
     path('edit/<int:pk>/', edit_invoiced_job, name='edit_invoiced_job'),
     path('invoiced-jobs/<int:pk>/delete/', delete_invoiced_job, name='delete_invoiced_job'),
+    path('inline/<int:pk>/', inline_update_invoiced_job, name='inline_update_invoiced_job'),
     path('awards/<int:award_pk>/add-invoice/', add_invoice_to_award, name='add_invoice_to_award'),
 ]
\ No newline at end of file
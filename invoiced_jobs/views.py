@@ -1,88 +1,168 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from datetime import datetime
-from django.db.models import Sum, Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.urls import reverse
+from urllib.parse import urlencode
+from decimal import Decimal
+from django.db.models import Sum, Count, F, OuterRef, Q
+from django.db.models.functions import Coalesce
+from psl_app_project import fiscal
+from psl_app_project.concurrency import arender, run_concurrently
+from psl_app_project.projection import attach_previews, full_text, with_previews
+from psl_app_project.replica import use_replica
+from psl_app_project.versioning import CONFLICT_MESSAGE, EditConflict, rebase
+from periods import closing
+from periods.models import InvoiceSnapshot
 from .models import InvoicedJob
-from .forms import InvoicedJobForm
+from .forms import InvoicedJobForm, InvoicedJobInlineForm
 from monthly_awards.models import MonthlyAward
 
+# Invoice rows rendered per page / per lazy-loaded fragment
+JOBS_PAGE_SIZE = 50
 
-@login_required
-def invoiced_jobs_list(request):
-    """Invoiced jobs list view with year, month filtering, and mismatch detection"""
+# Columns the invoiced jobs table renders (with its award's), and its long text columns: field -> words shown
+JOB_ROW_FIELDS = [
+    'id', 'date', 'status', 'utility_value', 'cad_value', 'topo_value', 'contractor_value', 'psl_value',
+    'award__job_number', 'award__client', 'award__client_contact',
+]
+JOB_ROW_PREVIEWS = {'description': 15, 'award__location': 8}
+# The same for closed periods' invoice snapshots, which hold the award's details themselves
+JOB_SNAPSHOT_PREVIEWS = {'description': 15, 'location': 8}
 
-    # Get year and month from request, default to current
-    current_year = datetime.now().year
-    current_month = datetime.now().month
 
-    selected_year = request.GET.get('year', current_year)
-    selected_month = request.GET.get('month', current_month)
+def _job_rows(jobs):
+    """Invoiced jobs and their award narrowed to the columns the table renders, with the award's invoice total"""
+    _, total_invoiced = InvoicedJob.award_invoice_totals(OuterRef('award'))
+    return with_previews(
+        jobs.select_related('award').only(*JOB_ROW_FIELDS), JOB_ROW_PREVIEWS
+    ).annotate(award_total=F('award__value'), total_invoiced=total_invoiced)
 
-    # Convert to integers
-    try:
-        selected_year = int(selected_year)
-        selected_month = int(selected_month)
-    except (ValueError, TypeError):
-        selected_year = current_year
-        selected_month = current_month
-
-    # Filter invoiced jobs by selected year and month
-    jobs = InvoicedJob.objects.filter(
-        date__year=selected_year,
-        date__month=selected_month
-    ).select_related('award')
-
-    # Add mismatch flags to jobs
-    jobs_with_flags = []
-    for job in jobs:
-        job.has_mismatch = job.award.has_value_mismatch()
-        job.award_total = job.award.value
-        job.total_invoiced = job.award.get_total_invoiced()
-        job.this_invoice_total = (
-            job.utility_value +
-            job.cad_value +
-            job.topo_value +
-            job.contractor_value
-        )
-        jobs_with_flags.append(job)
 
-    # Calculate totals for the month
-    invoiced_jobs = [j for j in jobs_with_flags if j.status == 'Invoiced']
-    pending_jobs = [j for j in jobs_with_flags if j.status == 'Pending']
+def _job_snapshot_rows(closed_periods):
+    """Closed periods' invoice snapshots, as rows for the invoiced jobs table"""
+    return with_previews(
+        InvoiceSnapshot.objects.filter(period__in=closed_periods).defer('description', 'location'),
+        JOB_SNAPSHOT_PREVIEWS,
+    ).annotate(award_total=F('award_value'), total_invoiced=F('award_total_invoiced'))
+
+
+def _annotate_job_flags(job):
+    """Attach the text previews, invoice total and mismatch flag the invoiced jobs table renders
+    (to a row from _job_rows or _job_snapshot_rows)"""
+    job.has_mismatch = round(job.total_invoiced, 2) != round(job.award_total or 0, 2)
+    job.this_invoice_total = job.get_total_invoice_value()
+    return attach_previews(job, JOB_SNAPSHOT_PREVIEWS if getattr(job, 'is_snapshot', False) else JOB_ROW_PREVIEWS)
+
 
-    total_invoiced = sum(
-        job.utility_value + job.cad_value +
-        job.topo_value + job.contractor_value
-        for job in invoiced_jobs
+def _job_rows_context(fiscal_year, period, cursor):
+    """Fetch one keyset page of the period's (or year's) invoiced jobs and build the context for the rows fragment
+
+    Closed periods are read from their invoice snapshots.
+    """
+    page, next_cursor = closing.keyset_page_by_period(
+        fiscal_year, period, cursor, JOBS_PAGE_SIZE,
+        live_rows=lambda periods: _job_rows(
+            InvoicedJob.objects.filter(fiscal_year=fiscal_year, fiscal_period__in=periods)
+        ),
+        snapshot_rows=_job_snapshot_rows,
     )
-    total_pending = sum(job.utility_value + job.cad_value +
-        job.topo_value + job.contractor_value for job in pending_jobs)
-    total_value = total_invoiced + total_pending
 
-    # Generate year range (2020 to current year + 1)
-    year_range = range(2020, current_year + 2)
+    next_url = None
+    if next_cursor:
+        params = {'fy': fiscal_year, 'period': period or 'all', 'after': next_cursor}
+        next_url = f"{reverse('invoiced_jobs_rows')}?{urlencode(params)}"
+
+    return {
+        'jobs': [_annotate_job_flags(job) for job in page],
+        'next_url': next_url,
+        'status_choices': InvoicedJob.STATUS_CHOICES,
+    }
 
-    # Month names
-    months = [
-        (1, 'January'), (2, 'February'), (3, 'March'), (4, 'April'),
-        (5, 'May'), (6, 'June'), (7, 'July'), (8, 'August'),
-        (9, 'September'), (10, 'October'), (11, 'November'), (12, 'December')
-    ]
+
+def _job_rollup(fiscal_year):
+    """Invoiced and pending totals for each period of the fiscal year
+
+    Closed periods use their frozen totals; the open ones come from a single GROUP BY query.
+    """
+    closed = closing.closed_periods(fiscal_year)
+    rows = [closed_period.invoice_rollup_row() for closed_period in closed.values()]
+    if len(closed) < 12:
+        job_total = F('utility_value') + F('cad_value') + F('topo_value') + F('contractor_value')
+        rows += (
+            InvoicedJob.objects.filter(fiscal_year=fiscal_year)
+            .exclude(fiscal_period__in=closed)
+            .values('fiscal_period')
+            .annotate(
+                total_invoiced=Coalesce(Sum(job_total, filter=Q(status='Invoiced')), Decimal(0)),
+                total_pending=Coalesce(Sum(job_total, filter=Q(status='Pending')), Decimal(0)),
+                invoiced_count=Count('id', filter=Q(status='Invoiced')),
+                pending_count=Count('id', filter=Q(status='Pending')),
+                total_value=Sum(job_total),
+                count=Count('id'),
+            )
+            .order_by('fiscal_period')
+        )
+    return fiscal.fill_periods(
+        fiscal_year, rows,
+        total_invoiced=0, total_pending=0, invoiced_count=0, pending_count=0, total_value=0, count=0,
+    )
+
+
+@login_required
+@use_replica
+async def invoiced_jobs_list(request):
+    """Invoiced jobs list view for a fiscal period or whole fiscal year, with mismatch detection
+
+    The year's per-period totals come from a single GROUP BY query (and
+    the closed periods' frozen totals), run alongside the first page of
+    rows; the rest are loaded from invoiced_jobs_rows.
+    """
+    fiscal_year, period = fiscal.selected_period(request)
+
+    rollup, rows_context = await run_concurrently(
+        lambda: _job_rollup(fiscal_year),
+        lambda: _job_rows_context(fiscal_year, period, None),
+    )
+    selected = [row for row in rollup if period in (None, row['period'])]
+    totals = {
+        key: sum(row[key] for row in selected)
+        for key in ('total_invoiced', 'total_pending', 'invoiced_count', 'pending_count')
+    }
 
     context = {
-        'jobs': jobs_with_flags,
-        'total_invoiced': total_invoiced,
-        'total_pending': total_pending,
-        'total_value': total_value,
-        'invoiced_count': len(invoiced_jobs),
-        'pending_count': len(pending_jobs),
-        'selected_year': selected_year,
-        'selected_month': selected_month,
-        'year_range': year_range,
-        'months': months,
+        'total_invoiced': totals['total_invoiced'],
+        'total_pending': totals['total_pending'],
+        'total_value': totals['total_invoiced'] + totals['total_pending'],
+        'invoiced_count': totals['invoiced_count'],
+        'pending_count': totals['pending_count'],
+        'jobs_count': totals['invoiced_count'] + totals['pending_count'],
+        'rollup': rollup,
+        'selected_year': fiscal_year,
+        'selected_period': period,
+        'period_label': fiscal.period_label(fiscal_year, period),
+        'year_choices': [(year, fiscal.fiscal_year_label(year)) for year in fiscal.year_range()],
     }
-    return render(request, 'invoiced_jobs_list.html', context)
+    context.update(rows_context)
+    return await arender(request, 'invoiced_jobs_list.html', context)
+
+
+@login_required
+@use_replica
+def invoiced_jobs_rows(request):
+    """Next page of invoiced job rows for the selected period, as a table-row fragment"""
+    fiscal_year, period = fiscal.selected_period(request)
+
+    context = _job_rows_context(fiscal_year, period, request.GET.get('after'))
+    return render(request, 'invoiced_job_rows.html', context)
+
+
+@login_required
+@use_replica
+def invoiced_job_text(request, pk, field):
+    """Full text of one of an invoiced job row's previewed columns, as JSON"""
+    return full_text(InvoicedJob.objects.all(), pk, field, JOB_ROW_PREVIEWS)
 
 
 @login_required
@@ -111,19 +191,31 @@ def edit_invoiced_job(request, pk):
     """Edit existing invoiced job"""
     job = get_object_or_404(InvoicedJob, pk=pk)
 
+    conflict = None
     if request.method == 'POST':
         form = InvoicedJobForm(request.POST, instance=job)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Invoice updated successfully!')
-            return redirect('invoiced_jobs_list')
+            try:
+                form.save()
+            except EditConflict:
+                rebased = rebase(form)
+                if rebased is None:
+                    messages.error(request, 'This invoice was deleted by someone else while you were editing it.')
+                    return redirect('invoiced_jobs_list')
+                form, conflict = rebased
+                job = form.instance
+            else:
+                messages.success(request, 'Invoice updated successfully!')
+                return redirect('invoiced_jobs_list')
     else:
         form = InvoicedJobForm(instance=job)
 
     context = {
         'form': form,
         'action': 'Edit',
-        'job': job
+        'job': job,
+        'conflict': conflict,
+        'attachments': job.attachments.select_related('uploaded_by')
     }
     return render(request, 'invoiced_job_form.html', context)
 
@@ -134,6 +226,11 @@ def delete_invoiced_job(request, pk):
     job = get_object_or_404(InvoicedJob, pk=pk)
 
     if request.method == 'POST':
+        locked = closing.locked_reason(job)
+        if locked:
+            messages.error(request, f'Invoice not deleted. {locked}')
+            return redirect('invoiced_jobs_list')
+
         award = job.award
         job.delete()
 
@@ -174,4 +271,37 @@ def add_invoice_to_award(request, award_pk):
         'action': 'Add Invoice',
         'award': award
     }
-    return render(request, 'invoiced_job_form.html', context)
\ No newline at end of file
+    return render(request, 'invoiced_job_form.html', context)
+
+
+@login_required
+@require_POST
+def inline_update_invoiced_job(request, pk):
+    """Inline status/value update from the invoiced jobs table - returns the re-rendered row"""
+    job = get_object_or_404(InvoicedJob.objects.select_related('award'), pk=pk)
+
+    form = InvoicedJobInlineForm(request.POST, instance=job)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    try:
+        form.save()
+    except EditConflict:
+        return JsonResponse({'errors': {'__all__': [CONFLICT_MESSAGE]}}, status=409)
+    updated_job = _annotate_job_flags(_job_rows(InvoicedJob.objects.filter(pk=pk)).get())
+
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'id': updated_job.pk,
+            'status': updated_job.status,
+            'date': updated_job.date.isoformat(),
+            'psl_value': str(updated_job.psl_value),
+            'this_invoice_total': str(updated_job.this_invoice_total),
+            'has_mismatch': updated_job.has_mismatch,
+        })
+
+    context = {
+        'job': updated_job,
+        'status_choices': InvoicedJob.STATUS_CHOICES,
+    }
+    return render(request, 'invoiced_job_row.html', context)
\ No newline at end of file
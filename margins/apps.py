@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MarginsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'margins'
+
+    def ready(self):
+        from .rollup import connect_signals
+        connect_signals()
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from margins.rollup import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the margin rollup from the invoice table'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rebuild()} margin rollup rows'))
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Fill the rollup from the invoices already there (the same statement as margins.rollup.rebuild())
+POPULATE = """
+INSERT INTO margins_marginrollup
+    (award_id, fiscal_year, fiscal_period, status, invoice_count, psl_value, contractor_value)
+SELECT award_id, fiscal_year, fiscal_period, status, count(*),
+       sum(utility_value + cad_value + topo_value), sum(contractor_value)
+FROM invoiced_jobs_invoicedjob
+GROUP BY award_id, fiscal_year, fiscal_period, status
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('monthly_awards', '0006_fiscal_period'),
+        ('invoiced_jobs', '0009_fiscal_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarginRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.IntegerField()),
+                ('fiscal_period', models.IntegerField()),
+                ('status', models.CharField(max_length=10)),
+                ('invoice_count', models.PositiveIntegerField()),
+                ('psl_value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('contractor_value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('award', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='margin_rollups', to='monthly_awards.monthlyaward')),
+            ],
+            options={
+                'verbose_name': 'Margin Rollup',
+                'verbose_name_plural': 'Margin Rollups',
+                'indexes': [models.Index(fields=['fiscal_year', 'fiscal_period'], name='margin_rollup_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('award', 'fiscal_year', 'fiscal_period', 'status'), name='margin_rollup_unique')],
+            },
+        ),
+        migrations.RunSQL(POPULATE, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+
+from monthly_awards.models import MonthlyAward
+
+
+class MarginRollup(models.Model):
+    """An award's invoices in one fiscal period and status, summed into PSL and contractor value
+
+    Maintained from the invoice table by margins/rollup.py; the margin
+    report reads only this table (and awards for their client and job number).
+    """
+
+    award = models.ForeignKey(MonthlyAward, on_delete=models.CASCADE, related_name='margin_rollups')
+    fiscal_year = models.IntegerField()
+    fiscal_period = models.IntegerField()
+    status = models.CharField(max_length=10)
+
+    invoice_count = models.PositiveIntegerField()
+    # Utility + CAD + topo - the PSL share of the invoices
+    psl_value = models.DecimalField(max_digits=14, decimal_places=2)
+    contractor_value = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        verbose_name = 'Margin Rollup'
+        verbose_name_plural = 'Margin Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['award', 'fiscal_year', 'fiscal_period', 'status'],
+                                    name='margin_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['fiscal_year', 'fiscal_period'], name='margin_rollup_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"Award {self.award_id} {self.fiscal_year}/{self.fiscal_period} {self.status}"
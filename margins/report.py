@@ -0,0 +1,145 @@
+"""
+Margin report queries - grouped SQL over MarginRollup, never the invoice history.
+
+An invoice's PSL share is its utility + CAD + topo value and the contractor
+share its contractor value; margin is PSL / (PSL + contractor). Each
+function narrows the rollup to a fiscal year (and optionally a period and
+invoice status) through its (fiscal_year, fiscal_period) index and groups
+what is left, so drilling from the year to a month, a client or an award is
+another small query over the same rows.
+"""
+from django.db import connections, router
+from django.db.models import Count, F, Sum
+
+from psl_app_project import fiscal
+
+from .models import MarginRollup
+
+# Awards whose margin is this many standard deviations from the typical award's are outliers
+OUTLIER_DEVIATIONS = 2
+# ... as long as they invoiced at least this much (tiny awards swing wildly)
+OUTLIER_MIN_VALUE = 1000
+OUTLIERS_SHOWN = 25
+
+_TOTALS = {
+    'psl': Sum('psl_value'),
+    'contractor': Sum('contractor_value'),
+    'invoices': Sum('invoice_count'),
+}
+
+
+def margin(psl, contractor):
+    """PSL share of the total as a percentage, or None with nothing invoiced"""
+    total = psl + contractor
+    return float(psl / total * 100) if total else None
+
+
+def _with_margin(row):
+    row['total'] = row['psl'] + row['contractor']
+    row['margin'] = margin(row['psl'], row['contractor'])
+    return row
+
+
+def scope(fiscal_year, period=None, status=None):
+    """The rollup rows of a fiscal year or period, optionally of one invoice status"""
+    rows = MarginRollup.objects.filter(fiscal_year=fiscal_year)
+    if period:
+        rows = rows.filter(fiscal_period=period)
+    if status:
+        rows = rows.filter(status=status)
+    return rows
+
+
+def totals(rows):
+    """PSL, contractor, invoice count, total and margin of a scope()"""
+    row = rows.aggregate(**_TOTALS)
+    return _with_margin({name: value or 0 for name, value in row.items()})
+
+
+def monthly_trend(fiscal_year, status=None):
+    """The year's 12 periods with their margin, and the change from the same period a year before"""
+    rows = (
+        MarginRollup.objects.filter(fiscal_year__in=[fiscal_year - 1, fiscal_year])
+        .filter(**({'status': status} if status else {}))
+        .values('fiscal_year', 'fiscal_period')
+        .annotate(**_TOTALS)
+        .order_by()
+    )
+    by_year = {fiscal_year - 1: [], fiscal_year: []}
+    for row in rows:
+        by_year[row['fiscal_year']].append(row)
+
+    zero = {'psl': 0, 'contractor': 0, 'invoices': 0}
+    previous = fiscal.fill_periods(fiscal_year - 1, by_year[fiscal_year - 1], **zero)
+    trend = [_with_margin(row) for row in fiscal.fill_periods(fiscal_year, by_year[fiscal_year], **zero)]
+    for row, before in zip(trend, previous):
+        before_margin = margin(before['psl'], before['contractor'])
+        row['previous_margin'] = before_margin
+        row['change'] = row['margin'] - before_margin if None not in (row['margin'], before_margin) else None
+    return trend
+
+
+def by_client(rows, limit=50):
+    """Clients in a scope() by total invoiced, with their margin"""
+    clients = (
+        rows.values(client=F('award__client'))
+        .annotate(awards=Count('award', distinct=True), **_TOTALS)
+        .annotate(total=F('psl') + F('contractor'))
+        .order_by('-total', 'client')[:limit]
+    )
+    return [_with_margin(row) for row in clients]
+
+
+def by_award(rows, limit=100):
+    """Awards in a scope() by total invoiced, with their margin"""
+    awards = (
+        rows.values('award', job_number=F('award__job_number'), client=F('award__client'),
+                    award_value=F('award__value'))
+        .annotate(**_TOTALS)
+        .annotate(total=F('psl') + F('contractor'))
+        .order_by('-total', 'award')[:limit]
+    )
+    return [_with_margin(row) for row in awards]
+
+
+_OUTLIER_SQL = """
+    WITH awards AS (
+        SELECT r.award_id, sum(r.psl_value) AS psl, sum(r.contractor_value) AS contractor,
+               sum(r.psl_value) * 100.0 / nullif(sum(r.psl_value + r.contractor_value), 0) AS margin
+        FROM margins_marginrollup r
+        WHERE {where}
+        GROUP BY r.award_id
+        HAVING sum(r.psl_value + r.contractor_value) >= %(min_value)s
+    ), spread AS (
+        SELECT avg(margin) AS mean, stddev_pop(margin) AS sd FROM awards
+    )
+    SELECT a.award_id, m.job_number, m.client, a.psl, a.contractor, a.margin, s.mean,
+           (a.margin - s.mean) / s.sd AS deviations
+    FROM awards a
+    CROSS JOIN spread s
+    JOIN monthly_awards_monthlyaward m ON m.id = a.award_id
+    WHERE s.sd > 0 AND abs(a.margin - s.mean) >= %(deviations)s * s.sd
+    ORDER BY abs(a.margin - s.mean) DESC, a.award_id
+    LIMIT %(limit)s
+"""
+
+
+def outliers(fiscal_year, period=None, status=None):
+    """Awards whose margin is far from the scope's typical award margin, most unusual first"""
+    where = ['r.fiscal_year = %(fiscal_year)s']
+    if period:
+        where.append('r.fiscal_period = %(period)s')
+    if status:
+        where.append('r.status = %(status)s')
+    params = {
+        'fiscal_year': fiscal_year, 'period': period, 'status': status,
+        'min_value': OUTLIER_MIN_VALUE, 'deviations': OUTLIER_DEVIATIONS, 'limit': OUTLIERS_SHOWN,
+    }
+    # A raw cursor, so pick the database as the ORM would (the replica on @use_replica pages)
+    with connections[router.db_for_read(MarginRollup)].cursor() as cursor:
+        cursor.execute(_OUTLIER_SQL.format(where=' AND '.join(where)), params)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    for row in rows:
+        row['total'] = row['psl'] + row['contractor']
+    return rows
@@ -0,0 +1,90 @@
+"""
+Keeping the margin rollup (MarginRollup) in step with the invoice table.
+
+One row per award, fiscal period and invoice status holds the summed PSL
+share (utility + CAD + topo) and contractor value, so the margin report
+groups a few thousand pre-summed rows instead of every invoice in history.
+Rows are written with one grouped INSERT ... SELECT ... ON CONFLICT DO UPDATE
+over the invoices, so refreshing one award and rebuilding the table are the
+same statement with a different WHERE.
+
+Invoice saves and deletes made through the ORM refresh their award (and the
+award an invoice was moved off) from signals. Writes that skip signals -
+update(), bulk_create(), bulk_update() - must call refresh() themselves (or
+leave it to the nightly rebuild / `manage.py rebuild_margin_rollup`).
+"""
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from invoiced_jobs.models import InvoicedJob
+
+_PSL = 'i.utility_value + i.cad_value + i.topo_value'
+
+_UPSERT_SQL = f"""
+    INSERT INTO margins_marginrollup
+        (award_id, fiscal_year, fiscal_period, status, invoice_count, psl_value, contractor_value)
+    SELECT i.award_id, i.fiscal_year, i.fiscal_period, i.status, count(*), sum({_PSL}), sum(i.contractor_value)
+    FROM invoiced_jobs_invoicedjob i
+    WHERE {{where}}
+    GROUP BY i.award_id, i.fiscal_year, i.fiscal_period, i.status
+    ON CONFLICT (award_id, fiscal_year, fiscal_period, status) DO UPDATE SET
+        invoice_count = EXCLUDED.invoice_count,
+        psl_value = EXCLUDED.psl_value,
+        contractor_value = EXCLUDED.contractor_value
+"""
+
+# Rows whose invoices have all gone (deleted, moved to another period, status or award)
+_DELETE_EMPTY_SQL = """
+    DELETE FROM margins_marginrollup r
+    WHERE {where} AND NOT EXISTS (
+        SELECT 1 FROM invoiced_jobs_invoicedjob i
+        WHERE i.award_id = r.award_id AND i.fiscal_year = r.fiscal_year
+          AND i.fiscal_period = r.fiscal_period AND i.status = r.status
+    )
+"""
+
+
+def refresh(award_ids):
+    """Recompute the rollup rows of these awards"""
+    award_ids = sorted({int(pk) for pk in award_ids if pk is not None})
+    if not award_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(_DELETE_EMPTY_SQL.format(where='r.award_id = ANY(%(ids)s)'), {'ids': award_ids})
+        cursor.execute(_UPSERT_SQL.format(where='i.award_id = ANY(%(ids)s)'), {'ids': award_ids})
+
+
+def rebuild():
+    """Rewrite the whole rollup from the invoice table; returns the number of rows
+
+    DELETE rather than TRUNCATE so the report keeps reading the old rows
+    until the new ones are committed.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM margins_marginrollup')
+        cursor.execute(_UPSERT_SQL.format(where='TRUE'))
+        return cursor.rowcount
+
+
+def _remember_award(sender, instance, raw=False, **kwargs):
+    # The award an existing invoice is saved off, if it is being moved
+    instance._margin_old_award_id = None
+    if instance.pk and not raw:
+        instance._margin_old_award_id = (
+            sender.objects.filter(pk=instance.pk).values_list('award_id', flat=True).first()
+        )
+
+
+def _saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh([instance.award_id, getattr(instance, '_margin_old_award_id', None)])
+
+
+def _deleted(sender, instance, **kwargs):
+    refresh([instance.award_id])
+
+
+def connect_signals():
+    pre_save.connect(_remember_award, sender=InvoicedJob, dispatch_uid='margins.remember_award')
+    post_save.connect(_saved, sender=InvoicedJob, dispatch_uid='margins.saved')
+    post_delete.connect(_deleted, sender=InvoicedJob, dispatch_uid='margins.deleted')
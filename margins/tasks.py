@@ -0,0 +1,9 @@
+from taskqueue.registry import task
+
+from .rollup import rebuild
+
+
+@task(priority=-10)
+def rebuild_margin_rollup():
+    """Rewrite the margin rollup, catching invoice writes that skipped refresh()"""
+    return {'rows': rebuild()}
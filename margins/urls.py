@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import (
+    margin_report,
+    award_margin
+)
+
+urlpatterns = [
+    path('', margin_report, name='margin_report'),
+    path('award/<int:pk>/', award_margin, name='award_margin'),
+]
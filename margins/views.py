@@ -0,0 +1,95 @@
+from django.contrib.auth.decorators import login_required
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from invoiced_jobs.models import InvoicedJob
+from monthly_awards.models import MonthlyAward
+from psl_app_project import fiscal
+from psl_app_project.concurrency import arender, run_concurrently
+from psl_app_project.replica import use_replica
+from . import report
+
+STATUS_CHOICES = [('', 'All invoices'), ('Invoiced', 'Invoiced only'), ('Pending', 'Pending only')]
+
+
+def _filters(request):
+    """(fiscal year, period or None, status or None) - the whole year unless ?period= picks a month"""
+    fiscal_year, period = fiscal.selected_period(request)
+    if 'period' not in request.GET:
+        period = None
+    status = request.GET.get('status')
+    if status not in {value for value, label in STATUS_CHOICES if value}:
+        status = None
+    return fiscal_year, period, status
+
+
+@login_required
+@use_replica
+async def margin_report(request):
+    """PSL vs contractor share by month, client and award, with the outlying awards
+
+    Every figure comes from the margin rollup; the month trend, the
+    breakdown and the outliers are separate small queries run side by side.
+    """
+    fiscal_year, period, status = _filters(request)
+    client = request.GET.get('client')
+    rows = report.scope(fiscal_year, period, status)
+    if client:
+        breakdown = lambda: report.by_award(rows.filter(award__client=client))
+    else:
+        breakdown = lambda: report.by_client(rows)
+
+    trend, totals, breakdown, outliers = await run_concurrently(
+        lambda: report.monthly_trend(fiscal_year, status),
+        lambda: report.totals(rows.filter(award__client=client) if client else rows),
+        breakdown,
+        lambda: report.outliers(fiscal_year, period, status),
+    )
+    chart_max = max((row['total'] for row in trend), default=0) or 1
+    for row in trend:
+        row['psl_height'] = float(row['psl'] / chart_max * 100)
+        row['contractor_height'] = float(row['contractor'] / chart_max * 100)
+
+    context = {
+        'trend': trend,
+        'totals': totals,
+        'breakdown': breakdown,
+        'outliers': outliers,
+        'client': client,
+        'selected_year': fiscal_year,
+        'selected_period': period,
+        'selected_status': status or '',
+        'period_label': fiscal.period_label(fiscal_year, period),
+        'year_choices': [(year, fiscal.fiscal_year_label(year)) for year in fiscal.year_range()],
+        'status_choices': STATUS_CHOICES,
+        'outlier_deviations': report.OUTLIER_DEVIATIONS,
+        'outlier_min_value': report.OUTLIER_MIN_VALUE,
+    }
+    return await arender(request, 'margin_report.html', context)
+
+
+@login_required
+@use_replica
+async def award_margin(request, pk):
+    """One award's invoices with their PSL and contractor shares"""
+    award, invoices = await run_concurrently(
+        lambda: get_object_or_404(MonthlyAward.objects.only('job_number', 'client', 'value', 'date'), pk=pk),
+        lambda: list(
+            InvoicedJob.objects.filter(award_id=pk)
+            .only('date', 'status', 'description', 'utility_value', 'cad_value', 'topo_value', 'contractor_value')
+            .annotate(psl=F('utility_value') + F('cad_value') + F('topo_value'))
+            .order_by('date', 'id')
+        ),
+    )
+    for invoice in invoices:
+        invoice.margin = report.margin(invoice.psl, invoice.contractor_value)
+    psl = sum(invoice.psl for invoice in invoices)
+    contractor = sum(invoice.contractor_value for invoice in invoices)
+
+    context = {
+        'award': award,
+        'invoices': invoices,
+        'psl': psl,
+        'contractor': contractor,
+        'margin': report.margin(psl, contractor),
+    }
+    return await arender(request, 'award_margin.html', context)
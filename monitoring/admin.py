@@ -0,0 +1,42 @@
+from django.contrib import admin
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = [
+        'created_at',
+        'duration_ms',
+        'view_name',
+        'database',
+        'fingerprint'
+    ]
+
+    list_filter = [
+        'database',
+        'created_at'
+    ]
+
+    search_fields = [
+        'fingerprint',
+        'view_name',
+        'path'
+    ]
+
+    readonly_fields = [
+        'fingerprint',
+        'sql',
+        'params',
+        'duration_ms',
+        'database',
+        'view_name',
+        'path',
+        'stack_location',
+        'explain_plan',
+        'created_at'
+    ]
+
+    list_per_page = 25
+
+    def has_add_permission(self, request):
+        return False
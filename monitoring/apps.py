@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        # Always installed: the access log reports every request's SQL time and query count
+        from .slow_queries import install_wrapper
+        connection_created.connect(install_wrapper, dispatch_uid='monitoring.slow_query_wrapper')
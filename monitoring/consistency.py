@@ -0,0 +1,176 @@
+"""
+Finding and repairing drift between the copies the sales -> award -> invoice
+sync keeps.
+
+A monthly award linked to a sales enquiry carries copies of the enquiry's
+job number, client, contact, email, phone, location and value, and each
+invoice stores a PSL value worked out from its own breakdown. The edit views
+keep these in step; the admin, queryset.update() and hand-run SQL do not.
+
+check() finds every problem in one GROUP BY over awards joined to their
+enquiry and invoices (plus an anti-join for awarded enquiries with no award),
+so it reads each table once whatever the history. repair() fixes what can be
+fixed safely with three set-based UPDATEs in one transaction:
+
+- copied fields: whichever side was saved last wins. An award newer than its
+  enquiry is copied onto the enquiry (the newest award, if there are
+  several), then enquiries are copied onto older awards. An award job number
+  already used by another enquiry is left for a person to sort out.
+- PSL value: recalculated as invoice save() does.
+
+Awards and invoices dated in a closed period (periods app) are left as they
+are - the database would refuse the UPDATE - and stay in the report until the
+period is reopened.
+
+Status problems - an award whose enquiry is not "Awarded", or an "Awarded"
+enquiry with no award - are only reported: the sync would delete or create
+awards and invoices, which needs a person to decide.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from forecast import cash_flow
+from monthly_awards.models import MonthlyAward
+from sales_tracker.models import SalesEnquiry
+from search import indexing as search_index
+
+# Fields MonthlyAward copies from its SalesEnquiry (see SalesEnquiry.sync_linked_awards)
+COPIED_FIELDS = ['job_number', 'client', 'client_contact', 'email', 'phone', 'location', 'value']
+
+# Text columns where NULL and '' mean the same thing
+_NULLABLE_TEXT = {'email', 'phone'}
+
+_PSL_VALUE = 'i.utility_value + i.cad_value + i.topo_value'
+
+
+def _differs(field, award='a', sale='s'):
+    if field in _NULLABLE_TEXT:
+        return f"coalesce({award}.{field}, '') <> coalesce({sale}.{field}, '')"
+    return f'{award}.{field} IS DISTINCT FROM {sale}.{field}'
+
+
+def _any_differs(award='a', sale='s'):
+    return '(' + ' OR '.join(_differs(field, award, sale) for field in COPIED_FIELDS) + ')'
+
+
+def _job_number_taken(award='a', sale='s'):
+    """The award's job number belongs to another enquiry (an index lookup on the unique job number)"""
+    return (f'EXISTS (SELECT 1 FROM sales_tracker_salesenquiry o '
+            f'WHERE o.job_number = {award}.job_number AND o.id <> {sale}.id)')
+
+
+def _copy(source, fields=COPIED_FIELDS):
+    return ', '.join(f'{field} = {source}.{field}' for field in fields)
+
+
+_CHECK_SQL = f"""
+    SELECT a.id, a.sale_id, a.job_number, s.job_number, s.status,
+           array_remove(ARRAY[{', '.join(f"CASE WHEN {_differs(field)} THEN '{field}' END" for field in COPIED_FIELDS)}], NULL),
+           a.updated_at > s.updated_at,
+           {_job_number_taken()},
+           count(i.id) FILTER (WHERE i.psl_value IS DISTINCT FROM {_PSL_VALUE})
+    FROM monthly_awards_monthlyaward a
+    LEFT JOIN sales_tracker_salesenquiry s ON s.id = a.sale_id
+    LEFT JOIN invoiced_jobs_invoicedjob i ON i.award_id = a.id
+    GROUP BY a.id, s.id
+    HAVING (s.id IS NOT NULL AND ({_any_differs()} OR s.status <> 'Awarded'))
+        OR count(i.id) FILTER (WHERE i.psl_value IS DISTINCT FROM {_PSL_VALUE}) > 0
+    ORDER BY a.id
+"""
+
+# Newest award per enquiry onto enquiries saved before it - except job numbers
+# another enquiry has, or that two enquiries would both be given
+_AWARD_TO_SALE_SQL = f"""
+    UPDATE sales_tracker_salesenquiry s
+    SET {_copy('a')}, updated_at = %(now)s, version = s.version + 1
+    FROM (
+        SELECT newest.*, count(*) OVER (PARTITION BY job_number) AS sharing
+        FROM (
+            SELECT DISTINCT ON (sale_id) *
+            FROM monthly_awards_monthlyaward
+            WHERE sale_id IS NOT NULL
+            ORDER BY sale_id, updated_at DESC, id DESC
+        ) newest
+    ) a
+    WHERE s.id = a.sale_id
+      AND a.updated_at > s.updated_at
+      AND {_any_differs()}
+      AND a.sharing = 1
+      AND NOT {_job_number_taken()}
+    RETURNING s.id
+"""
+
+def _open_period(row):
+    """SQL condition: `row` is not dated in a closed period"""
+    return (f'NOT EXISTS (SELECT 1 FROM periods_closedperiod p '
+            f'WHERE {row}.date BETWEEN p.start_date AND p.end_date)')
+
+
+# Enquiries onto awards saved before (or with) them - including those just updated above
+_SALE_TO_AWARD_SQL = f"""
+    UPDATE monthly_awards_monthlyaward a
+    SET {_copy('s')}, updated_at = %(now)s, version = a.version + 1
+    FROM sales_tracker_salesenquiry s
+    WHERE s.id = a.sale_id
+      AND s.updated_at >= a.updated_at
+      AND {_any_differs()}
+      AND {_open_period('a')}
+    RETURNING a.id
+"""
+
+_PSL_VALUE_SQL = f"""
+    UPDATE invoiced_jobs_invoicedjob i
+    SET psl_value = {_PSL_VALUE}, updated_at = %(now)s, version = i.version + 1
+    WHERE i.psl_value IS DISTINCT FROM {_PSL_VALUE}
+      AND {_open_period('i')}
+    RETURNING i.id
+"""
+
+
+def check():
+    """Every inconsistency, as {'drifted': [...], 'not_awarded': [...], 'psl_value': [...], 'no_award': [...]}
+
+    Each list holds dicts with the award/enquiry ids and job numbers;
+    drifted entries also name their differing fields, which side is newer
+    and whether the award's job number is taken by another enquiry.
+    """
+    report = {'drifted': [], 'not_awarded': [], 'psl_value': [], 'no_award': []}
+    with connection.cursor() as cursor:
+        cursor.execute(_CHECK_SQL)
+        for award_id, sale_id, award_job, sale_job, status, fields, award_newer, job_taken, bad_psl in cursor.fetchall():
+            row = {'award_id': award_id, 'sale_id': sale_id, 'award_job_number': award_job,
+                   'sale_job_number': sale_job}
+            if fields:
+                report['drifted'].append({**row, 'fields': fields, 'award_newer': award_newer,
+                                          'job_number_taken': award_newer and job_taken})
+            if sale_id and status != 'Awarded':
+                report['not_awarded'].append({**row, 'status': status})
+            if bad_psl:
+                report['psl_value'].append({**row, 'invoices': bad_psl})
+
+    report['no_award'] = [
+        {'sale_id': pk, 'sale_job_number': job_number}
+        for pk, job_number in SalesEnquiry.objects.filter(status='Awarded', monthly_awards__isnull=True)
+        .order_by('id').values_list('id', 'job_number')
+    ]
+    return report
+
+
+def repair():
+    """Fix drifted copies and PSL values in one transaction; returns {'sales': n, 'awards': n, 'invoices': n}"""
+    params = {'now': timezone.now()}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_AWARD_TO_SALE_SQL, params)
+        sale_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(_SALE_TO_AWARD_SQL, params)
+        award_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(_PSL_VALUE_SQL, params)
+        invoice_ids = [row[0] for row in cursor.fetchall()]
+
+        # Raw UPDATEs send no signals
+        search_index.reindex(SalesEnquiry, sale_ids)
+        search_index.reindex(MonthlyAward, award_ids)
+        if award_ids:
+            transaction.on_commit(cash_flow.invalidate)
+
+    return {'sales': len(sale_ids), 'awards': len(award_ids), 'invoices': len(invoice_ids)}
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from monitoring.consistency import check, repair
+
+
+class Command(BaseCommand):
+    help = 'Find monthly awards out of step with their sales enquiry and invoices with a stale PSL value'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true',
+                            help='Fix drifted copies and PSL values (status mismatches are only reported)')
+
+    def handle(self, *args, **options):
+        if options['repair']:
+            counts = repair()
+            self.stdout.write(self.style.SUCCESS(
+                f"Repaired {counts['sales']} sales enquiries, {counts['awards']} monthly awards "
+                f"and {counts['invoices']} invoices"
+            ))
+
+        report = check()
+        # -v 2 lists every problem; otherwise only the ones repair cannot fix
+        every_row = options['verbosity'] >= 2
+        for row in report['drifted']:
+            if every_row or row['job_number_taken']:
+                note = ' (job number belongs to another enquiry - fix by hand)' if row['job_number_taken'] else ''
+                self.stdout.write(
+                    f"award {row['award_id']} ({row['award_job_number']}) vs enquiry {row['sale_id']} "
+                    f"({row['sale_job_number']}): {', '.join(row['fields'])}{note}"
+                )
+        if every_row:
+            for row in report['not_awarded']:
+                self.stdout.write(f"enquiry {row['sale_id']} ({row['sale_job_number']}) is {row['status']} "
+                                  f"but has award {row['award_id']}")
+            for row in report['no_award']:
+                self.stdout.write(f"enquiry {row['sale_id']} ({row['sale_job_number']}) is Awarded with no award")
+            for row in report['psl_value']:
+                self.stdout.write(f"award {row['award_id']} ({row['award_job_number']}): "
+                                  f"{row['invoices']} invoice(s) with a stale PSL value")
+
+        summary = ', '.join(f"{len(rows)} {kind.replace('_', ' ')}" for kind, rows in report.items())
+        style = self.style.WARNING if any(report.values()) else self.style.SUCCESS
+        self.stdout.write(style(f'Found: {summary}'))
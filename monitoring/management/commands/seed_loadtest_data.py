@@ -0,0 +1,112 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sales_tracker.job_numbers import sync_job_number_sequence
+from search.indexing import rebuild as rebuild_search_index
+from sales_tracker.models import SalesEnquiry
+from monthly_awards.models import MonthlyAward
+from invoiced_jobs.models import InvoicedJob
+
+# Seeded rows are recognised (and cleared) by this client name prefix
+CLIENT_PREFIX = 'Loadtest Client'
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic enquiries, awards and invoices (plus a login) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enquiries', type=int, default=20000, help='Number of sales enquiries to create')
+        parser.add_argument('--months', type=int, default=24, help='Spread dates over this many past months')
+        parser.add_argument('--award-rate', type=float, default=0.3, help='Fraction of enquiries that are awarded')
+        parser.add_argument('--start-job', type=int, default=90000, help='First job number to use')
+        parser.add_argument('--username', default='loadtest')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed, for repeatable data sets')
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded rows first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        user, _ = User.objects.get_or_create(username=options['username'])
+        user.set_password(options['password'])
+        user.save()
+
+        if options['clear']:
+            deleted = SalesEnquiry.objects.filter(client__startswith=CLIENT_PREFIX).delete()[0]
+            deleted += MonthlyAward.objects.filter(client__startswith=CLIENT_PREFIX).delete()[0]
+            self.stdout.write(f'Deleted {deleted} previously seeded rows')
+
+        today = date.today()
+        span_days = options['months'] * 30
+
+        with transaction.atomic():
+            enquiries = []
+            for i in range(options['enquiries']):
+                job_number = str(options['start_job'] + i)
+                if rng.random() < 0.2:
+                    job_number += f'.{rng.randint(1, 12)}'
+                enquiries.append(SalesEnquiry(
+                    job_number=job_number,
+                    date=today - timedelta(days=rng.randint(0, span_days)),
+                    value=Decimal(rng.randint(500, 250000)) / 100,
+                    note=rng.choice(['', 'Follow up next week', 'Awaiting drawings ' * rng.randint(1, 20)]),
+                    location=f'{rng.randint(1, 400)} Example Road, Survey Area {rng.randint(1, 60)}',
+                    client=f'{CLIENT_PREFIX} {rng.randint(1, 300)}',
+                    client_contact=f'Contact {rng.randint(1, 1000)}',
+                    status='Awarded' if rng.random() < options['award_rate'] else rng.choice(['Pending', 'Rejected']),
+                    created_by=user,
+                ))
+            SalesEnquiry.objects.bulk_create(enquiries, batch_size=BATCH_SIZE)
+
+            awards = [
+                MonthlyAward(
+                    sale=enquiry,
+                    job_number=enquiry.job_number,
+                    location=enquiry.location,
+                    client=enquiry.client,
+                    client_contact=enquiry.client_contact,
+                    value=enquiry.value,
+                    date=min(enquiry.date + timedelta(days=rng.randint(0, 45)), today),
+                    created_by=user,
+                )
+                for enquiry in enquiries if enquiry.status == 'Awarded'
+            ]
+            MonthlyAward.objects.bulk_create(awards, batch_size=BATCH_SIZE)
+            # Numbers allocated from now on must not run into the seeded ones
+            sync_job_number_sequence()
+
+            invoices = []
+            for award in awards:
+                parts = rng.randint(1, 3)
+                for _ in range(parts):
+                    share = award.value / parts
+                    invoice = InvoicedJob(
+                        award=award,
+                        description=rng.choice(['', 'Stage payment']),
+                        date=min(award.date + timedelta(days=rng.randint(0, 90)), today),
+                        utility_value=(share * Decimal('0.5')).quantize(Decimal('0.01')),
+                        cad_value=(share * Decimal('0.2')).quantize(Decimal('0.01')),
+                        topo_value=(share * Decimal('0.1')).quantize(Decimal('0.01')),
+                        contractor_value=(share * Decimal('0.2')).quantize(Decimal('0.01')),
+                        status='Invoiced' if rng.random() < 0.8 else 'Pending',
+                        created_by=user,
+                    )
+                    # bulk_create skips save(), apply its PSL/pending-date rules here
+                    invoice.update_calculated_fields()
+                    invoices.append(invoice)
+            InvoicedJob.objects.bulk_create(invoices, batch_size=BATCH_SIZE)
+
+        # bulk_create() skips the signals that keep the search index current
+        rebuild_search_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(enquiries)} enquiries, {len(awards)} awards and {len(invoices)} invoices; '
+            f"log in as '{options['username']}'"
+        ))
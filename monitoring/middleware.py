@@ -0,0 +1,197 @@
+import logging
+import re
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import reverse
+from django.utils.functional import empty
+
+from psl_app_project.logging_queue import request_id_var
+
+from . import profiling
+from .slow_queries import SlowQueryRecorder, recording
+
+access_logger = logging.getLogger('psl.access')
+
+# Accept ids from nginx ($request_id) or a client, as long as they are harmless to log
+_REQUEST_ID = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+
+def _view_name(request):
+    resolver_match = getattr(request, 'resolver_match', None)
+    return resolver_match.view_name if resolver_match else ''
+
+
+def _username(request):
+    """The user if the request already loaded it - never a query just for the log"""
+    user = getattr(request, 'user', None)
+    if user is None or getattr(user, '_wrapped', None) is empty:
+        return None
+    return user.get_username() if user.is_authenticated else None
+
+
+class AccessLogMiddleware:
+    """One structured psl.access line per request, and a request id for every log line it causes
+
+    The id comes from the X-Request-ID header when nginx sets one, otherwise
+    it is generated; it is sent back in the response's X-Request-ID header.
+    SQL time and query count come from SlowQueryMiddleware, further in.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start, token = self._start(request)
+        try:
+            response = self.get_response(request)
+            self._log(request, response, start)
+        finally:
+            request_id_var.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        start, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+            self._log(request, response, start)
+        finally:
+            request_id_var.reset(token)
+        return response
+
+    def _start(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not _REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        return time.perf_counter(), request_id_var.set(request_id)
+
+    def _log(self, request, response, start):
+        response['X-Request-ID'] = request.request_id
+        query_stats = getattr(request, 'query_stats', None)
+        access_logger.info(
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={'fields': {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'view': _view_name(request),
+                'user': _username(request),
+                'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+                'sql_ms': round(query_stats.sql_ms, 1) if query_stats else None,
+                'sql_queries': query_stats.query_count if query_stats else None,
+            }}
+        )
+
+
+class SlowQueryMiddleware:
+    """Count and time the request's queries; store those slower than SLOW_QUERY_THRESHOLD_MS (0: none)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with recording(SlowQueryRecorder(self.threshold_ms)) as recorder:
+            request.query_stats = recorder
+            response = self.get_response(request)
+
+        # Written after recording stops so the inserts are not timed themselves
+        if recorder.entries:
+            recorder.flush(view_name=_view_name(request), path=request.path)
+        return response
+
+    async def __acall__(self, request):
+        with recording(SlowQueryRecorder(self.threshold_ms)) as recorder:
+            request.query_stats = recorder
+            response = await self.get_response(request)
+
+        if recorder.entries:
+            await sync_to_async(recorder.flush)(view_name=_view_name(request), path=request.path)
+        return response
+
+
+class ProfilerMiddleware:
+    """Profile requests a staff user asks to have profiled (?_profile=1 or X-Profile: 1) - see monitoring/profiling.py
+
+    Goes after AuthenticationMiddleware; off (not in the stack at all) with
+    REQUEST_PROFILER_ENABLED = False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILER_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not (profiling.flagged(request) and profiling.allowed(request)):
+            return self.get_response(request)
+        if not profiling.profile_lock.acquire(blocking=False):
+            return self._busy(self.get_response(request))
+
+        try:
+            profiler = profiling.Profiler()
+            with recording(profiling.SqlTimeline(getattr(request, 'query_stats', None))) as timeline:
+                profiler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.stop()
+        finally:
+            profiling.profile_lock.release()
+
+        profile = profiler.save(request, response, timeline, _view_name(request))
+        return self._link(response, profile)
+
+    async def __acall__(self, request):
+        if not (profiling.flagged(request) and await sync_to_async(profiling.allowed)(request)):
+            return await self.get_response(request)
+        if not profiling.profile_lock.acquire(blocking=False):
+            return self._busy(await self.get_response(request))
+
+        try:
+            profiler = profiling.Profiler()
+            with recording(profiling.SqlTimeline(getattr(request, 'query_stats', None))) as timeline:
+                profiler.start()
+                try:
+                    response = await self.get_response(request)
+                finally:
+                    profiler.stop()
+        finally:
+            profiling.profile_lock.release()
+
+        profile = await sync_to_async(profiler.save)(request, response, timeline, _view_name(request))
+        return self._link(response, profile)
+
+    def _busy(self, response):
+        response['X-Profile'] = 'busy'
+        return response
+
+    def _link(self, response, profile):
+        response['X-Profile-URL'] = reverse('request_profile_detail', args=[profile.pk])
+        return response
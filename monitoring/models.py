@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """A database query that took longer than SLOW_QUERY_THRESHOLD_MS.
+
+    The table is capped at SLOW_QUERY_LOG_MAX_ROWS - older rows are trimmed
+    as new ones are recorded.
+    """
+
+    # Hash of the normalised SQL, so repeats of the same query group together
+    fingerprint = models.CharField(max_length=32, db_index=True)
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    duration_ms = models.FloatField()
+    database = models.CharField(max_length=50, default='default')
+
+    # Where it came from
+    view_name = models.CharField(max_length=255, blank=True)
+    path = models.CharField(max_length=500, blank=True)
+    stack_location = models.TextField(blank=True, help_text="Innermost project frames that ran the query")
+
+    # EXPLAIN (ANALYZE, BUFFERS) output, when SLOW_QUERY_EXPLAIN is on
+    explain_plan = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Slow Query'
+        verbose_name_plural = 'Slow Queries'
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms - {self.sql[:60]}"
+
+
+class RequestProfile(models.Model):
+    """One request run under the profiler at a staff user's request (see monitoring/profiling.py)
+
+    The table is capped at REQUEST_PROFILE_MAX_ROWS.
+    """
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    query_string = models.CharField(max_length=1000, blank=True)
+    view_name = models.CharField(max_length=255, blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='request_profiles')
+    status_code = models.PositiveSmallIntegerField()
+
+    duration_ms = models.FloatField()
+    sql_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+
+    # marshal-dumped pstats data - the .prof file format
+    stats = models.BinaryField()
+    # [{start_ms, duration_ms, sql, database, thread}] in execution order
+    sql_timeline = models.JSONField(default=list)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
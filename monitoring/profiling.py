@@ -0,0 +1,215 @@
+"""
+Opt-in request profiling for staff.
+
+A staff user adds ?_profile=1 to a URL (or sends an X-Profile: 1 header) and
+ProfilerMiddleware runs that one request under cProfile, with an
+SqlTimeline recording when each query started and how long it took. The
+result is saved as a RequestProfile and its page linked from the response's
+X-Profile-URL header; /monitoring/profiles/ lists the recent ones. Other
+requests pay for a dictionary lookup - and nothing at all with
+REQUEST_PROFILER_ENABLED off, which takes the middleware out of the stack.
+
+cProfile is deterministic and covers the thread it is enabled on: the whole
+request for sync views; for async views the event loop thread, with work
+handed to pool threads showing up as the time spent waiting for it (the SQL
+timeline still has every query) and other requests the loop serves meanwhile
+mixed in. Only one request is profiled at a time per
+process; a second one meanwhile is served normally with X-Profile: busy.
+
+The raw pstats data is stored as-is (downloadable for snakeviz and friends);
+top_functions() and flame_graph() summarise it for the profile page.
+"""
+import cProfile
+import marshal
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+# One profile at a time per process: cProfile hooks the whole thread
+profile_lock = threading.Lock()
+
+# Queries kept in a profile's timeline, and characters of each query's SQL
+TIMELINE_MAX_QUERIES = 2000
+TIMELINE_SQL_CHARS = 2000
+
+
+def flagged(request):
+    """Did the request ask to be profiled?"""
+    return request.GET.get('_profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+def allowed(request):
+    """May it be? Staff only - loads the user, so only asked for flagged requests"""
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_staff)
+
+
+class SqlTimeline:
+    """Execute wrapper recording each query's start offset and duration, around the request's SlowQueryRecorder"""
+
+    def __init__(self, inner=None):
+        self.inner = inner
+        self.start = time.perf_counter()
+        self.queries = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            if self.inner is not None:
+                return self.inner(execute, sql, params, many, context)
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                if len(self.queries) < TIMELINE_MAX_QUERIES:
+                    self.queries.append({
+                        'start_ms': round((start - self.start) * 1000, 2),
+                        'duration_ms': round((end - start) * 1000, 2),
+                        'sql': sql[:TIMELINE_SQL_CHARS],
+                        'database': context['connection'].alias,
+                        'thread': threading.current_thread().name,
+                    })
+                else:
+                    self.dropped += 1
+
+
+class Profiler:
+    """cProfile plus wall clock for one request; call start() and stop() on the request's thread"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.duration_ms = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def save(self, request, response, timeline, view_name=''):
+        """Store the profile as a RequestProfile; returns it"""
+        from .models import RequestProfile
+
+        self.profile.create_stats()
+        user = request.user if request.user.is_authenticated else None
+        with transaction.atomic():
+            profile = RequestProfile.objects.create(
+                method=request.method,
+                path=request.path[:500],
+                query_string=request.META.get('QUERY_STRING', '')[:1000],
+                view_name=view_name,
+                user=user,
+                status_code=response.status_code,
+                duration_ms=self.duration_ms,
+                sql_ms=sum(query['duration_ms'] for query in timeline.queries),
+                query_count=len(timeline.queries) + timeline.dropped,
+                stats=marshal.dumps(self.profile.stats),
+                sql_timeline=timeline.queries,
+            )
+        _trim_table(profile.pk)
+        return profile
+
+
+def _trim_table(newest_id):
+    """Keep the table capped at REQUEST_PROFILE_MAX_ROWS rows"""
+    from .models import RequestProfile
+
+    max_rows = getattr(settings, 'REQUEST_PROFILE_MAX_ROWS', 100)
+    if newest_id and newest_id > max_rows:
+        RequestProfile.objects.filter(id__lte=newest_id - max_rows).delete()
+
+
+def function_label(func):
+    """'path/to/file.py:12(name)' with the project or site-packages prefix cut off"""
+    filename, line, name = func
+    if filename == '~':
+        return name
+    base_dir = str(settings.BASE_DIR) + '/'
+    if filename.startswith(base_dir):
+        filename = filename[len(base_dir):]
+    elif 'site-packages/' in filename:
+        filename = filename.split('site-packages/', 1)[1]
+    return f'{filename}:{line}({name})'
+
+
+def load_stats(profile):
+    """A RequestProfile's pstats data: {(file, line, name): (cc, nc, tt, ct, callers)}"""
+    return marshal.loads(bytes(profile.stats))
+
+
+def top_functions(stats, sort='cumulative', limit=100):
+    """The heaviest functions as dicts, by cumulative or own ('tottime') time"""
+    index = 3 if sort == 'cumulative' else 2
+    rows = sorted(stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+    return [
+        {
+            'function': function_label(func),
+            'calls': nc,
+            'primitive_calls': cc,
+            'own_ms': tt * 1000,
+            'cumulative_ms': ct * 1000,
+            'per_call_ms': ct * 1000 / nc if nc else 0,
+        }
+        for func, (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+def flame_graph(stats, min_fraction=0.005, max_depth=60):
+    """Flame graph boxes as dicts with depth, left and width (% of the request), label and ms
+
+    cProfile keeps caller -> callee totals, not whole stacks, so a function
+    called from several places has its children shared out in proportion to
+    the time spent in it on each path - the usual gprof-style estimate.
+    Boxes under min_fraction of the total, and recursion, are left out.
+    """
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [(func, entry[3]) for func, entry in stats.items() if not entry[4]]
+    total = sum(ct for func, ct in roots)
+    if not total:
+        return []
+
+    boxes = []
+    # Depth-first: (function, time on this path, depth, left offset, functions above it)
+    pending = list(reversed(_lay_out(sorted(roots, key=lambda root: -root[1]), total, 0, 0.0, ())))
+    while pending:
+        func, path_time, depth, left, path = pending.pop()
+        if path_time / total < min_fraction:
+            continue
+        boxes.append({
+            'depth': depth,
+            'left': left / total * 100,
+            'width': path_time / total * 100,
+            'label': function_label(func),
+            'ms': path_time * 1000,
+        })
+        if depth + 1 >= max_depth:
+            continue
+        func_total = stats[func][3]
+        share = path_time / func_total if func_total else 0
+        children = [
+            (child, edge_time * share) for child, edge_time in sorted(callees.get(func, []), key=lambda c: -c[1])
+            if child not in path and child != func
+        ]
+        pending.extend(reversed(_lay_out(children, path_time, depth + 1, left, path + (func,))))
+    return boxes
+
+
+def _lay_out(children, room, depth, left, path):
+    """Place (function, time) children side by side from `left`, squeezed to fit `room` if the estimate overshoots"""
+    used = sum(seconds for func, seconds in children)
+    scale = room / used if used > room else 1
+    placed = []
+    for func, seconds in children:
+        placed.append((func, seconds * scale, depth, left, path))
+        left += seconds * scale
+    return placed
@@ -0,0 +1,195 @@
+"""
+Slow-query recording built on connection execute wrappers.
+
+SlowQueryRecorder times every query run while it is active and keeps the
+request's query count and total SQL time for the access log. Queries slower
+than SLOW_QUERY_THRESHOLD_MS (if set) are buffered with their call site and written
+to the SlowQuery table once the request is done, so recording never runs
+inside the query it is measuring. With SLOW_QUERY_EXPLAIN on, the plans of
+slow SELECTs are captured afterwards on a separate thread/connection - with
+plain EXPLAIN, not run, when they call a function with side effects.
+
+Parameters of queries on tables holding credentials (API tokens, sessions,
+users) are not stored or explained: staff read this table.
+
+Every connection gets a permanent wrapper that hands its queries to the
+recorder in the current context (if any). A context variable rather than
+per-request execute_wrapper() on the request thread's connections, so the
+queries async views run on pool threads are recorded too.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger('psl.slow_query')
+
+# Frames from these paths are never reported as the query's call site
+_IGNORED_PATHS = ('site-packages', 'dist-packages', '/monitoring/')
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+# Tables whose query parameters are keys, session data or password hashes
+_SENSITIVE_TABLES = re.compile(r'\b(api_apitoken|django_session|auth_user)\b')
+# Functions EXPLAIN ANALYZE would really call - a nextval() would use up a job number
+_SIDE_EFFECTS = re.compile(
+    r'\b(nextval|setval|lastval|pg_advisory_\w+|pg_try_advisory_\w+|pg_notify|set_config|pg_sleep\w*'
+    r'|pg_cancel_backend|pg_terminate_backend|lo_\w+)\s*\(',
+    re.IGNORECASE,
+)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Hash SQL with its IN-list length and whitespace normalised away"""
+    normalised = _WHITESPACE.sub(' ', _IN_LIST.sub('IN (...)', sql)).strip()
+    return hashlib.md5(normalised.encode()).hexdigest()
+
+
+def _stack_location(depth=3):
+    """The innermost project frames on the current stack, innermost first"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and not any(part in frame.filename for part in _IGNORED_PATHS)
+    ]
+    return '\n'.join(
+        f"{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}"
+        for frame in reversed(frames[-depth:])
+    )
+
+
+_active_recorder = ContextVar('slow_query_recorder', default=None)
+
+
+def _record_if_active(execute, sql, params, many, context):
+    recorder = _active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_wrapper(sender, connection, **kwargs):
+    """connection_created receiver: route the new connection's queries past the active recorder"""
+    if _record_if_active not in connection.execute_wrappers:
+        # First, not last: execute_wrapper() blocks pop() the last entry on exit
+        connection.execute_wrappers.insert(0, _record_if_active)
+
+
+@contextmanager
+def recording(recorder):
+    """Record queries run in this context - including threads it is copied to"""
+    token = _active_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _active_recorder.reset(token)
+
+
+class SlowQueryRecorder:
+    """execute_wrapper that counts queries and buffers those slower than the threshold (0: none)"""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.entries = []
+        self.query_count = 0
+        self.sql_ms = 0.0
+        # Async views run queries on several pool threads at once
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.query_count += 1
+                self.sql_ms += duration_ms
+            if self.threshold_ms and duration_ms >= self.threshold_ms:
+                sensitive = bool(_SENSITIVE_TABLES.search(sql))
+                self.entries.append({
+                    'sql': sql,
+                    'raw_params': None if many or sensitive else params,
+                    'params': '' if many else '(not recorded)' if sensitive else repr(params)[:2000],
+                    'duration_ms': duration_ms,
+                    'database': context['connection'].alias,
+                    'stack_location': _stack_location(),
+                })
+
+    def flush(self, view_name='', path=''):
+        """Write buffered entries to the SlowQuery table and the log"""
+        if not self.entries:
+            return
+
+        from .models import SlowQuery
+
+        raw_params = [entry.pop('raw_params') for entry in self.entries]
+        rows = [
+            SlowQuery(fingerprint=fingerprint(entry['sql']), view_name=view_name, path=path[:500], **entry)
+            for entry in self.entries
+        ]
+        self.entries = []
+
+        for row in rows:
+            logger.warning(
+                'Slow query (%.0f ms) in %s at %s: %s',
+                row.duration_ms, view_name or path, row.stack_location.split('\n')[0], row.sql[:500]
+            )
+
+        SlowQuery.objects.bulk_create(rows)
+        _trim_table(rows[-1].pk)
+
+        if getattr(settings, 'SLOW_QUERY_EXPLAIN', False):
+            selects = [
+                (row, params) for row, params in zip(rows, raw_params)
+                # The plan would show a sensitive query's parameters as literals
+                if row.sql.lstrip().upper().startswith('SELECT') and not _SENSITIVE_TABLES.search(row.sql)
+            ]
+            if selects:
+                threading.Thread(target=_capture_plans, args=(selects,), daemon=True).start()
+
+
+def _trim_table(newest_id):
+    """Keep the table capped at SLOW_QUERY_LOG_MAX_ROWS rows"""
+    from .models import SlowQuery
+
+    max_rows = getattr(settings, 'SLOW_QUERY_LOG_MAX_ROWS', 5000)
+    if newest_id and newest_id > max_rows:
+        SlowQuery.objects.filter(id__lte=newest_id - max_rows).delete()
+
+
+def _capture_plans(selects):
+    """Run EXPLAIN (ANALYZE, BUFFERS) for recorded SELECTs on this thread's own connection
+
+    SELECTs calling a function with side effects get a plain EXPLAIN: a
+    rollback does not undo nextval() or setval().
+    """
+    from .models import SlowQuery
+
+    try:
+        for row, params in selects:
+            connection = connections[row.database]
+            analyze = not _SIDE_EFFECTS.search(row.sql)
+            try:
+                # ANALYZE executes the query - roll back so nothing it touches sticks
+                with transaction.atomic(using=row.database):
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"EXPLAIN {'(ANALYZE, BUFFERS) ' if analyze else ''}{row.sql}", params)
+                        plan = '\n'.join(line[0] for line in cursor.fetchall())
+                    if not analyze:
+                        plan = f'Estimated plan only - not run, the query has side effects.\n\n{plan}'
+                    transaction.set_rollback(True, using=row.database)
+            except Exception as exc:
+                plan = f'EXPLAIN failed: {exc}'
+            SlowQuery.objects.filter(pk=row.pk).update(explain_plan=plan)
+    finally:
+        connections.close_all()
+
@@ -0,0 +1,20 @@
+from django.urls import path
+from .views import (
+    slow_queries,
+    slow_query_detail,
+    data_consistency,
+    repair_data_consistency,
+    request_profiles,
+    request_profile_detail,
+    request_profile_download
+)
+
+urlpatterns = [
+    path('slow-queries/', slow_queries, name='slow_queries'),
+    path('slow-queries/<str:fingerprint>/', slow_query_detail, name='slow_query_detail'),
+    path('consistency/', data_consistency, name='data_consistency'),
+    path('consistency/repair/', repair_data_consistency, name='repair_data_consistency'),
+    path('profiles/', request_profiles, name='request_profiles'),
+    path('profiles/<int:pk>/', request_profile_detail, name='request_profile_detail'),
+    path('profiles/<int:pk>/download/', request_profile_download, name='request_profile_download'),
+]
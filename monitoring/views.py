@@ -0,0 +1,122 @@
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Sum, Avg, Max, Count
+from django.views.decorators.http import require_POST
+from psl_app_project.replica import use_replica
+from . import consistency, profiling
+from .models import RequestProfile, SlowQuery
+
+
+@staff_member_required
+@use_replica
+def slow_queries(request):
+    """Slow query fingerprints ranked by total time spent in them"""
+    fingerprints = (
+        SlowQuery.objects
+        .values('fingerprint')
+        .annotate(
+            total_ms=Sum('duration_ms'),
+            avg_ms=Avg('duration_ms'),
+            max_ms=Max('duration_ms'),
+            calls=Count('id'),
+            last_seen=Max('created_at'),
+            sample_sql=Max('sql'),
+            sample_view=Max('view_name'),
+        )
+        .order_by('-total_ms')[:100]
+    )
+
+    context = {
+        'fingerprints': fingerprints,
+        'recorded_count': SlowQuery.objects.count(),
+    }
+    return render(request, 'slow_queries.html', context)
+
+
+@staff_member_required
+@use_replica
+def slow_query_detail(request, fingerprint):
+    """Recent occurrences of one slow query fingerprint, with call sites and plans"""
+    queries = SlowQuery.objects.filter(fingerprint=fingerprint)[:50]
+
+    context = {
+        'fingerprint': fingerprint,
+        'queries': queries,
+    }
+    return render(request, 'slow_query_detail.html', context)
+
+
+@staff_member_required
+@use_replica
+def data_consistency(request):
+    """Awards out of step with their sales enquiry, and invoices with a stale PSL value"""
+    report = consistency.check()
+    context = {
+        'report': report,
+        'repairable': bool(report['psl_value']) or any(not row['job_number_taken'] for row in report['drifted']),
+        'status_mismatches': len(report['not_awarded']) + len(report['no_award']),
+        'copied_fields': consistency.COPIED_FIELDS,
+    }
+    return render(request, 'data_consistency.html', context)
+
+
+@staff_member_required
+@require_POST
+def repair_data_consistency(request):
+    counts = consistency.repair()
+    if any(counts.values()):
+        messages.success(
+            request,
+            f"Repaired {counts['sales']} sales enquiries, {counts['awards']} monthly awards "
+            f"and {counts['invoices']} invoices.",
+        )
+    else:
+        messages.info(request, 'Nothing needed repairing.')
+    return redirect('data_consistency')
+
+
+@staff_member_required
+@use_replica
+def request_profiles(request):
+    """Recently profiled requests"""
+    profiles = RequestProfile.objects.select_related('user').defer('stats', 'sql_timeline')[:100]
+    return render(request, 'request_profiles.html', {'profiles': profiles})
+
+
+@staff_member_required
+@use_replica
+def request_profile_detail(request, pk):
+    """One profiled request: top functions, flame graph and SQL timeline"""
+    profile = get_object_or_404(RequestProfile.objects.select_related('user'), pk=pk)
+    stats = profiling.load_stats(profile)
+    sort = 'tottime' if request.GET.get('sort') == 'tottime' else 'cumulative'
+
+    boxes = profiling.flame_graph(stats)
+    duration = profile.duration_ms or 1
+    timeline = [
+        {**query, 'left': query['start_ms'] / duration * 100, 'width': max(query['duration_ms'] / duration * 100, 0.2)}
+        for query in profile.sql_timeline
+    ]
+
+    context = {
+        'profile': profile,
+        'sort': sort,
+        'functions': profiling.top_functions(stats, sort),
+        'flame_boxes': boxes,
+        'flame_depth': max((box['depth'] for box in boxes), default=0) + 1,
+        'timeline': timeline,
+        'dropped_queries': profile.query_count - len(timeline),
+    }
+    return render(request, 'request_profile_detail.html', context)
+
+
+@staff_member_required
+@use_replica
+def request_profile_download(request, pk):
+    """The raw profile as a .prof file, for pstats or snakeviz"""
+    profile = get_object_or_404(RequestProfile.objects.only('stats'), pk=pk)
+    response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="request-{profile.pk}.prof"'
+    return response
@@ -1,9 +1,13 @@
 from django.contrib import admin
+from search.admin import IndexedSearchAdminMixin
+from search.models import SearchEntry
 from .models import MonthlyAward
 
 
 @admin.register(MonthlyAward)
-class MonthlyAwardAdmin(admin.ModelAdmin):
+class MonthlyAwardAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
+    search_entity_type = SearchEntry.AWARD
+
     list_display = [
         'job_number',
         'date',
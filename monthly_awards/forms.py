@@ -1,9 +1,11 @@
 from django import forms
+from psl_app_project.versioning import VersionedFormMixin
 from .models import MonthlyAward
 from sales_tracker.models import SalesEnquiry
+from sales_tracker.forms import InlineUpdateFormMixin
 
 
-class MonthlyAwardForm(forms.ModelForm):
+class MonthlyAwardForm(VersionedFormMixin, forms.ModelForm):
     """Form for creating/editing monthly awards"""
 
     class Meta:
@@ -63,4 +65,20 @@ class MonthlyAwardForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         # Make email and phone not required
         self.fields['email'].required = False
-        self.fields['phone'].required = False
\ No newline at end of file
+        self.fields['phone'].required = False
+
+    def clean_job_number(self):
+        job_number = self.cleaned_data['job_number']
+        # Saving copies the job number onto the linked enquiry, where it must be unique
+        sale_id = self.instance.sale_id
+        if sale_id and SalesEnquiry.objects.filter(job_number=job_number).exclude(pk=sale_id).exists():
+            raise forms.ValidationError('This job number is already in use on the sales tracker.')
+        return job_number
+
+
+class MonthlyAwardInlineForm(InlineUpdateFormMixin, forms.ModelForm):
+    """Form for inline value updates from the monthly awards table"""
+
+    class Meta:
+        model = MonthlyAward
+        fields = ['value']
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monthly_awards', '0003_alter_monthlyaward_created_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlyaward',
+            index=models.Index(fields=['-date', '-id'], name='award_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monthly_awards', '0004_monthlyaward_award_date_id_idx'),
+        ('sales_tracker', '0010_salesenquiry_enquiry_updated_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlyaward',
+            index=models.Index(fields=['updated_at', 'id'], name='award_updated_id_idx'),
+        ),
+    ]
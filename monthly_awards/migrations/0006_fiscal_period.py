@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:42
+
+import psl_app_project.fiscal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monthly_awards', '0005_monthlyaward_award_updated_id_idx'),
+        ('sales_tracker', '0013_fiscal_period'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlyaward',
+            name='fiscal_period',
+            field=models.GeneratedField(db_persist=True, expression=psl_app_project.fiscal.FiscalPeriod('date', start_month=4), output_field=models.IntegerField()),
+        ),
+        migrations.AddField(
+            model_name='monthlyaward',
+            name='fiscal_year',
+            field=models.GeneratedField(db_persist=True, expression=psl_app_project.fiscal.FiscalYear('date', start_month=4), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='monthlyaward',
+            index=models.Index(fields=['fiscal_year', 'fiscal_period', '-date', '-id'], name='award_fiscal_idx'),
+        ),
+    ]
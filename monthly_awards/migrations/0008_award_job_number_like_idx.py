@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monthly_awards', '0007_monthlyaward_version'),
+        ('sales_tracker', '0015_salesenquiry_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlyaward',
+            index=models.Index(fields=['job_number'], name='award_job_number_like_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from psl_app_project.fiscal import FiscalPeriod, FiscalYear
+from psl_app_project.versioning import VersionedModel
 from sales_tracker.models import SalesEnquiry
 
 
-class MonthlyAward(models.Model):
+class MonthlyAward(VersionedModel):
     # Foreign key to SalesEnquiry - optional (can be null)
     sale = models.ForeignKey(
         SalesEnquiry,
@@ -25,6 +28,17 @@ class MonthlyAward(models.Model):
 
     # Date awarded
     date = models.DateField(default=timezone.now, help_text="Date the job was awarded")
+    # Generated from date by the database - see psl_app_project/fiscal.py
+    fiscal_year = models.GeneratedField(
+        expression=FiscalYear('date', start_month=settings.FISCAL_YEAR_START_MONTH),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+    fiscal_period = models.GeneratedField(
+        expression=FiscalPeriod('date', start_month=settings.FISCAL_YEAR_START_MONTH),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
 
     # Metadata
     created_by = models.ForeignKey(User,on_delete=models.SET_NULL, null=True, related_name='monthly_awards')
@@ -35,10 +49,25 @@ class MonthlyAward(models.Model):
         ordering = ['-date', '-created_at']
         verbose_name = 'Monthly Award'
         verbose_name_plural = 'Monthly Awards'
+        indexes = [
+            # Month range filter + keyset pagination on (date, id)
+            models.Index(fields=['-date', '-id'], name='award_date_id_idx'),
+            # Incremental sync for the JSON API (updated_since + keyset on updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='award_updated_id_idx'),
+            # Fiscal period filters and per-period rollups, rows in keyset order
+            models.Index(fields=['fiscal_year', 'fiscal_period', '-date', '-id'], name='award_fiscal_idx'),
+            # Job numbers typed onto awards not on the sales tracker, for job number allocation
+            models.Index(fields=['job_number'], name='award_job_number_like_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return f"Award: Job #{self.job_number} - {self.client}"
 
+    def clean(self):
+        # Awards dated in a closed month are frozen (see periods/closing.py)
+        from periods.closing import check_writable
+        check_writable(self, self.date)
+
     def get_invoice_count(self):
         """Get count of invoices linked to this award"""
         return self.invoiced_jobs.count()
@@ -55,4 +84,26 @@ class MonthlyAward(models.Model):
     def get_total_invoiced(self):
         """Get sum of all invoice component values"""
         from invoiced_jobs.models import InvoicedJob
-        return InvoicedJob.get_award_invoice_total(self)
\ No newline at end of file
+        return InvoicedJob.get_award_invoice_total(self)
+
+    def sync_linked_sale(self):
+        """Copy this award's details back onto its linked sales enquiry, if any
+
+        With update() rather than the enquiry's save(), so someone editing
+        the enquiry meanwhile cannot make the award's save fail with an
+        EditConflict - the version bump sends their form to the conflict
+        screen instead.
+        """
+        if self.sale_id:
+            from search import indexing as search_index
+
+            copied = {field: getattr(self, field) for field in SalesEnquiry.AWARD_FIELDS}
+            updated = SalesEnquiry.objects.filter(pk=self.sale_id).exclude(**copied).update(
+                **copied,
+                # update() skips auto_now, keep updated_at right for incremental sync
+                updated_at=timezone.now(),
+                version=models.F('version') + 1
+            )
+            # update() sends no signals
+            if updated:
+                search_index.reindex(SalesEnquiry, [self.sale_id])
\ No newline at end of file
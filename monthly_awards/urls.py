@@ -1,14 +1,20 @@
 from django.urls import path
 from .views import (
     monthly_awards_list,
+    monthly_awards_rows,
+    monthly_award_text,
     add_monthly_award,
     edit_monthly_award,
-    delete_monthly_award
+    delete_monthly_award,
+    inline_update_monthly_award
 )
 
 urlpatterns = [
     path('', monthly_awards_list, name='monthly_awards_list'),
+    path('rows/', monthly_awards_rows, name='monthly_awards_rows'),
+    path('text/<int:pk>/<str:field>/', monthly_award_text, name='monthly_award_text'),
     path('add/', add_monthly_award, name='add_monthly_award'),
     path('edit/<int:pk>/', edit_monthly_award, name='edit_monthly_award'),
     path('delete/<int:pk>/', delete_monthly_award, name='delete_monthly_award'),
+    path('inline/<int:pk>/', inline_update_monthly_award, name='inline_update_monthly_award'),
 ]
\ No newline at end of file
@@ -1,70 +1,135 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from datetime import datetime
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.db.models import OuterRef, Sum, Count
+from django.urls import reverse
+from urllib.parse import urlencode
+from psl_app_project import fiscal
+from psl_app_project.concurrency import arender, run_concurrently
+from psl_app_project.projection import attach_previews, full_text, with_previews
+from psl_app_project.replica import use_replica
+from psl_app_project.versioning import CONFLICT_MESSAGE, EditConflict, rebase
+from periods import closing
+from periods.models import AwardSnapshot
 from .models import MonthlyAward
-from .forms import MonthlyAwardForm
+from .forms import MonthlyAwardForm, MonthlyAwardInlineForm
 from invoiced_jobs.models import InvoicedJob
 
+# Award rows rendered per page / per lazy-loaded fragment
+AWARDS_PAGE_SIZE = 50
+
+# Columns the awards table renders, and its long text columns: field -> words shown
+AWARD_ROW_FIELDS = ['id', 'job_number', 'date', 'client', 'client_contact', 'value', 'sale_id']
+AWARD_ROW_PREVIEWS = {'location': 10}
 
-@login_required
-def monthly_awards_list(request):
-    """Monthly awards list view with year and month filtering"""
 
-    # Get year and month from request, default to current
-    current_year = datetime.now().year
-    current_month = datetime.now().month
+def _award_rows(awards):
+    """Awards narrowed to the columns the table renders, with their invoice count and total"""
+    invoice_count, total_invoiced = InvoicedJob.award_invoice_totals(OuterRef('pk'))
+    return with_previews(awards.only(*AWARD_ROW_FIELDS), AWARD_ROW_PREVIEWS).annotate(
+        invoice_count=invoice_count,
+        total_invoiced=total_invoiced,
+    )
 
-    selected_year = request.GET.get('year', current_year)
-    selected_month = request.GET.get('month', current_month)
 
-    # Convert to integers
-    try:
-        selected_year = int(selected_year)
-        selected_month = int(selected_month)
-    except (ValueError, TypeError):
-        selected_year = current_year
-        selected_month = current_month
-
-    # Filter awards by selected year and month
-    awards = MonthlyAward.objects.filter(
-        date__year=selected_year,
-        date__month=selected_month
+def _annotate_award_flags(award):
+    """Attach the text previews and mismatch flags the awards table renders (to a row from _award_rows)"""
+    award.has_mismatch = round(award.total_invoiced, 2) != round(award.value or 0, 2)
+    award.is_missing_invoice = award.invoice_count == 0
+    return attach_previews(award, AWARD_ROW_PREVIEWS)
+
+
+def _award_rows_context(fiscal_year, period, cursor):
+    """Fetch one keyset page of the period's (or year's) awards and build the context for the rows fragment
+
+    Closed periods are read from their award snapshots.
+    """
+    page, next_cursor = closing.keyset_page_by_period(
+        fiscal_year, period, cursor, AWARDS_PAGE_SIZE,
+        live_rows=lambda periods: _award_rows(
+            MonthlyAward.objects.filter(fiscal_year=fiscal_year, fiscal_period__in=periods)
+        ),
+        snapshot_rows=lambda closed: with_previews(
+            AwardSnapshot.objects.filter(period__in=closed).defer('location'), AWARD_ROW_PREVIEWS
+        ),
     )
 
-    # Add invoice count and mismatch flags to each award
-    awards_with_flags = []
-    for award in awards:
-        award.invoice_count = award.get_invoice_count()
-        award.has_mismatch = award.has_value_mismatch()
-        award.is_missing_invoice = award.has_no_invoices()
-        awards_with_flags.append(award)
+    next_url = None
+    if next_cursor:
+        params = {'fy': fiscal_year, 'period': period or 'all', 'after': next_cursor}
+        next_url = f"{reverse('monthly_awards_rows')}?{urlencode(params)}"
 
-    # Calculate total value for the month
-    total_value = sum(award.value for award in awards_with_flags)
+    return {
+        'awards': [_annotate_award_flags(award) for award in page],
+        'next_url': next_url,
+    }
 
-    # Generate year range (2020 to current year + 1)
-    year_range = range(2020, current_year + 2)
 
-    # Month names
-    months = [
-        (1, 'January'), (2, 'February'), (3, 'March'), (4, 'April'),
-        (5, 'May'), (6, 'June'), (7, 'July'), (8, 'August'),
-        (9, 'September'), (10, 'October'), (11, 'November'), (12, 'December')
-    ]
+def _award_rollup(fiscal_year):
+    """Award value and count for each period of the fiscal year
 
-    awards_count = len(awards_with_flags)
+    Closed periods use their frozen totals; the open ones come from a single GROUP BY query.
+    """
+    closed = closing.closed_periods(fiscal_year)
+    rows = [closed_period.award_rollup_row() for closed_period in closed.values()]
+    if len(closed) < 12:
+        rows += (
+            MonthlyAward.objects.filter(fiscal_year=fiscal_year)
+            .exclude(fiscal_period__in=closed)
+            .values('fiscal_period')
+            .annotate(total_value=Sum('value'), count=Count('id'))
+            .order_by('fiscal_period')
+        )
+    return fiscal.fill_periods(fiscal_year, rows, total_value=0, count=0)
+
+
+@login_required
+@use_replica
+async def monthly_awards_list(request):
+    """Monthly awards list view for a fiscal period, or a whole fiscal year
+
+    The year's per-period totals come from a single GROUP BY query (and
+    the closed periods' frozen totals), run alongside the first page of
+    rows; the rest are loaded from monthly_awards_rows.
+    """
+    fiscal_year, period = fiscal.selected_period(request)
+
+    rollup, rows_context = await run_concurrently(
+        lambda: _award_rollup(fiscal_year),
+        lambda: _award_rows_context(fiscal_year, period, None),
+    )
+    selected = [row for row in rollup if period in (None, row['period'])]
 
     context = {
-        'awards_count': awards_count,
-        'awards': awards_with_flags,
-        'total_value': total_value,
-        'selected_year': selected_year,
-        'selected_month': selected_month,
-        'year_range': year_range,
-        'months': months,
+        'awards_count': sum(row['count'] for row in selected),
+        'total_value': sum(row['total_value'] for row in selected),
+        'rollup': rollup,
+        'selected_year': fiscal_year,
+        'selected_period': period,
+        'period_label': fiscal.period_label(fiscal_year, period),
+        'year_choices': [(year, fiscal.fiscal_year_label(year)) for year in fiscal.year_range()],
     }
-    return render(request, 'monthly_awards_list.html', context)
+    context.update(rows_context)
+    return await arender(request, 'monthly_awards_list.html', context)
+
+
+@login_required
+@use_replica
+def monthly_awards_rows(request):
+    """Next page of award rows for the selected period, as a table-row fragment"""
+    fiscal_year, period = fiscal.selected_period(request)
+
+    context = _award_rows_context(fiscal_year, period, request.GET.get('after'))
+    return render(request, 'monthly_award_rows.html', context)
+
+
+@login_required
+@use_replica
+def monthly_award_text(request, pk, field):
+    """Full text of one of an award row's previewed columns, as JSON"""
+    return full_text(MonthlyAward.objects.all(), pk, field, AWARD_ROW_PREVIEWS)
 
 
 @login_required
@@ -94,32 +159,34 @@ def edit_monthly_award(request, pk):
     """Edit existing monthly award"""
     award = get_object_or_404(MonthlyAward, pk=pk)
 
+    conflict = None
     if request.method == 'POST':
         award_form = MonthlyAwardForm(request.POST, instance=award)
         if award_form.is_valid():
-            updated_award = award_form.save()
-
-            # Update linked sale if exists
-            if updated_award.sale:
-                sale = updated_award.sale
-                sale.job_number = updated_award.job_number
-                sale.location = updated_award.location
-                sale.client = updated_award.client
-                sale.client_contact = updated_award.client_contact
-                sale.email = updated_award.email
-                sale.phone = updated_award.phone
-                sale.value = updated_award.value
-                sale.save()
-
-            messages.success(request, 'Monthly award updated successfully!')
-            return redirect('monthly_awards_list')
+            try:
+                updated_award = award_form.save()
+            except EditConflict:
+                rebased = rebase(award_form)
+                if rebased is None:
+                    messages.error(request, 'This monthly award was deleted by someone else while you were editing it.')
+                    return redirect('monthly_awards_list')
+                award_form, conflict = rebased
+                award = award_form.instance
+            else:
+                # Update linked sale if exists
+                updated_award.sync_linked_sale()
+
+                messages.success(request, 'Monthly award updated successfully!')
+                return redirect('monthly_awards_list')
     else:
         award_form = MonthlyAwardForm(instance=award)
 
     return render(request, 'monthly_award_form.html', {
         'award_form': award_form,
         'action': 'Edit',
-        'award': award
+        'award': award,
+        'conflict': conflict,
+        'attachments': award.attachments.select_related('uploaded_by')
     })
 
 
@@ -129,6 +196,11 @@ def delete_monthly_award(request, pk):
     award = get_object_or_404(MonthlyAward, pk=pk)
 
     if request.method == 'POST':
+        locked = closing.locked_reason(award)
+        if locked:
+            messages.error(request, f'Monthly award not deleted. {locked}')
+            return redirect('monthly_awards_list')
+
         # Revert sale status if linked
         if award.sale:
             award.sale.status = 'Pending'
@@ -149,4 +221,33 @@ def delete_monthly_award(request, pk):
         'award': award,
         'invoice_count': award.get_invoice_count()
     }
-    return render(request, 'monthly_award_confirm_delete.html', context)
\ No newline at end of file
+    return render(request, 'monthly_award_confirm_delete.html', context)
+
+
+@login_required
+@require_POST
+def inline_update_monthly_award(request, pk):
+    """Inline value update from the monthly awards table - returns the re-rendered row"""
+    award = get_object_or_404(MonthlyAward, pk=pk)
+
+    form = MonthlyAwardInlineForm(request.POST, instance=award)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    try:
+        saved = form.save()
+    except EditConflict:
+        return JsonResponse({'errors': {'__all__': [CONFLICT_MESSAGE]}}, status=409)
+    saved.sync_linked_sale()
+    updated_award = _annotate_award_flags(_award_rows(MonthlyAward.objects.filter(pk=pk)).get())
+
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'id': updated_award.pk,
+            'value': str(updated_award.value),
+            'invoice_count': updated_award.invoice_count,
+            'has_mismatch': updated_award.has_mismatch,
+            'is_missing_invoice': updated_award.is_missing_invoice,
+        })
+
+    return render(request, 'monthly_award_row.html', {'award': updated_award})
\ No newline at end of file
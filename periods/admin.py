@@ -0,0 +1,30 @@
+from django.contrib import admin
+from .models import ClosedPeriod
+
+
+@admin.register(ClosedPeriod)
+class ClosedPeriodAdmin(admin.ModelAdmin):
+    """Read-only: periods are closed and reopened from the Month-End Close page"""
+
+    list_display = [
+        '__str__',
+        'award_count',
+        'award_value',
+        'total_invoiced',
+        'total_pending',
+        'closed_by',
+        'closed_at'
+    ]
+
+    list_filter = [
+        'fiscal_year'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,233 @@
+"""
+Month-end close.
+
+close() freezes one fiscal month: a ClosedPeriod row with the month's totals,
+plus an AwardSnapshot for every award and an InvoiceSnapshot for every
+invoice dated in it, copied with two INSERT ... SELECTs. From then on the
+list views and rollups read the month from those rows - a fixed-size read
+however much history the live tables hold - and its figures no longer move
+when invoices are edited or pending ones roll forward.
+
+Closing also stops the month changing underneath the snapshot. Triggers on
+the award and invoice tables (periods migrations 0001 and 0002) refuse
+inserts and deletes of rows dated in a closed period, and updates that
+change a column the snapshot copies, whatever the code path - bookkeeping
+such as created_by going NULL when a user is deleted still goes through.
+The one other exception is a pending invoice leaving the period, which is how
+InvoicedJob.save() rolls old pending invoices into the current month (the
+snapshot keeps it as pending in the closed month). check_writable() and
+locked_reason() give the forms and delete views the same answer up front, as
+a message instead of a database error.
+
+reopen() deletes a period's snapshot, making its rows editable again.
+"""
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from psl_app_project import fiscal
+from psl_app_project.pagination import keyset_page, make_cursor, parse_cursor
+
+from .models import AwardSnapshot, ClosedPeriod, InvoiceSnapshot
+
+
+class PeriodCloseError(ValueError):
+    """A period that cannot be closed or reopened, with a message for the user"""
+
+
+def _invoice_total(invoice='i'):
+    return ' + '.join(f'{invoice}.{field}' for field in ['utility_value', 'cad_value', 'topo_value', 'contractor_value'])
+
+
+_AWARD_SNAPSHOT_SQL = f"""
+    INSERT INTO periods_awardsnapshot
+        (period_id, award_id, sale_id, job_number, date, client, client_contact, location, value,
+         invoice_count, total_invoiced)
+    SELECT %(period)s, a.id, a.sale_id, a.job_number, a.date, a.client, a.client_contact, a.location, a.value,
+           count(i.id), coalesce(sum({_invoice_total()}), 0)
+    FROM monthly_awards_monthlyaward a
+    LEFT JOIN invoiced_jobs_invoicedjob i ON i.award_id = a.id
+    WHERE a.date BETWEEN %(start)s AND %(end)s
+    GROUP BY a.id
+"""
+
+_INVOICE_SNAPSHOT_SQL = f"""
+    INSERT INTO periods_invoicesnapshot
+        (period_id, invoice_id, award_id, job_number, client, client_contact, location, award_value,
+         award_total_invoiced, description, date, utility_value, cad_value, topo_value, contractor_value,
+         psl_value, status)
+    SELECT %(period)s, i.id, a.id, a.job_number, a.client, a.client_contact, a.location, a.value,
+           (SELECT coalesce(sum({_invoice_total('o')}), 0) FROM invoiced_jobs_invoicedjob o WHERE o.award_id = a.id),
+           i.description, i.date, i.utility_value, i.cad_value, i.topo_value, i.contractor_value,
+           i.psl_value, i.status
+    FROM invoiced_jobs_invoicedjob i
+    JOIN monthly_awards_monthlyaward a ON a.id = i.award_id
+    WHERE i.date BETWEEN %(start)s AND %(end)s
+"""
+
+
+def period_dates(fiscal_year, period):
+    """(first day, last day) of a fiscal period"""
+    year, month = fiscal.calendar_month(fiscal_year, period)
+    start = date(year, month, 1)
+    return start, (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+
+
+def closed_periods(fiscal_year):
+    """{period: ClosedPeriod} for the fiscal year's closed periods"""
+    return {closed.fiscal_period: closed for closed in ClosedPeriod.objects.filter(fiscal_year=fiscal_year)}
+
+
+def closed_period_for(*days):
+    """The closed period containing any of these dates, or None"""
+    days = [day for day in days if day is not None]
+    if not days:
+        return None
+    matches = Q()
+    for day in days:
+        matches |= Q(start_date__lte=day, end_date__gte=day)
+    return ClosedPeriod.objects.filter(matches).first()
+
+
+def check_writable(instance, new_date, pending_may_leave=False):
+    """Raise ValidationError if saving `instance` dated `new_date` would change a closed period
+
+    pending_may_leave: a pending row may move out of a closed period (invoices).
+    """
+    if instance.pk:
+        old = type(instance).objects.filter(pk=instance.pk).values('date', *(['status'] if pending_may_leave else []))
+        old = old.first()
+        if old and not (pending_may_leave and old['status'] == 'Pending'):
+            closed = closed_period_for(old['date'])
+            if closed:
+                name = instance._meta.verbose_name.lower()
+                raise ValidationError(f'This {name} is dated in {closed}, which is closed - it can no longer be changed.')
+
+    closed = closed_period_for(new_date)
+    if closed:
+        raise ValidationError(f'{closed} is closed - use a date in an open period.')
+
+
+def check_linked_awards_writable(enquiry):
+    """Raise ValidationError if saving an awarded enquiry would change or delete awards in a closed period"""
+    from monthly_awards.models import MonthlyAward
+
+    old = type(enquiry).objects.filter(pk=enquiry.pk).values('status', *enquiry.AWARD_FIELDS).first()
+    if not old or old['status'] != 'Awarded':
+        return
+
+    if enquiry.status != 'Awarded':
+        reason = locked_reason(enquiry)
+    elif any(old[field] != getattr(enquiry, field) for field in enquiry.AWARD_FIELDS):
+        closed = closed_period_for(*MonthlyAward.objects.filter(sale=enquiry).values_list('date', flat=True))
+        reason = closed and f'Its monthly award is dated in {closed}, which is closed.'
+    else:
+        reason = None
+    if reason:
+        raise ValidationError(f'{reason} Reopen the period to change this enquiry.')
+
+
+def locked_reason(instance):
+    """Why deleting `instance` would change a closed period (a message), or None
+
+    Covers the rows the delete cascades to: an enquiry's awards and an award's invoices.
+    """
+    from invoiced_jobs.models import InvoicedJob
+    from monthly_awards.models import MonthlyAward
+    from sales_tracker.models import SalesEnquiry
+
+    if isinstance(instance, InvoicedJob):
+        dates = InvoicedJob.objects.filter(pk=instance.pk).values_list('date', flat=True)
+    else:
+        if isinstance(instance, SalesEnquiry):
+            awards = MonthlyAward.objects.filter(sale=instance)
+        else:
+            awards = MonthlyAward.objects.filter(pk=instance.pk)
+        dates = awards.values_list('date', flat=True).union(
+            InvoicedJob.objects.filter(award__in=awards).values_list('date', flat=True)
+        )
+
+    closed = closed_period_for(*dates)
+    if closed:
+        return f'This would change {closed}, which is closed.'
+    return None
+
+
+def close(fiscal_year, period, user=None):
+    """Close a fiscal period that has ended: snapshot its awards and invoices; returns the ClosedPeriod"""
+    start, end = period_dates(fiscal_year, period)
+    label = fiscal.period_label(fiscal_year, period)
+    if end >= timezone.localdate():
+        raise PeriodCloseError(f'{label} has not ended yet.')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Let in-flight writes to the month finish, and hold new ones, until the snapshot commits
+            cursor.execute('LOCK TABLE monthly_awards_monthlyaward, invoiced_jobs_invoicedjob IN SHARE MODE')
+            if ClosedPeriod.objects.filter(fiscal_year=fiscal_year, fiscal_period=period).exists():
+                raise PeriodCloseError(f'{label} is already closed.')
+
+            closed = ClosedPeriod.objects.create(
+                fiscal_year=fiscal_year, fiscal_period=period, start_date=start, end_date=end, closed_by=user,
+            )
+            params = {'period': closed.pk, 'start': start, 'end': end}
+            cursor.execute(_AWARD_SNAPSHOT_SQL, params)
+            cursor.execute(_INVOICE_SNAPSHOT_SQL, params)
+
+        invoice_total = F('utility_value') + F('cad_value') + F('topo_value') + F('contractor_value')
+        awards = closed.award_snapshots.aggregate(award_count=Count('id'), award_value=Sum('value'))
+        invoices = closed.invoice_snapshots.aggregate(
+            invoiced_count=Count('id', filter=Q(status='Invoiced')),
+            pending_count=Count('id', filter=Q(status='Pending')),
+            total_invoiced=Sum(invoice_total, filter=Q(status='Invoiced')),
+            total_pending=Sum(invoice_total, filter=Q(status='Pending')),
+        )
+        for name, value in {**awards, **invoices}.items():
+            setattr(closed, name, value or 0)
+        closed.save()
+    return closed
+
+
+def reopen(fiscal_year, period):
+    """Delete a closed period's snapshot, so its awards and invoices can be edited again"""
+    deleted, _ = ClosedPeriod.objects.filter(fiscal_year=fiscal_year, fiscal_period=period).delete()
+    if not deleted:
+        raise PeriodCloseError(f'{fiscal.period_label(fiscal_year, period)} is not closed.')
+
+
+def keyset_page_by_period(fiscal_year, period, cursor, page_size, live_rows, snapshot_rows):
+    """One keyset page (rows, next cursor) of a fiscal period's rows - or a whole year's, newest first
+
+    Closed periods are read from their snapshot and open ones from the live
+    tables: runs of neighbouring open periods come from one
+    live_rows([period numbers]) queryset and runs of closed ones from one
+    snapshot_rows([ClosedPeriod]) queryset. Periods cover separate dates, so
+    a year is those runs one after another, latest first, and the cursor's
+    date says which run to resume in.
+    """
+    closed = closed_periods(fiscal_year)
+    runs = []
+    for number in [period] if period else range(12, 0, -1):
+        if runs and runs[-1][0] == (number in closed):
+            runs[-1][1].append(number)
+        else:
+            runs.append((number in closed, [number]))
+
+    position = parse_cursor(AwardSnapshot, cursor)
+    resume_in = fiscal.fiscal_period_of(position[0]) if position else None
+
+    rows = []
+    for is_closed, numbers in runs:
+        if resume_in is not None and min(numbers) > resume_in:
+            continue
+        if len(rows) == page_size:
+            return rows, make_cursor(rows[-1])
+        queryset = snapshot_rows([closed[number] for number in numbers]) if is_closed else live_rows(numbers)
+        page, next_cursor = keyset_page(queryset, cursor if resume_in in numbers else None, page_size - len(rows))
+        rows += page
+        if next_cursor:
+            return rows, next_cursor
+    return rows, None
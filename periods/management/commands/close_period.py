@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from periods import closing
+from psl_app_project import fiscal
+
+
+class Command(BaseCommand):
+    help = 'Close (or reopen) a month, freezing its monthly awards and invoiced jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help='The calendar month, as YYYY-MM')
+        parser.add_argument('--reopen', action='store_true', help='Reopen the month instead of closing it')
+
+    def handle(self, *args, **options):
+        try:
+            day = datetime.strptime(options['month'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError('month must be YYYY-MM')
+        fiscal_year, period = fiscal.fiscal_year_of(day), fiscal.fiscal_period_of(day)
+
+        try:
+            if options['reopen']:
+                closing.reopen(fiscal_year, period)
+                self.stdout.write(self.style.SUCCESS(f'Reopened {fiscal.period_label(fiscal_year, period)}'))
+            else:
+                closed = closing.close(fiscal_year, period)
+                self.stdout.write(self.style.SUCCESS(
+                    f'Closed {closed}: {closed.award_count} awards, {closed.invoiced_count} invoiced '
+                    f'and {closed.pending_count} pending invoices'
+                ))
+        except closing.PeriodCloseError as exc:
+            raise CommandError(str(exc))
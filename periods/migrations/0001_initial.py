@@ -0,0 +1,168 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Writes to awards and invoices dated in a closed period are refused; a
+# pending invoice may still be moved out of one (InvoicedJob.save() rolls
+# old pending invoices into the current month). TG_ARGV[0] is the table's kind.
+CREATE_TRIGGERS = r"""
+CREATE FUNCTION periods_refuse_closed_writes() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    closed text;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT to_char(start_date, 'FMMonth YYYY') INTO closed
+        FROM periods_closedperiod WHERE OLD.date BETWEEN start_date AND end_date;
+        IF closed IS NOT NULL AND TG_OP = 'UPDATE' AND TG_ARGV[0] = 'invoice' THEN
+            IF OLD.status = 'Pending' THEN
+                closed := NULL;
+            END IF;
+        END IF;
+        IF closed IS NOT NULL THEN
+            RAISE EXCEPTION '% % is dated in closed period %', TG_ARGV[0], OLD.id, closed
+                USING ERRCODE = 'check_violation';
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT to_char(start_date, 'FMMonth YYYY') INTO closed
+        FROM periods_closedperiod WHERE NEW.date BETWEEN start_date AND end_date;
+        IF closed IS NOT NULL THEN
+            RAISE EXCEPTION '% % would be dated in closed period %', TG_ARGV[0], NEW.id, closed
+                USING ERRCODE = 'check_violation';
+        END IF;
+        RETURN NEW;
+    END IF;
+    RETURN OLD;
+END
+$$;
+
+CREATE TRIGGER periods_closed_awards BEFORE INSERT OR UPDATE OR DELETE ON monthly_awards_monthlyaward
+    FOR EACH ROW EXECUTE FUNCTION periods_refuse_closed_writes('award');
+CREATE TRIGGER periods_closed_invoices BEFORE INSERT OR UPDATE OR DELETE ON invoiced_jobs_invoicedjob
+    FOR EACH ROW EXECUTE FUNCTION periods_refuse_closed_writes('invoice');
+
+CREATE FUNCTION periods_refuse_snapshot_updates() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    RAISE EXCEPTION 'period snapshots cannot be changed' USING ERRCODE = 'check_violation';
+END
+$$;
+
+CREATE TRIGGER periods_award_snapshot_immutable BEFORE UPDATE ON periods_awardsnapshot
+    FOR EACH ROW EXECUTE FUNCTION periods_refuse_snapshot_updates();
+CREATE TRIGGER periods_invoice_snapshot_immutable BEFORE UPDATE ON periods_invoicesnapshot
+    FOR EACH ROW EXECUTE FUNCTION periods_refuse_snapshot_updates();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER periods_closed_awards ON monthly_awards_monthlyaward;
+DROP TRIGGER periods_closed_invoices ON invoiced_jobs_invoicedjob;
+DROP TRIGGER periods_award_snapshot_immutable ON periods_awardsnapshot;
+DROP TRIGGER periods_invoice_snapshot_immutable ON periods_invoicesnapshot;
+DROP FUNCTION periods_refuse_closed_writes();
+DROP FUNCTION periods_refuse_snapshot_updates();
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('monthly_awards', '0006_fiscal_period'),
+        ('invoiced_jobs', '0009_fiscal_period'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClosedPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.IntegerField()),
+                ('fiscal_period', models.IntegerField()),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('award_count', models.PositiveIntegerField(default=0)),
+                ('award_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('invoiced_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('total_invoiced', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_pending', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_periods', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Closed Period',
+                'verbose_name_plural': 'Closed Periods',
+                'ordering': ['-fiscal_year', '-fiscal_period'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AwardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('award_id', models.BigIntegerField()),
+                ('sale_id', models.BigIntegerField(blank=True, null=True)),
+                ('job_number', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('client', models.CharField(max_length=255)),
+                ('client_contact', models.CharField(max_length=255)),
+                ('location', models.TextField()),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('invoice_count', models.PositiveIntegerField()),
+                ('total_invoiced', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='award_snapshots', to='periods.closedperiod')),
+            ],
+            options={
+                'verbose_name': 'Award Snapshot',
+                'verbose_name_plural': 'Award Snapshots',
+            },
+        ),
+        migrations.CreateModel(
+            name='InvoiceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invoice_id', models.BigIntegerField()),
+                ('award_id', models.BigIntegerField()),
+                ('job_number', models.CharField(max_length=20)),
+                ('client', models.CharField(max_length=255)),
+                ('client_contact', models.CharField(max_length=255)),
+                ('location', models.TextField()),
+                ('award_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('award_total_invoiced', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('utility_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('cad_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('topo_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('contractor_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('psl_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(max_length=10)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_snapshots', to='periods.closedperiod')),
+            ],
+            options={
+                'verbose_name': 'Invoice Snapshot',
+                'verbose_name_plural': 'Invoice Snapshots',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='closedperiod',
+            index=models.Index(fields=['start_date', 'end_date'], name='closed_period_dates_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='closedperiod',
+            constraint=models.UniqueConstraint(fields=('fiscal_year', 'fiscal_period'), name='closed_period_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='awardsnapshot',
+            index=models.Index(fields=['period', '-date', '-id'], name='award_snapshot_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoicesnapshot',
+            index=models.Index(fields=['period', '-date', '-id'], name='invoice_snapshot_page_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,98 @@
+from django.db import migrations
+
+# As 0001, but an UPDATE that leaves every column the period snapshots copy
+# as it was goes through: the created_by SET NULL when a user is deleted, the
+# version and updated_at bookkeeping, email and phone.
+REFUSE_FROZEN_CHANGES = r"""
+CREATE OR REPLACE FUNCTION periods_refuse_closed_writes() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    closed text;
+BEGIN
+    IF TG_OP = 'UPDATE' AND TG_ARGV[0] = 'award' THEN
+        IF (OLD.date, OLD.sale_id, OLD.job_number, OLD.client, OLD.client_contact, OLD.location, OLD.value)
+           IS NOT DISTINCT FROM
+           (NEW.date, NEW.sale_id, NEW.job_number, NEW.client, NEW.client_contact, NEW.location, NEW.value) THEN
+            RETURN NEW;
+        END IF;
+    ELSIF TG_OP = 'UPDATE' AND TG_ARGV[0] = 'invoice' THEN
+        IF (OLD.date, OLD.award_id, OLD.description, OLD.utility_value, OLD.cad_value, OLD.topo_value,
+            OLD.contractor_value, OLD.psl_value, OLD.status)
+           IS NOT DISTINCT FROM
+           (NEW.date, NEW.award_id, NEW.description, NEW.utility_value, NEW.cad_value, NEW.topo_value,
+            NEW.contractor_value, NEW.psl_value, NEW.status) THEN
+            RETURN NEW;
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT to_char(start_date, 'FMMonth YYYY') INTO closed
+        FROM periods_closedperiod WHERE OLD.date BETWEEN start_date AND end_date;
+        IF closed IS NOT NULL AND TG_OP = 'UPDATE' AND TG_ARGV[0] = 'invoice' THEN
+            IF OLD.status = 'Pending' THEN
+                closed := NULL;
+            END IF;
+        END IF;
+        IF closed IS NOT NULL THEN
+            RAISE EXCEPTION '% % is dated in closed period %', TG_ARGV[0], OLD.id, closed
+                USING ERRCODE = 'check_violation';
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT to_char(start_date, 'FMMonth YYYY') INTO closed
+        FROM periods_closedperiod WHERE NEW.date BETWEEN start_date AND end_date;
+        IF closed IS NOT NULL THEN
+            RAISE EXCEPTION '% % would be dated in closed period %', TG_ARGV[0], NEW.id, closed
+                USING ERRCODE = 'check_violation';
+        END IF;
+        RETURN NEW;
+    END IF;
+    RETURN OLD;
+END
+$$;
+"""
+
+# 0001's version
+REFUSE_ALL_CHANGES = r"""
+CREATE OR REPLACE FUNCTION periods_refuse_closed_writes() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    closed text;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT to_char(start_date, 'FMMonth YYYY') INTO closed
+        FROM periods_closedperiod WHERE OLD.date BETWEEN start_date AND end_date;
+        IF closed IS NOT NULL AND TG_OP = 'UPDATE' AND TG_ARGV[0] = 'invoice' THEN
+            IF OLD.status = 'Pending' THEN
+                closed := NULL;
+            END IF;
+        END IF;
+        IF closed IS NOT NULL THEN
+            RAISE EXCEPTION '% % is dated in closed period %', TG_ARGV[0], OLD.id, closed
+                USING ERRCODE = 'check_violation';
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT to_char(start_date, 'FMMonth YYYY') INTO closed
+        FROM periods_closedperiod WHERE NEW.date BETWEEN start_date AND end_date;
+        IF closed IS NOT NULL THEN
+            RAISE EXCEPTION '% % would be dated in closed period %', TG_ARGV[0], NEW.id, closed
+                USING ERRCODE = 'check_violation';
+        END IF;
+        RETURN NEW;
+    END IF;
+    RETURN OLD;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periods', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(REFUSE_FROZEN_CHANGES, REFUSE_ALL_CHANGES),
+    ]
@@ -0,0 +1,130 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from psl_app_project import fiscal
+
+
+class ClosedPeriod(models.Model):
+    """A closed fiscal month: its awards and invoices frozen as snapshot rows, with their totals
+
+    While a period is closed the database refuses writes to awards and
+    invoices dated in it (see periods/closing.py).
+    """
+
+    fiscal_year = models.IntegerField()
+    fiscal_period = models.IntegerField()
+    # The period's dates, for the write-blocking triggers
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    award_count = models.PositiveIntegerField(default=0)
+    award_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    invoiced_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    total_invoiced = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_pending = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='closed_periods')
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-fiscal_year', '-fiscal_period']
+        verbose_name = 'Closed Period'
+        verbose_name_plural = 'Closed Periods'
+        constraints = [
+            models.UniqueConstraint(fields=['fiscal_year', 'fiscal_period'], name='closed_period_unique'),
+        ]
+        indexes = [
+            # Date lookups from the triggers and closing.closed_period_for()
+            models.Index(fields=['start_date', 'end_date'], name='closed_period_dates_idx'),
+        ]
+
+    def __str__(self):
+        return fiscal.period_label(self.fiscal_year, self.fiscal_period)
+
+    def award_rollup_row(self):
+        """The period's entry in the awards rollup (see monthly_awards.views._award_rollup)"""
+        return {'fiscal_period': self.fiscal_period, 'total_value': self.award_value, 'count': self.award_count,
+                'closed': True}
+
+    def invoice_rollup_row(self):
+        """The period's entry in the invoiced jobs rollup (see invoiced_jobs.views._job_rollup)"""
+        return {
+            'fiscal_period': self.fiscal_period,
+            'total_invoiced': self.total_invoiced,
+            'total_pending': self.total_pending,
+            'invoiced_count': self.invoiced_count,
+            'pending_count': self.pending_count,
+            'total_value': self.total_invoiced + self.total_pending,
+            'count': self.invoiced_count + self.pending_count,
+            'closed': True,
+        }
+
+
+class AwardSnapshot(models.Model):
+    """A monthly award as it stood when its period was closed"""
+
+    is_snapshot = True
+
+    period = models.ForeignKey(ClosedPeriod, on_delete=models.CASCADE, related_name='award_snapshots')
+    # Not a foreign key: the snapshot outlives the award if the period is reopened and it is deleted
+    award_id = models.BigIntegerField()
+    sale_id = models.BigIntegerField(null=True, blank=True)
+
+    job_number = models.CharField(max_length=20)
+    date = models.DateField()
+    client = models.CharField(max_length=255)
+    client_contact = models.CharField(max_length=255)
+    location = models.TextField()
+    value = models.DecimalField(max_digits=10, decimal_places=2)
+    invoice_count = models.PositiveIntegerField()
+    total_invoiced = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        verbose_name = 'Award Snapshot'
+        verbose_name_plural = 'Award Snapshots'
+        indexes = [
+            models.Index(fields=['period', '-date', '-id'], name='award_snapshot_page_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_number} ({self.period})"
+
+
+class InvoiceSnapshot(models.Model):
+    """An invoiced job, with its award's details and totals, as it stood when its period was closed"""
+
+    is_snapshot = True
+
+    period = models.ForeignKey(ClosedPeriod, on_delete=models.CASCADE, related_name='invoice_snapshots')
+    invoice_id = models.BigIntegerField()
+    award_id = models.BigIntegerField()
+
+    job_number = models.CharField(max_length=20)
+    client = models.CharField(max_length=255)
+    client_contact = models.CharField(max_length=255)
+    location = models.TextField()
+    award_value = models.DecimalField(max_digits=10, decimal_places=2)
+    award_total_invoiced = models.DecimalField(max_digits=12, decimal_places=2)
+
+    description = models.TextField(blank=True, null=True)
+    date = models.DateField()
+    utility_value = models.DecimalField(max_digits=10, decimal_places=2)
+    cad_value = models.DecimalField(max_digits=10, decimal_places=2)
+    topo_value = models.DecimalField(max_digits=10, decimal_places=2)
+    contractor_value = models.DecimalField(max_digits=10, decimal_places=2)
+    psl_value = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10)
+
+    class Meta:
+        verbose_name = 'Invoice Snapshot'
+        verbose_name_plural = 'Invoice Snapshots'
+        indexes = [
+            models.Index(fields=['period', '-date', '-id'], name='invoice_snapshot_page_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_number} {self.date} ({self.period})"
+
+    def get_total_invoice_value(self):
+        return self.utility_value + self.cad_value + self.topo_value + self.contractor_value
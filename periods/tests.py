@@ -0,0 +1,52 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from invoiced_jobs.models import InvoicedJob
+from monthly_awards.models import MonthlyAward
+
+from . import closing
+from .models import ClosedPeriod
+
+
+class ClosedPeriodWriteTests(TestCase):
+    """The closed-period triggers refuse changes to what the snapshot froze, and nothing else"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('closer')
+        cls.award = MonthlyAward.objects.create(
+            job_number='90001', client='Client', client_contact='Contact', location='Somewhere',
+            value=1000, date=date(2024, 6, 10), created_by=cls.user,
+        )
+        cls.invoice = InvoicedJob.objects.create(
+            award=cls.award, date=date(2024, 6, 20), utility_value=600, contractor_value=400,
+            status='Invoiced', created_by=cls.user,
+        )
+        start, end = closing.period_dates(2024, 3)
+        ClosedPeriod.objects.create(fiscal_year=2024, fiscal_period=3, start_date=start, end_date=end)
+
+    def test_deleting_a_user_who_created_closed_rows(self):
+        self.user.delete()
+        self.assertIsNone(MonthlyAward.objects.get(pk=self.award.pk).created_by)
+        self.assertIsNone(InvoicedJob.objects.get(pk=self.invoice.pk).created_by)
+
+    def test_unfrozen_columns_can_change(self):
+        MonthlyAward.objects.filter(pk=self.award.pk).update(email='new@example.com')
+
+    def test_frozen_columns_cannot_change(self):
+        for model, pk, change in [
+            (MonthlyAward, self.award.pk, {'value': 2000}),
+            (MonthlyAward, self.award.pk, {'client': 'Someone else'}),
+            (InvoicedJob, self.invoice.pk, {'utility_value': 700}),
+            (InvoicedJob, self.invoice.pk, {'status': 'Pending'}),
+        ]:
+            with self.subTest(model=model.__name__, change=change):
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    model.objects.filter(pk=pk).update(**change)
+
+    def test_closed_rows_cannot_be_deleted(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            InvoicedJob.objects.filter(pk=self.invoice.pk).delete()
@@ -0,0 +1,12 @@
+from django.urls import path
+from .views import (
+    period_close,
+    close_period,
+    reopen_period
+)
+
+urlpatterns = [
+    path('', period_close, name='period_close'),
+    path('<int:fiscal_year>/<int:period>/close/', close_period, name='close_period'),
+    path('<int:fiscal_year>/<int:period>/reopen/', reopen_period, name='reopen_period'),
+]
@@ -0,0 +1,65 @@
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import user_passes_test
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from psl_app_project import fiscal
+from psl_app_project.replica import use_replica
+from . import closing
+
+
+@staff_member_required
+@use_replica
+def period_close(request):
+    """The fiscal year's periods, closed or open, with the close action for those that have ended"""
+    fiscal_year, _ = fiscal.selected_period(request)
+    closed = closing.closed_periods(fiscal_year)
+    today = timezone.localdate()
+
+    periods = []
+    for period, month, year in fiscal.periods(fiscal_year):
+        start, end = closing.period_dates(fiscal_year, period)
+        periods.append({
+            'period': period,
+            'label': f'{month} {year}',
+            'closed': closed.get(period),
+            'can_close': period not in closed and end < today,
+        })
+
+    context = {
+        'periods': periods,
+        'selected_year': fiscal_year,
+        'year_label': fiscal.fiscal_year_label(fiscal_year),
+        'year_choices': [(year, fiscal.fiscal_year_label(year)) for year in fiscal.year_range()],
+    }
+    return render(request, 'period_close.html', context)
+
+
+@staff_member_required
+@require_POST
+def close_period(request, fiscal_year, period):
+    try:
+        closed = closing.close(fiscal_year, period, request.user)
+    except closing.PeriodCloseError as exc:
+        messages.error(request, str(exc))
+    else:
+        messages.success(
+            request,
+            f'{closed} closed: {closed.award_count} awards and '
+            f'{closed.invoiced_count + closed.pending_count} invoices frozen.',
+        )
+    return redirect(f"{reverse('period_close')}?fy={fiscal_year}")
+
+
+@user_passes_test(lambda user: user.is_superuser)
+@require_POST
+def reopen_period(request, fiscal_year, period):
+    try:
+        closing.reopen(fiscal_year, period)
+    except closing.PeriodCloseError as exc:
+        messages.error(request, str(exc))
+    else:
+        messages.success(request, f'{fiscal.period_label(fiscal_year, period)} reopened - its rows can be edited again.')
+    return redirect(f"{reverse('period_close')}?fy={fiscal_year}")
@@ -0,0 +1,51 @@
+"""
+Helpers for the async views.
+
+Django's async ORM methods (acount(), aaggregate(), ...) all run on the
+request's single sync thread, so gathering several of them still runs the
+queries one after another. run_concurrently() runs each independent piece of
+query work with sync_to_async(thread_sensitive=False) instead: on a pool
+thread with that thread's own database connection, so the queries overlap.
+Pieces must be read-only and must not depend on each other's results.
+
+Pool threads keep their connections between requests (CONN_MAX_AGE), so a
+piece reuses one rather than connecting. As with the sync views, which run
+in autocommit, each query sees the data as of when it ran: a total or COUNT
+can be one write apart from the rows beside it.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.shortcuts import render
+
+
+def _on_own_connection(func):
+    @wraps(func)
+    def wrapper():
+        # Pool threads outlive requests, so apply CONN_MAX_AGE here as a request would
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+async def run_concurrently(*funcs):
+    """Run zero-argument sync callables side by side; returns their results in order"""
+    return await asyncio.gather(*(
+        sync_to_async(_on_own_connection(func), thread_sensitive=False)()
+        for func in funcs
+    ))
+
+
+async def arender(request, template_name, context=None):
+    """render() for async views
+
+    The user login_required already loaded is reused, so context processors
+    don't query for it again; templates render on the request's sync thread.
+    """
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
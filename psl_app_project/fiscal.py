@@ -0,0 +1,128 @@
+"""
+The fiscal calendar: years starting in settings.FISCAL_YEAR_START_MONTH.
+
+A fiscal year is named after the calendar year it starts in (April 2026 -
+March 2027 is 2026, shown as "2026/27") and its months are periods 1-12.
+The date-based models store both as generated columns built from the
+FiscalYear/FiscalPeriod expressions below, so filtering or grouping by
+fiscal period is a plain indexed column lookup.
+
+The start month is part of those columns' definitions: changing it needs
+makemigrations/migrate, which recomputes every row.
+"""
+import calendar
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Func, IntegerField
+
+
+class _ShiftedDatePart(Func):
+    """EXTRACT(<part> FROM date - (start_month - 1) months) - immutable, so usable in a generated column"""
+
+    part = None
+
+    def __init__(self, expression, start_month, **extra):
+        super().__init__(expression, start_month=start_month, output_field=IntegerField(), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        months = int(self.extra['start_month']) - 1
+        template = f"CAST(EXTRACT({self.part} FROM %(expressions)s - INTERVAL '{months} months') AS integer)"
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+class FiscalYear(_ShiftedDatePart):
+    part = 'YEAR'
+
+
+class FiscalPeriod(_ShiftedDatePart):
+    part = 'MONTH'
+
+
+def start_month():
+    return settings.FISCAL_YEAR_START_MONTH
+
+
+def fiscal_year_of(day):
+    return day.year if day.month >= start_month() else day.year - 1
+
+
+def fiscal_period_of(day):
+    return (day.month - start_month()) % 12 + 1
+
+
+def calendar_month(fiscal_year, period):
+    """(year, month) of a fiscal period"""
+    month_index = start_month() - 1 + period - 1
+    return fiscal_year + month_index // 12, month_index % 12 + 1
+
+
+def fiscal_year_label(fiscal_year):
+    """"2026/27", or just "2026" when the fiscal year is the calendar year"""
+    if start_month() == 1:
+        return str(fiscal_year)
+    return f"{fiscal_year}/{(fiscal_year + 1) % 100:02d}"
+
+
+def period_label(fiscal_year, period):
+    """"April 2026" for a period, "2026/27" for the whole year (period None)"""
+    if period is None:
+        return fiscal_year_label(fiscal_year)
+    year, month = calendar_month(fiscal_year, period)
+    return f"{calendar.month_name[month]} {year}"
+
+
+def periods(fiscal_year):
+    """[(period, month name, calendar year)] for the year, in fiscal order"""
+    return [
+        (period, calendar.month_name[month], year)
+        for period in range(1, 13)
+        for year, month in [calendar_month(fiscal_year, period)]
+    ]
+
+
+def fill_periods(fiscal_year, rows, **zero):
+    """All 12 periods of a per-period rollup, in order
+
+    `rows` come from .values('fiscal_period').annotate(...); periods with no
+    row get the `zero` values. Each entry also has the period's month name
+    and calendar year.
+    """
+    by_period = {row['fiscal_period']: row for row in rows}
+    return [
+        {'period': period, 'month': month, 'year': year, **zero, **by_period.get(period, {})}
+        for period, month, year in periods(fiscal_year)
+    ]
+
+
+def selected_period(request):
+    """(fiscal year, period or None for the whole year) from ?fy= and ?period=, defaulting to today's
+
+    Calendar ?year=&month= links from before fiscal periods are translated.
+    A year outside year_range() is treated as invalid, like any other.
+    """
+    today = date.today()
+    try:
+        if 'fy' not in request.GET and 'year' in request.GET:
+            day = date(int(request.GET['year']), int(request.GET.get('month', 1)), 1)
+            if fiscal_year_of(day) not in year_range():
+                raise ValueError(day)
+            return fiscal_year_of(day), fiscal_period_of(day)
+
+        fiscal_year = int(request.GET.get('fy', fiscal_year_of(today)))
+        if fiscal_year not in year_range():
+            raise ValueError(fiscal_year)
+        period = request.GET.get('period', str(fiscal_period_of(today)))
+        if period == 'all':
+            return fiscal_year, None
+        period = int(period)
+        if not 1 <= period <= 12:
+            raise ValueError(period)
+        return fiscal_year, period
+    except (ValueError, TypeError):
+        return fiscal_year_of(today), fiscal_period_of(today)
+
+
+def year_range():
+    """Fiscal years offered in the list filters (2020 to next year)"""
+    return range(2020, fiscal_year_of(date.today()) + 2)
@@ -0,0 +1,158 @@
+"""
+Non-blocking logging, installed as LOGGING_CONFIG.
+
+configure() applies settings.LOGGING with dictConfig() as usual, then moves
+the handlers of the root logger, Django's own loggers and each logger named
+in LOGGING behind a QueueHandler. Request threads only put records on an in-memory queue; a
+QueueListener thread per logger formats and writes them, so a slow disk or
+console never holds up a request.
+
+Listener threads do not survive fork(), so they are restarted in forked
+children (gunicorn workers with preload_app) and flushed at exit.
+"""
+import atexit
+import copy
+import fcntl
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.utils.log import DEFAULT_LOGGING
+
+# Set by AccessLogMiddleware for the duration of a request
+request_id_var = ContextVar('request_id', default='-')
+
+_queued = []  # (QueueHandler, QueueListener) per logger
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id - on the thread that logged, before the queue"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve the message and traceback text now, on the thread that
+        # logged - args may be lazy objects or change later - but leave the
+        # formatting to the listener's handlers so each can use its own
+        # formatter. exc_info stays for AdminEmailHandler's report; the queue
+        # never leaves the process, so nothing needs to be picklable.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line
+
+    time, level, logger, request_id and message, plus every key of a dict
+    passed as extra={'fields': {...}}.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler for a file that several processes write to
+
+    Each gunicorn worker has its own handler on the same file. Before writing,
+    a handler reopens the file if another process has rotated it away, and
+    rotation is done under an exclusive lock on "<file>.lock" so exactly one
+    process renames the files when the size limit is reached.
+    """
+
+    def emit(self, record):
+        self._reopen_if_rotated()
+        super().emit(record)
+
+    def _reopen_if_rotated(self):
+        """Reopen baseFilename if it is no longer the file we have open; True if reopened"""
+        if self.stream is None:
+            return False
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            on_disk = None
+        opened = os.fstat(self.stream.fileno())
+        if on_disk and (on_disk.st_dev, on_disk.st_ino) == (opened.st_dev, opened.st_ino):
+            return False
+        self.stream.close()
+        self.stream = self._open()
+        return True
+
+    def doRollover(self):
+        with open(self.baseFilename + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Another process rotated while we waited - write to its new file instead
+            if not self._reopen_if_rotated():
+                super().doRollover()
+
+
+def _queue_handlers(logger):
+    log_queue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    listener = logging.handlers.QueueListener(log_queue, *logger.handlers, respect_handler_level=True)
+    logger.handlers = [queue_handler]
+    listener.start()
+    _queued.append((queue_handler, listener))
+
+
+def stop_listeners():
+    """Write out everything still queued and stop the listener threads"""
+    while _queued:
+        _, listener = _queued.pop()
+        listener.stop()
+
+
+def _restart_listeners_after_fork():
+    # The child has copies of the queues (and whatever was in them) but no
+    # listener threads: give each logger a fresh queue and listener
+    for index, (queue_handler, listener) in enumerate(_queued):
+        queue_handler.queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            queue_handler.queue, *listener.handlers, respect_handler_level=True
+        )
+        listener.start()
+        _queued[index] = (queue_handler, listener)
+
+
+def configure(logging_settings):
+    """LOGGING_CONFIG entry point: dictConfig(), then queue the configured loggers' handlers"""
+    stop_listeners()
+    logging.config.dictConfig(logging_settings)
+
+    # Django's DEFAULT_LOGGING (already applied) includes mail_admins on "django"
+    names = dict.fromkeys([None, *DEFAULT_LOGGING['loggers'], *logging_settings.get('loggers', {})])
+    for name in names:
+        logger = logging.getLogger(name)
+        if logger.handlers:
+            _queue_handlers(logger)
+
+
+atexit.register(stop_listeners)
+os.register_at_fork(after_in_child=_restart_listeners_after_fork)
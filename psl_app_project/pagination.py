@@ -0,0 +1,105 @@
+"""
+Keyset (seek) pagination shared by the list views.
+
+Rows are ordered by a date-like field then primary key (descending by default)
+and the next page starts strictly after the last row already sent. Unlike OFFSET
+paging the cost of a page does not grow with how deep into the list it is.
+
+Cursors are opaque strings of the form "<field value>|<pk>", with UTC
+datetimes written with a Z rather than "+00:00" so a cursor pasted into a
+URL without percent-encoding still reads back.
+
+offset_page() is the numbered-page equivalent of Paginator.get_page() for
+async views.
+"""
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from .concurrency import run_concurrently
+
+
+def make_cursor(obj, field='date'):
+    """Build the cursor pointing just after `obj` (a model instance or a values() dict)"""
+    if isinstance(obj, dict):
+        value, pk = obj[field], obj['id']
+    else:
+        value, pk = getattr(obj, field), obj.pk
+    if isinstance(value, datetime) and value.utcoffset() == timedelta(0):
+        return f"{value.replace(tzinfo=None).isoformat()}Z|{pk}"
+    return f"{value.isoformat()}|{pk}"
+
+
+def parse_cursor(model, cursor, field='date'):
+    """Parse a cursor string into (field value, pk), or None if missing/invalid"""
+    if not cursor or '|' not in cursor:
+        return None
+    raw_value, raw_pk = cursor.rsplit('|', 1)
+    # Older cursors carry "+00:00"; unencoded in a query string its + arrives as a space
+    raw_value = raw_value.replace(' ', '+')
+    try:
+        return model._meta.get_field(field).to_python(raw_value), int(raw_pk)
+    except (ValidationError, ValueError):
+        return None
+
+
+def keyset_page(queryset, cursor, page_size, field='date', descending=True):
+    """
+    Return (rows, next_cursor) for one page of `queryset`.
+
+    next_cursor is None once the last page has been reached. values()
+    querysets are supported as long as they include `field` and 'id'.
+    """
+    if descending:
+        queryset = queryset.order_by(f'-{field}', '-pk')
+        past = 'lt'
+    else:
+        queryset = queryset.order_by(field, 'pk')
+        past = 'gt'
+
+    position = parse_cursor(queryset.model, cursor, field)
+    if position:
+        value, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__{past}': value}) | Q(**{field: value, f'pk__{past}': pk})
+        )
+
+    # Fetch one extra row to know whether another page follows
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, make_cursor(rows[-1], field)
+    return rows, None
+
+
+async def offset_page(queryset, number, per_page):
+    """
+    Return a Page like Paginator.get_page(), for async views.
+
+    The COUNT and the page's rows are fetched at the same time on separate
+    connections. A page number that is not an integer gives the first page;
+    one out of range gives the last page, at the cost of one more query.
+    """
+    try:
+        number = int(number)
+    except (TypeError, ValueError):
+        number = 1
+
+    def rows_for(page_number):
+        offset = (page_number - 1) * per_page
+        return lambda: list(queryset[offset:offset + per_page])
+
+    if number >= 1:
+        count, rows = await run_concurrently(queryset.count, rows_for(number))
+    else:
+        [count], rows = await run_concurrently(queryset.count), []
+
+    paginator = Paginator(queryset, per_page)
+    # count is a cached_property; setting it stops the paginator running its own COUNT
+    paginator.count = count
+    if number < 1 or number > paginator.num_pages:
+        number = paginator.num_pages
+        [rows] = await run_concurrently(rows_for(number))
+    return Page(rows, number, paginator)
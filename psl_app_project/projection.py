@@ -0,0 +1,72 @@
+"""
+Column projection for the list views.
+
+List rows only show a few words of the unbounded text columns (locations,
+notes, descriptions), so the list querysets leave those columns out with
+only() and select a short LEFT(...) of each instead: with_previews()
+annotates <field>_head, sized from the number of words the row shows plus
+one character to tell whether the text goes on. attach_previews() turns the
+heads into <field>_preview / <field>_truncated for the row templates, and the
+full text of a truncated value is fetched for its row on demand
+(templates/text_preview.html, full_text()).
+
+`previews` arguments map a field path ('note', 'award__location') to the
+number of words shown; attribute names use the path with __ as _.
+"""
+from django.db.models.functions import Left
+from django.http import Http404, JsonResponse
+from django.utils.text import Truncator
+
+# Characters fetched per word shown - enough for the longest words in addresses
+CHARS_PER_WORD = 12
+
+
+def _name(field):
+    return field.replace('__', '_')
+
+
+def _chars(words):
+    return words * CHARS_PER_WORD
+
+
+def with_previews(queryset, previews):
+    """Annotate the first characters of each previewed column as <field>_head"""
+    return queryset.annotate(**{
+        f'{_name(field)}_head': Left(field, _chars(words) + 1) for field, words in previews.items()
+    })
+
+
+def _value(obj, field):
+    for part in field.split('__'):
+        obj = getattr(obj, part)
+    return obj
+
+
+def attach_previews(obj, previews):
+    """Set <field>_preview (the words shown) and <field>_truncated on a row
+
+    Rows from with_previews() use their heads; full instances (a row just
+    saved by an inline edit) use the whole value.
+    """
+    for field, words in previews.items():
+        name = _name(field)
+        head = f'{name}_head'
+        text = (getattr(obj, head) if hasattr(obj, head) else _value(obj, field)) or ''
+        chars = _chars(words)
+        cut = len(text) > chars
+        preview = Truncator(text[:chars]).words(words)
+        if cut and not preview.endswith('…'):
+            preview += '…'
+        setattr(obj, f'{name}_preview', preview)
+        setattr(obj, f'{name}_truncated', cut or preview != text)
+    return obj
+
+
+def full_text(queryset, pk, field, previews):
+    """JSON response with the full text of one previewed column of one row"""
+    if field not in previews:
+        raise Http404('No such text column')
+    texts = list(queryset.filter(pk=pk).values_list(field, flat=True))
+    if not texts:
+        raise Http404('No such row')
+    return JsonResponse({'text': texts[0] or ''})
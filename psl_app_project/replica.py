@@ -0,0 +1,205 @@
+"""
+Optional read-replica routing.
+
+When DB_REPLICA_HOST is configured settings add a 'replica' database and
+ReplicaRouter. Reads only go to the replica inside views decorated with
+@use_replica (list/report pages) or code wrapped in reading_from_replica(),
+and only while:
+
+- the request is a GET/HEAD without the primary-pin cookie that
+  PrimaryStickinessMiddleware sets after every write request, so a user
+  always sees their own changes;
+- no transaction is open on the primary;
+- the last health check found the replica reachable and within
+  REPLICA_MAX_LAG_SECONDS of the primary.
+
+Everything else - all writes, and every read by default - uses 'default'.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections, OperationalError
+
+logger = logging.getLogger(__name__)
+
+REPLICA = 'replica'
+PRIMARY = 'default'
+
+# Sessions, users and API tokens can change just before a read (e.g. at login)
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'contenttypes', 'api'}
+
+_replica_requested = ContextVar('replica_requested', default=False)
+
+_health_lock = threading.Lock()
+_health = {'checked_at': 0.0, 'healthy': False}
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def replica_is_healthy():
+    """Cached per process for REPLICA_HEALTH_CHECK_SECONDS"""
+    interval = getattr(settings, 'REPLICA_HEALTH_CHECK_SECONDS', 5)
+    if time.monotonic() - _health['checked_at'] < interval:
+        return _health['healthy']
+
+    with _health_lock:
+        if time.monotonic() - _health['checked_at'] >= interval:
+            _health['healthy'] = _check_replica()
+            _health['checked_at'] = time.monotonic()
+    return _health['healthy']
+
+
+def mark_replica_unhealthy():
+    """Stop using the replica until the next health check is due"""
+    _health['healthy'] = False
+    _health['checked_at'] = time.monotonic()
+
+
+def _check_replica():
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 10)
+    try:
+        with connections[REPLICA].cursor() as cursor:
+            # A server that is not in recovery is not replicating, so has no lag.
+            # Note replay lag also grows while the primary is idle.
+            cursor.execute(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                "ELSE 0 END"
+            )
+            lag = float(cursor.fetchone()[0])
+    except Exception as exc:
+        logger.warning('Replica unavailable, reading from primary: %s', exc)
+        connections[REPLICA].close()
+        return False
+
+    if lag > max_lag:
+        logger.warning('Replica %.1fs behind (limit %ss), reading from primary', lag, max_lag)
+        return False
+    return True
+
+
+class ReplicaRouter:
+    """Route reads to the replica only where explicitly requested and safe"""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_requested.get() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return REPLICA if replica_is_healthy() else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both databases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != REPLICA
+
+
+@contextmanager
+def reading_from_replica():
+    """Send reads in this block to the replica (when configured and healthy)"""
+    token = _replica_requested.set(replica_configured())
+    try:
+        yield
+    finally:
+        _replica_requested.reset(token)
+
+
+def _pinned_to_primary(request):
+    cookie = getattr(settings, 'REPLICA_STICKY_COOKIE', 'db_primary')
+    return request.method not in ('GET', 'HEAD') or cookie in request.COOKIES
+
+
+def use_replica(view_func):
+    """Let a read-only view's queries use the replica
+
+    If the replica drops out part way through, the view is run again
+    against the primary - safe because these views do not write.
+    Works for async views too: the context variable it sets is copied to
+    the threads their queries run on.
+    """
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not replica_configured() or _pinned_to_primary(request):
+                return await view_func(request, *args, **kwargs)
+
+            try:
+                with reading_from_replica():
+                    return await view_func(request, *args, **kwargs)
+            except OperationalError as exc:
+                # The failed queries' own threads close their broken connections
+                logger.warning('Replica query failed, retrying on primary: %s', exc)
+                mark_replica_unhealthy()
+                return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not replica_configured() or _pinned_to_primary(request):
+            return view_func(request, *args, **kwargs)
+
+        try:
+            with reading_from_replica():
+                return view_func(request, *args, **kwargs)
+        except OperationalError as exc:
+            logger.warning('Replica query failed, retrying on primary: %s', exc)
+            mark_replica_unhealthy()
+            connections[REPLICA].close()
+            return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+class PrimaryStickinessMiddleware:
+    """After a write request, pin the user's reads to the primary for a short while
+
+    Sets a short-lived cookie that @use_replica views check, so pages loaded
+    right after a save never show replica data older than that save.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.pin_after_write(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.pin_after_write(request, response)
+        return response
+
+    def pin_after_write(self, request, response):
+        if replica_configured() and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                getattr(settings, 'REPLICA_STICKY_COOKIE', 'db_primary'),
+                '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 15),
+                httponly=True,
+                samesite='Lax',
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
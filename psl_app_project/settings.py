@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Choices, config
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,21 +35,35 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'dashboard',
     'sales_tracker',
     'monthly_awards',
     'invoiced_jobs',
+    'api',
+    'monitoring',
+    'taskqueue',
+    'reconciliation',
+    'search',
+    'periods',
+    'attachments',
+    'margins',
+    'forecast',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'monitoring.middleware.AccessLogMiddleware',
+    'monitoring.middleware.SlowQueryMiddleware',
+    'psl_app_project.replica.PrimaryStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'psl_app_project.urls'
@@ -83,9 +97,74 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT', default='5432'),
+        # Keep connections open between requests: the async views run their
+        # queries on pool threads, each with its own connection, and would
+        # otherwise connect afresh for every piece of every page
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Optional read replica - list/report views read from it (see psl_app_project/replica.py)
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST'),
+        'PORT': config('DB_REPLICA_PORT', default='5432'),
+        # Fail fast so an unreachable replica falls back to the primary quickly
+        'OPTIONS': {'connect_timeout': 3},
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['psl_app_project.replica.ReplicaRouter']
+
+# Stop reading from the replica when it is further behind the primary than this
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=10, cast=int)
+REPLICA_HEALTH_CHECK_SECONDS = 5
+# After a write, that user's reads stay on the primary for this long
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+REPLICA_STICKY_COOKIE = 'db_primary'
+
+# Sessions - SESSION_MODE picks where they are kept:
+#   cached_db       (default) read from the session cache, written through to django_session
+#   signed_cookies  in the browser, signed with SECRET_KEY - no server-side reads or writes,
+#                   but a copied cookie stays valid until it expires, even after logout
+#   db              django_session only, a SELECT on every request
+# The session cache is a file cache on local disk, shared by every worker on the host: a
+# per-process locmem cache would let other workers keep serving a session after logout.
+SESSION_MODE = config('SESSION_MODE', default='cached_db',
+                      cast=Choices(['cached_db', 'signed_cookies', 'db']))
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_MODE}'
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_COOKIE_AGE = config('SESSION_COOKIE_AGE', default=14 * 24 * 60 * 60, cast=int)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('SESSION_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'sessions')),
+        'TIMEOUT': SESSION_COOKIE_AGE,
+        'OPTIONS': {'MAX_ENTRIES': config('SESSION_CACHE_MAX_ENTRIES', default=10000, cast=int)},
+    },
+    # Computed reports (the cash-flow forecast) - on disk too, so one worker's invalidation reaches all
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('REPORT_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'reports')),
+    },
+}
+# Longest a cached forecast is served - a backstop for writes that skip cash_flow.invalidate()
+FORECAST_CACHE_SECONDS = config('FORECAST_CACHE_SECONDS', default=3600, cast=int)
+
+# Flash messages ride in a cookie instead of adding a session write to every add/edit/delete
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -117,6 +196,11 @@ USE_I18N = True
 
 USE_TZ = True
 
+# First month of the fiscal (reporting) year - see psl_app_project/fiscal.py.
+# The fiscal_year/fiscal_period columns are generated from it, so a change
+# needs makemigrations and migrate.
+FISCAL_YEAR_START_MONTH = 4
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -125,16 +209,96 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Django 5.1+ only reads STORAGES. collectstatic writes content-hashed copies
+# (css/base.3f2a9c1b0e4d.css) plus .gz files, and {% static %} links to them,
+# so nginx/WhiteNoise can cache them forever.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Award/invoice PDF attachments - kept outside MEDIA_ROOT, which nginx serves
+# to anyone. Downloads are checked by Django and, with ATTACHMENTS_ACCEL_REDIRECT,
+# sent by nginx from its internal ATTACHMENTS_ACCEL_PREFIX location.
+ATTACHMENTS_ROOT = config('ATTACHMENTS_ROOT', default=str(BASE_DIR / 'attachments_store'))
+ATTACHMENTS_MAX_BYTES = config('ATTACHMENTS_MAX_BYTES', default=100 * 1024 * 1024, cast=int)
+ATTACHMENTS_ACCEL_REDIRECT = config('ATTACHMENTS_ACCEL_REDIRECT', default=not DEBUG, cast=bool)
+ATTACHMENTS_ACCEL_PREFIX = '/protected-attachments/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Slow query log - queries at or above the threshold are recorded (0 disables)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=250, cast=int)
+SLOW_QUERY_LOG_MAX_ROWS = config('SLOW_QUERY_LOG_MAX_ROWS', default=5000, cast=int)
+# Also capture EXPLAIN (ANALYZE, BUFFERS) for slow SELECTs, on a background thread
+SLOW_QUERY_EXPLAIN = config('SLOW_QUERY_EXPLAIN', default=False, cast=bool)
+
+# Staff can profile a request with ?_profile=1 (or an X-Profile: 1 header);
+# off removes the middleware entirely
+REQUEST_PROFILER_ENABLED = config('REQUEST_PROFILER_ENABLED', default=True, cast=bool)
+REQUEST_PROFILE_MAX_ROWS = config('REQUEST_PROFILE_MAX_ROWS', default=100, cast=int)
+
+# Background tasks (manage.py run_worker)
+TASK_POLL_INTERVAL_SECONDS = config('TASK_POLL_INTERVAL_SECONDS', default=2, cast=float)
+# Running tasks refresh heartbeat_at this often; ones silent for TASK_STALE_AFTER_SECONDS are requeued
+TASK_HEARTBEAT_SECONDS = 30
+TASK_STALE_AFTER_SECONDS = 300
+TASK_RETENTION_DAYS = config('TASK_RETENTION_DAYS', default=14, cast=int)
+# Cron entries: key -> task name, five-field cron expression (TIME_ZONE), optional kwargs
+TASK_SCHEDULE = {
+    'purge-finished-tasks': {
+        'task': 'taskqueue.tasks.purge_finished_tasks',
+        'cron': '30 3 * * *',
+    },
+    'clear-expired-sessions': {
+        'task': 'taskqueue.tasks.clear_expired_sessions',
+        'cron': '40 3 * * *',
+    },
+    'follow-up-digest': {
+        'task': 'sales_tracker.tasks.send_follow_up_digest',
+        'cron': '0 7 * * 1-5',
+    },
+    'purge-unused-documents': {
+        'task': 'attachments.tasks.purge_unused_documents',
+        'cron': '45 3 * * *',
+    },
+    'rebuild-margin-rollup': {
+        'task': 'margins.tasks.rebuild_margin_rollup',
+        'cron': '15 4 * * *',
+    },
+}
+
+# Email - printed to the console unless a backend is configured (file backend:
+# EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend writes to EMAIL_FILE_PATH)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'logs' / 'emails'))
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='psl-workflow@localhost')
+# Scheme and host for links in emails
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
+
+# Follow-up queue: pending enquiries are grouped by age (days since the
+# enquiry date) at these boundaries - "7,14,30" gives 0-6, 7-13, 14-29, 30+
+FOLLOW_UP_AGE_BUCKETS = [int(days) for days in config('FOLLOW_UP_AGE_BUCKETS', default='7,14,30,60').split(',')]
+# The daily digest goes to these addresses (comma separated), or to every active staff user with an email
+FOLLOW_UP_DIGEST_RECIPIENTS = [email for email in config('FOLLOW_UP_DIGEST_RECIPIENTS', default='').split(',') if email]
+# Largest pending enquiries listed per age bucket in the digest
+FOLLOW_UP_DIGEST_ROWS_PER_BUCKET = config('FOLLOW_UP_DIGEST_ROWS_PER_BUCKET', default=10, cast=int)
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
@@ -159,14 +323,39 @@ if not DEBUG:
     X_FRAME_OPTIONS = 'DENY'
 
 # Logging
+# Handlers run on a listener thread behind a queue (see logging_queue.py), so
+# writing a log line never blocks a request. Files rotate by size; every
+# gunicorn worker writes to the same files.
+LOGGING_CONFIG = 'psl_app_project.logging_queue.configure'
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_BACKUP_COUNT = config('LOG_BACKUP_COUNT', default=5, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'text': {
+            'format': '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s',
+        },
+        'json': {
+            '()': 'psl_app_project.logging_queue.JsonFormatter',
+        },
+    },
     'handlers': {
         'file': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
+            'class': 'psl_app_project.logging_queue.SharedRotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
+            'maxBytes': LOG_MAX_BYTES,
+            'backupCount': LOG_BACKUP_COUNT,
+            'formatter': 'text',
+        },
+        'access_file': {
+            'class': 'psl_app_project.logging_queue.SharedRotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'access.log',
+            'maxBytes': LOG_MAX_BYTES,
+            'backupCount': LOG_BACKUP_COUNT,
+            'formatter': 'json',
         },
         'console': {
             'class': 'logging.StreamHandler',
@@ -176,6 +365,14 @@ LOGGING = {
         'handlers': ['console', 'file'],
         'level': 'INFO',
     },
+    'loggers': {
+        # One JSON line per request, written by monitoring.middleware.AccessLogMiddleware
+        'psl.access': {
+            'handlers': ['access_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 # Create logs directory if it doesn't exist
@@ -26,4 +26,13 @@ urlpatterns = [
     path('sales-tracker', include('sales_tracker.urls')),
     path('monthly-awards', include('monthly_awards.urls')),
     path('invoiced-jobs', include('invoiced_jobs.urls')),
+    path('api/v1/', include('api.urls')),
+    path('monitoring/', include('monitoring.urls')),
+    path('tasks/', include('taskqueue.urls')),
+    path('reconciliation/', include('reconciliation.urls')),
+    path('search/', include('search.urls')),
+    path('periods/', include('periods.urls')),
+    path('attachments/', include('attachments.urls')),
+    path('margins/', include('margins.urls')),
+    path('forecast/', include('forecast.urls')),
 ]
\ No newline at end of file
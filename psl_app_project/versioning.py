@@ -0,0 +1,114 @@
+"""
+Optimistic concurrency for the edit forms.
+
+Sales enquiries, monthly awards and invoiced jobs carry a version column. A
+save() of an existing row only writes if the row is still at the version the
+instance was read with:
+
+    UPDATE ... SET ..., version = n + 1 WHERE id = ... AND version = n
+
+and raises EditConflict when it matched nothing - someone else saved (or
+deleted) the row in between. Nothing is locked while a form is open; the edit
+forms (VersionedFormMixin) carry the version they were rendered with in a
+hidden field, so a form opened before another user's save is refused rather
+than overwriting it, and rebase() turns it into the conflict screen.
+
+Writes that skip save() - update(), bulk_update(), raw SQL - must bump the
+version themselves (version=F('version') + 1) so open forms notice them.
+"""
+from django import forms
+from django.db import models
+
+# For the inline editors, which post a single field and have no conflict screen
+CONFLICT_MESSAGE = 'Someone else changed this row while it was being saved - reload the page and try again.'
+
+
+class EditConflict(Exception):
+    """The row was changed or deleted since the instance being saved was read"""
+
+    def __init__(self, instance):
+        super().__init__(f'{instance._meta.verbose_name} {instance.pk} was changed by someone else')
+        self.instance = instance
+
+
+class VersionedModel(models.Model):
+    """Adds the version column and the version-checked UPDATE to a model's save()"""
+
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if self._state.adding:
+            # Creating with an explicit primary key (fixtures) - nothing to compare with
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+        expected = self.version
+        version_field = self._meta.get_field('version')
+        values = [entry for entry in values if entry[0] is not version_field]
+        values.append((version_field, None, expected + 1))
+        if not super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields,
+                                  forced_update):
+            # Rather than letting save() fall back to an INSERT, which would
+            # bring a deleted row back
+            raise EditConflict(self)
+        self.version = expected + 1
+        return True
+
+
+class VersionedFormMixin:
+    """A ModelForm for a VersionedModel, carrying the instance's version in a hidden `version` field
+
+    A post without one (a page opened before versions existed) saves
+    against the version just read, as edits always used to.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['version'] = forms.IntegerField(widget=forms.HiddenInput, min_value=1, required=False)
+        if not self.is_bound:
+            self.initial['version'] = self.instance.version
+
+    def _post_clean(self):
+        super()._post_clean()
+        # construct_instance() leaves out fields the model marks editable=False
+        if self.cleaned_data.get('version'):
+            self.instance.version = self.cleaned_data['version']
+
+
+def rebase(form):
+    """After form.save() raised EditConflict: (the form again, the fields that differ), or None if the row is gone
+
+    The returned form is bound to what the user submitted but carries the
+    current version, so saving it again keeps their values - after they have
+    seen, in the differences, what the other save changed. Each difference
+    is a dict of the field's label, the saved value and the submitted one.
+    """
+    model = type(form.instance)
+    current = model.objects.filter(pk=form.instance.pk).first()
+    if current is None:
+        return None
+
+    differences = []
+    for name in form._meta.fields:
+        field, model_field = form.fields[name], model._meta.get_field(name)
+        if model_field.value_from_object(current) == model_field.value_from_object(form.instance):
+            continue
+        differences.append({
+            'label': field.label or model_field.verbose_name.capitalize(),
+            'saved': _display(current, model_field),
+            'submitted': _display(form.instance, model_field),
+        })
+
+    data = form.data.copy()
+    data['version'] = current.version
+    return type(form)(data, instance=current), differences
+
+
+def _display(instance, model_field):
+    """A field's value as the conflict screen shows it - None for an empty one"""
+    if model_field.choices:
+        return getattr(instance, f'get_{model_field.name}_display')()
+    value = getattr(instance, model_field.name)
+    return None if value == '' else value
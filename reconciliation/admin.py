@@ -0,0 +1,51 @@
+from django.contrib import admin
+from .models import BankImport, BankLine
+
+
+@admin.register(BankImport)
+class BankImportAdmin(admin.ModelAdmin):
+    list_display = [
+        'filename',
+        'uploaded_by',
+        'uploaded_at',
+        'matched_at',
+        'date_window_days'
+    ]
+
+    readonly_fields = [
+        'skipped_rows',
+        'errors',
+        'uploaded_at',
+        'matched_at'
+    ]
+
+    list_per_page = 25
+
+
+@admin.register(BankLine)
+class BankLineAdmin(admin.ModelAdmin):
+    list_display = [
+        'date',
+        'amount',
+        'job_number',
+        'status',
+        'matched_job',
+        'bank_import'
+    ]
+
+    list_filter = [
+        'status',
+        'bank_import'
+    ]
+
+    search_fields = [
+        'job_number',
+        'description'
+    ]
+
+    raw_id_fields = [
+        'matched_job',
+        'suggested_job'
+    ]
+
+    list_per_page = 25
@@ -0,0 +1,37 @@
+from django import forms
+from .importer import parse_statement, StatementError
+
+
+class BankImportForm(forms.Form):
+    """Upload a statement CSV; the parsed lines end up in `parsed`"""
+
+    statement = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-input',
+            'accept': '.csv,text/csv'
+        }),
+        label='Statement CSV'
+    )
+
+    date_window_days = forms.IntegerField(
+        initial=60,
+        min_value=0,
+        max_value=365,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-input'
+        }),
+        label='Payment window (days after invoice date)'
+    )
+
+    def clean_statement(self):
+        statement = self.cleaned_data['statement']
+        try:
+            lines, skipped, errors = parse_statement(statement)
+        except StatementError as exc:
+            raise forms.ValidationError(str(exc))
+        if not lines:
+            raise forms.ValidationError(
+                'No payments found in the file.' + (f" {errors[0]}" if errors else '')
+            )
+        self.parsed = {'lines': lines, 'skipped': skipped, 'errors': errors}
+        return statement
@@ -0,0 +1,144 @@
+"""
+Reading bank/accounting statement CSVs into BankLine rows.
+
+Column names are matched loosely (case and spacing ignored) so exports from
+the bank and the accounts package both load without editing:
+
+    date         Date, Transaction Date, Posting Date, Value Date
+    amount       Amount, Paid In, Credit, Money In, Value
+    description  Description, Reference, Details, Memo, Narrative, Payee
+                 (every one present is kept, joined together)
+    job number   Job, Job No, Job Number, Job Ref  (optional - otherwise
+                 the first job-number-like token in the description is used)
+
+Only money received (amounts above zero) is kept.
+"""
+import csv
+import io
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from .models import BankLine
+
+COLUMN_ALIASES = {
+    'date': ['date', 'transactiondate', 'postingdate', 'valuedate'],
+    'amount': ['amount', 'paidin', 'credit', 'moneyin', 'value'],
+    'description': ['description', 'reference', 'details', 'memo', 'narrative', 'payee'],
+    'job_number': ['job', 'jobno', 'jobnumber', 'jobref'],
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%d.%m.%Y', '%d %b %Y', '%d %B %Y']
+
+# What BankLine.amount can hold
+AMOUNT_FIELD = BankLine._meta.get_field('amount')
+MAX_AMOUNT = Decimal(10) ** (AMOUNT_FIELD.max_digits - AMOUNT_FIELD.decimal_places)
+AMOUNT_STEP = Decimal(1).scaleb(-AMOUNT_FIELD.decimal_places)
+
+# Job numbers look like 9999 or 9999.10
+JOB_NUMBER_PATTERN = re.compile(r'\b(\d{3,6}(?:\.\d{1,3})?)\b')
+
+
+class StatementError(ValueError):
+    """The file cannot be read as a statement at all"""
+
+
+def _normalise(header):
+    return re.sub(r'[^a-z]', '', header.lower())
+
+
+def _find_columns(headers):
+    normalised = {_normalise(header): header for header in headers if header}
+    columns = {
+        'description': [normalised[alias] for alias in COLUMN_ALIASES['description'] if alias in normalised]
+    }
+    for field, aliases in COLUMN_ALIASES.items():
+        if field == 'description':
+            continue
+        for alias in aliases:
+            if alias in normalised:
+                columns[field] = normalised[alias]
+                break
+    missing = [field for field in ('date', 'amount') if field not in columns]
+    if missing:
+        raise StatementError(
+            f"No {' or '.join(missing)} column found. Columns in the file: {', '.join(h for h in headers if h)}"
+        )
+    return columns
+
+
+def parse_date(text):
+    text = text.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date '{text}'")
+
+
+def parse_amount(text):
+    text = text.strip().replace('£', '').replace(',', '').replace(' ', '')
+    negative = text.startswith('(') and text.endswith(')')
+    try:
+        amount = Decimal(text.strip('()') or '0')
+    except InvalidOperation:
+        raise ValueError(f"unrecognised amount '{text}'") from None
+    # NaN and Infinity parse, but compare or save badly
+    if not amount.is_finite():
+        raise ValueError(f"unrecognised amount '{text}'")
+    if abs(amount) >= MAX_AMOUNT:
+        raise ValueError(f"amount '{text}' is too large")
+    if amount != amount.quantize(AMOUNT_STEP):
+        raise ValueError(f"amount '{text}' has more than {AMOUNT_FIELD.decimal_places} decimal places")
+    return -amount if negative else amount
+
+
+def extract_job_number(text):
+    match = JOB_NUMBER_PATTERN.search(text or '')
+    return match.group(1) if match else ''
+
+
+def parse_statement(uploaded_file):
+    """
+    Return (lines, skipped, errors) for an uploaded CSV.
+
+    lines are dicts ready for BankLine(**line); skipped counts rows that
+    were not payments; errors lists "Row N: problem" strings.
+    """
+    try:
+        text = uploaded_file.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise StatementError('The file is not UTF-8 text - export it from your bank as CSV.') from None
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise StatementError('The file is empty.')
+    columns = _find_columns(reader.fieldnames)
+
+    lines, skipped, errors = [], 0, []
+    # Row 1 is the header
+    for row_number, row in enumerate(reader, start=2):
+        try:
+            date = parse_date(row.get(columns['date']) or '')
+            amount = parse_amount(row.get(columns['amount']) or '')
+        except ValueError as exc:
+            errors.append(f"Row {row_number}: {exc}")
+            continue
+        if amount <= 0:
+            skipped += 1
+            continue
+
+        description = ' '.join(
+            (row.get(column) or '').strip() for column in columns['description'] if row.get(column)
+        )
+        job_number = (row.get(columns['job_number']) or '').strip() if 'job_number' in columns else ''
+        lines.append({
+            'line_number': row_number,
+            'date': date,
+            'amount': amount,
+            'description': description,
+            'job_number': (job_number or extract_job_number(description))[:20],
+        })
+
+    return lines, skipped, errors
@@ -0,0 +1,147 @@
+"""
+Set-based matching of a statement's lines against Invoiced jobs.
+
+Rather than looking invoices up line by line, the open lines and the
+candidate invoices are copied into temporary tables (dropped at commit) and
+ANALYZEd, and each rule is a single join between them on an equality - job
+number, or amount - that Postgres runs as a hash join. A year of statement
+lines is a handful of statements whatever its length.
+
+Rules, applied in order to lines that are still open:
+
+1. matched          job number and amount equal, payment dated 0..window days
+                    after the invoice, and neither side has another candidate
+2. ambiguous        as 1 but more than one line/invoice qualifies
+3. amount_mismatch  job number and date fit, amount differs (closest suggested)
+4. suggested        no job number match, but exactly one invoice has the same
+                    amount within the window
+5. unmatched        anything else
+
+Invoices already matched by any import are not offered again. Lines that a
+person has accepted or ignored are left alone when an import is re-matched.
+"""
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from invoiced_jobs.models import InvoicedJob
+from monthly_awards.models import MonthlyAward
+from .models import BankLine
+
+
+def match_import(bank_import):
+    """Run the matching rules over one import; returns {status: line count}"""
+    lines_table = BankLine._meta.db_table
+    window = bank_import.date_window_days
+    params = {
+        'import_id': bank_import.pk,
+        'window': window,
+        'automatic': tuple(BankLine.AUTOMATIC_STATUSES),
+    }
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # ON COMMIT DROP only drops them at the outermost commit - an earlier
+        # match_import() in the same transaction (a task matching several
+        # imports) leaves its tables behind
+        cursor.execute("DROP TABLE IF EXISTS pg_temp.recon_lines, pg_temp.recon_invoices, pg_temp.recon_exact")
+        cursor.execute(f"""
+            UPDATE {lines_table}
+            SET status = 'unmatched', matched_job_id = NULL, suggested_job_id = NULL
+            WHERE bank_import_id = %(import_id)s AND status IN %(automatic)s
+        """, params)
+
+        cursor.execute(f"""
+            CREATE TEMPORARY TABLE recon_lines ON COMMIT DROP AS
+            SELECT id, upper(btrim(job_number)) AS job_number, date, amount
+            FROM {lines_table}
+            WHERE bank_import_id = %(import_id)s AND status = 'unmatched'
+        """, params)
+
+        # Invoices that a payment in this statement could be for
+        cursor.execute(f"""
+            CREATE TEMPORARY TABLE recon_invoices ON COMMIT DROP AS
+            SELECT ij.id, upper(btrim(a.job_number)) AS job_number, ij.date,
+                   (ij.utility_value + ij.cad_value + ij.topo_value + ij.contractor_value)::numeric(12, 2) AS total
+            FROM {InvoicedJob._meta.db_table} ij
+            JOIN {MonthlyAward._meta.db_table} a ON a.id = ij.award_id
+            WHERE ij.status = 'Invoiced'
+              AND ij.date >= (SELECT min(date) FROM recon_lines) - %(window)s
+              AND ij.date <= (SELECT max(date) FROM recon_lines)
+              AND NOT EXISTS (
+                  SELECT 1 FROM {lines_table} m
+                  WHERE m.matched_job_id = ij.id AND m.status = 'matched'
+              )
+        """, params)
+        cursor.execute("ANALYZE recon_lines")
+        cursor.execute("ANALYZE recon_invoices")
+
+        # 1 + 2: exact job number + amount within the window
+        cursor.execute("""
+            CREATE TEMPORARY TABLE recon_exact ON COMMIT DROP AS
+            SELECT l.id AS line_id, i.id AS invoice_id
+            FROM recon_lines l
+            JOIN recon_invoices i ON i.job_number = l.job_number AND i.total = l.amount
+            WHERE l.job_number <> ''
+              AND l.date BETWEEN i.date AND i.date + %(window)s
+        """, params)
+        cursor.execute(f"""
+            WITH per_line AS (
+                SELECT line_id, min(invoice_id) AS invoice_id, count(*) AS candidates
+                FROM recon_exact GROUP BY line_id
+            ), per_invoice AS (
+                SELECT invoice_id, count(*) AS claims
+                FROM recon_exact GROUP BY invoice_id
+            )
+            UPDATE {lines_table} b
+            SET status = CASE WHEN pl.candidates = 1 AND pi.claims = 1 THEN 'matched' ELSE 'ambiguous' END,
+                matched_job_id = CASE WHEN pl.candidates = 1 AND pi.claims = 1 THEN pl.invoice_id END,
+                suggested_job_id = CASE WHEN pl.candidates = 1 AND pi.claims = 1 THEN NULL ELSE pl.invoice_id END
+            FROM per_line pl
+            JOIN per_invoice pi ON pi.invoice_id = pl.invoice_id
+            WHERE b.id = pl.line_id
+        """)
+
+        # Invoices just matched are no longer on offer
+        cursor.execute(f"""
+            DELETE FROM recon_invoices
+            WHERE id IN (
+                SELECT matched_job_id FROM {lines_table}
+                WHERE bank_import_id = %(import_id)s AND status = 'matched'
+            )
+        """, params)
+
+        # 3: right job and date, wrong amount - suggest the closest amount
+        cursor.execute(f"""
+            UPDATE {lines_table} b
+            SET status = 'amount_mismatch', suggested_job_id = x.invoice_id
+            FROM (
+                SELECT DISTINCT ON (l.id) l.id AS line_id, i.id AS invoice_id
+                FROM recon_lines l
+                JOIN recon_invoices i ON i.job_number = l.job_number
+                WHERE l.job_number <> ''
+                  AND l.date BETWEEN i.date AND i.date + %(window)s
+                ORDER BY l.id, abs(i.total - l.amount), i.date DESC
+            ) x
+            WHERE b.id = x.line_id AND b.status = 'unmatched'
+        """, params)
+
+        # 4: no usable job number, but a single invoice with this amount
+        cursor.execute(f"""
+            UPDATE {lines_table} b
+            SET status = 'suggested', suggested_job_id = x.invoice_id
+            FROM (
+                SELECT l.id AS line_id, min(i.id) AS invoice_id
+                FROM recon_lines l
+                JOIN recon_invoices i ON i.total = l.amount
+                WHERE l.date BETWEEN i.date AND i.date + %(window)s
+                GROUP BY l.id
+                HAVING count(*) = 1
+            ) x
+            WHERE b.id = x.line_id AND b.status = 'unmatched'
+        """, params)
+
+        bank_import.matched_at = timezone.now()
+        bank_import.save(update_fields=['matched_at'])
+
+    counts = bank_import.lines.values('status').annotate(n=Count('id'))
+    return {row['status']: row['n'] for row in counts}
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('invoiced_jobs', '0008_invoicedjob_invjob_updated_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('date_window_days', models.PositiveSmallIntegerField(default=60, help_text='A payment matches invoices dated up to this many days before it')),
+                ('skipped_rows', models.PositiveIntegerField(default=0)),
+                ('errors', models.TextField(blank=True)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('matched_at', models.DateTimeField(blank=True, null=True)),
+                ('uploaded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Bank Import',
+                'verbose_name_plural': 'Bank Imports',
+                'ordering': ['-uploaded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.PositiveIntegerField(help_text='Row in the CSV file')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.TextField(blank=True)),
+                ('job_number', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(choices=[('matched', 'Matched'), ('suggested', 'Suggested (amount and date only)'), ('amount_mismatch', 'Job found, amount differs'), ('ambiguous', 'Several possible invoices'), ('unmatched', 'Unmatched'), ('ignored', 'Ignored')], default='unmatched', max_length=20)),
+                ('bank_import', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='reconciliation.bankimport')),
+                ('matched_job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_lines', to='invoiced_jobs.invoicedjob')),
+                ('suggested_job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='invoiced_jobs.invoicedjob')),
+            ],
+            options={
+                'ordering': ['line_number'],
+                'indexes': [models.Index(fields=['bank_import', 'status'], name='bankline_import_status_idx'), models.Index(condition=models.Q(('status', 'matched')), fields=['matched_job'], name='bankline_matched_job_idx')],
+            },
+        ),
+    ]
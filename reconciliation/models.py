@@ -0,0 +1,79 @@
+from django.db import models
+from django.contrib.auth.models import User
+from invoiced_jobs.models import InvoicedJob
+
+
+class BankImport(models.Model):
+    """One uploaded bank/accounting statement CSV"""
+
+    filename = models.CharField(max_length=255)
+    date_window_days = models.PositiveSmallIntegerField(
+        default=60,
+        help_text="A payment matches invoices dated up to this many days before it"
+    )
+
+    # Rows that were not payments (zero/negative) or could not be read
+    skipped_rows = models.PositiveIntegerField(default=0)
+    errors = models.TextField(blank=True)
+
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='bank_imports')
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+    matched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-uploaded_at']
+        verbose_name = 'Bank Import'
+        verbose_name_plural = 'Bank Imports'
+
+    def __str__(self):
+        return f"{self.filename} ({self.uploaded_at:%d %b %Y})"
+
+
+class BankLine(models.Model):
+    """A payment line from a statement and the outcome of matching it"""
+
+    MATCHED = 'matched'
+    SUGGESTED = 'suggested'
+    AMOUNT_MISMATCH = 'amount_mismatch'
+    AMBIGUOUS = 'ambiguous'
+    UNMATCHED = 'unmatched'
+    IGNORED = 'ignored'
+
+    STATUS_CHOICES = [
+        (MATCHED, 'Matched'),
+        (SUGGESTED, 'Suggested (amount and date only)'),
+        (AMOUNT_MISMATCH, 'Job found, amount differs'),
+        (AMBIGUOUS, 'Several possible invoices'),
+        (UNMATCHED, 'Unmatched'),
+        (IGNORED, 'Ignored'),
+    ]
+
+    # Statuses the matcher is free to recompute; the rest are decisions
+    AUTOMATIC_STATUSES = [SUGGESTED, AMOUNT_MISMATCH, AMBIGUOUS, UNMATCHED]
+
+    bank_import = models.ForeignKey(BankImport, on_delete=models.CASCADE, related_name='lines')
+    line_number = models.PositiveIntegerField(help_text="Row in the CSV file")
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    description = models.TextField(blank=True)
+    # Taken from a job number column, or found in the description
+    job_number = models.CharField(max_length=20, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=UNMATCHED)
+    matched_job = models.ForeignKey(
+        InvoicedJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='bank_lines'
+    )
+    # Closest invoice for the exceptions, for a person to confirm
+    suggested_job = models.ForeignKey(
+        InvoicedJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+
+    class Meta:
+        ordering = ['line_number']
+        indexes = [
+            models.Index(fields=['bank_import', 'status'], name='bankline_import_status_idx'),
+            models.Index(fields=['matched_job'], name='bankline_matched_job_idx', condition=models.Q(status='matched')),
+        ]
+
+    def __str__(self):
+        return f"{self.date} £{self.amount} {self.description[:40]}"
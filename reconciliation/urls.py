@@ -0,0 +1,16 @@
+from django.urls import path
+from .views import (
+    reconciliation_list,
+    reconciliation_detail,
+    rematch_import,
+    accept_line,
+    ignore_line
+)
+
+urlpatterns = [
+    path('', reconciliation_list, name='reconciliation_list'),
+    path('<int:pk>/', reconciliation_detail, name='reconciliation_detail'),
+    path('<int:pk>/rematch/', rematch_import, name='rematch_import'),
+    path('lines/<int:pk>/accept/', accept_line, name='accept_bank_line'),
+    path('lines/<int:pk>/ignore/', ignore_line, name='ignore_bank_line'),
+]
@@ -0,0 +1,164 @@
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, Min, Max, Q
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from datetime import timedelta
+from invoiced_jobs.models import InvoicedJob
+from .forms import BankImportForm
+from .matching import match_import
+from .models import BankImport, BankLine
+
+LINES_PER_PAGE = 100
+UNPAID_SHOWN = 100
+BULK_BATCH_SIZE = 1000
+
+# Statuses a person needs to look at
+EXCEPTION_STATUSES = [
+    BankLine.AMBIGUOUS,
+    BankLine.AMOUNT_MISMATCH,
+    BankLine.SUGGESTED,
+    BankLine.UNMATCHED,
+]
+
+
+def _summary(counts):
+    return ', '.join(f"{n} {label.lower()}" for status, label in BankLine.STATUS_CHOICES
+                     if (n := counts.get(status)))
+
+
+@login_required
+def reconciliation_list(request):
+    """Past statement imports, and the upload form for a new one"""
+    if request.method == 'POST':
+        form = BankImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            parsed = form.parsed
+            with transaction.atomic():
+                bank_import = BankImport.objects.create(
+                    filename=form.cleaned_data['statement'].name[:255],
+                    date_window_days=form.cleaned_data['date_window_days'],
+                    skipped_rows=parsed['skipped'],
+                    errors='\n'.join(parsed['errors']),
+                    uploaded_by=request.user,
+                )
+                BankLine.objects.bulk_create(
+                    [BankLine(bank_import=bank_import, **line) for line in parsed['lines']],
+                    batch_size=BULK_BATCH_SIZE
+                )
+                counts = match_import(bank_import)
+
+            messages.success(request, f"Imported {len(parsed['lines'])} payments: {_summary(counts)}.")
+            if parsed['errors']:
+                messages.error(request, f"{len(parsed['errors'])} rows could not be read and were left out.")
+            return redirect('reconciliation_detail', pk=bank_import.pk)
+    else:
+        form = BankImportForm()
+
+    imports = BankImport.objects.select_related('uploaded_by').annotate(
+        line_count=Count('lines'),
+        matched_count=Count('lines', filter=Q(lines__status=BankLine.MATCHED)),
+        exception_count=Count('lines', filter=Q(lines__status__in=EXCEPTION_STATUSES)),
+    )
+
+    context = {
+        'form': form,
+        'imports': imports,
+    }
+    return render(request, 'reconciliation_list.html', context)
+
+
+@login_required
+def reconciliation_detail(request, pk):
+    """Lines of one import by outcome (exceptions first), plus invoices left unpaid"""
+    bank_import = get_object_or_404(BankImport, pk=pk)
+
+    stats = bank_import.lines.aggregate(
+        first_date=Min('date'),
+        last_date=Max('date'),
+        **{status: Count('id', filter=Q(status=status)) for status, _ in BankLine.STATUS_CHOICES}
+    )
+
+    status = request.GET.get('status', 'exceptions')
+    lines = bank_import.lines.select_related('matched_job__award', 'suggested_job__award')
+    if status == 'exceptions':
+        lines = lines.filter(status__in=EXCEPTION_STATUSES)
+    elif status in dict(BankLine.STATUS_CHOICES):
+        lines = lines.filter(status=status)
+
+    paginator = Paginator(lines, LINES_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+
+    # Invoiced jobs in the statement's period that no statement has paid
+    unpaid = InvoicedJob.objects.none()
+    if stats['first_date']:
+        unpaid = (
+            InvoicedJob.objects
+            .filter(
+                status='Invoiced',
+                date__gte=stats['first_date'] - timedelta(days=bank_import.date_window_days),
+                date__lte=stats['last_date'],
+            )
+            .exclude(bank_lines__status=BankLine.MATCHED)
+            .select_related('award')
+            .order_by('date')[:UNPAID_SHOWN]
+        )
+
+    context = {
+        'bank_import': bank_import,
+        'stats': stats,
+        'status': status,
+        'status_choices': BankLine.STATUS_CHOICES,
+        'page': page,
+        'unpaid': unpaid,
+        'unpaid_limit': UNPAID_SHOWN,
+    }
+    return render(request, 'reconciliation_detail.html', context)
+
+
+def _back_to_import(request, bank_import_id):
+    url = reverse('reconciliation_detail', args=[bank_import_id])
+    status = request.POST.get('status')
+    if status == 'exceptions' or status in dict(BankLine.STATUS_CHOICES):
+        url += f"?status={status}"
+    return redirect(url)
+
+
+@login_required
+@require_POST
+def rematch_import(request, pk):
+    """Re-run matching, e.g. after invoices were added or corrected"""
+    bank_import = get_object_or_404(BankImport, pk=pk)
+    counts = match_import(bank_import)
+    messages.success(request, f"Matched again: {_summary(counts)}.")
+    return redirect('reconciliation_detail', pk=bank_import.pk)
+
+
+@login_required
+@require_POST
+def accept_line(request, pk):
+    """Confirm a line's suggested invoice as its match"""
+    line = get_object_or_404(BankLine, pk=pk)
+    if line.status not in EXCEPTION_STATUSES or line.suggested_job_id is None:
+        messages.error(request, 'This line has no suggested invoice to accept.')
+    elif BankLine.objects.filter(matched_job_id=line.suggested_job_id, status=BankLine.MATCHED).exists():
+        messages.error(request, 'That invoice is already matched to another payment.')
+    else:
+        BankLine.objects.filter(pk=line.pk).update(
+            status=BankLine.MATCHED, matched_job_id=line.suggested_job_id, suggested_job=None
+        )
+        messages.success(request, f"Row {line.line_number} matched.")
+    return _back_to_import(request, line.bank_import_id)
+
+
+@login_required
+@require_POST
+def ignore_line(request, pk):
+    """Mark a line as not an invoice payment so it stops showing as an exception"""
+    line = get_object_or_404(BankLine, pk=pk)
+    BankLine.objects.filter(pk=line.pk).update(status=BankLine.IGNORED, matched_job=None)
+    messages.success(request, f"Row {line.line_number} ignored.")
+    return _back_to_import(request, line.bank_import_id)
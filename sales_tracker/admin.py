@@ -1,9 +1,15 @@
 from django.contrib import admin
+from django.db.models import F
+from django.utils import timezone
+from search.admin import IndexedSearchAdminMixin
+from search.models import SearchEntry
 from .models import SalesEnquiry
 
 
 @admin.register(SalesEnquiry)
-class SalesEnquiryAdmin(admin.ModelAdmin):
+class SalesEnquiryAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
+    search_entity_type = SearchEntry.ENQUIRY
+
     list_display = [
         'job_number',
         'date',
@@ -68,15 +74,15 @@ class SalesEnquiryAdmin(admin.ModelAdmin):
 
     @admin.action(description='Mark selected enquiries as Awarded')
     def mark_as_awarded(self, request, queryset):
-        updated = queryset.update(status='Awarded')
+        updated = queryset.update(status='Awarded', updated_at=timezone.now(), version=F('version') + 1)
         self.message_user(request, f'{updated} enquiry(ies) marked as Awarded.')
 
     @admin.action(description='Mark selected enquiries as Rejected')
     def mark_as_rejected(self, request, queryset):
-        updated = queryset.update(status='Rejected')
+        updated = queryset.update(status='Rejected', updated_at=timezone.now(), version=F('version') + 1)
         self.message_user(request, f'{updated} enquiry(ies) marked as Rejected.')
 
     @admin.action(description='Mark selected enquiries as Pending')
     def mark_as_pending(self, request, queryset):
-        updated = queryset.update(status='Pending')
+        updated = queryset.update(status='Pending', updated_at=timezone.now(), version=F('version') + 1)
         self.message_user(request, f'{updated} enquiry(ies) marked as Pending.')
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+The follow-up queue: pending sales enquiries grouped by age.
+
+Age is days since the enquiry date, as of today in TIME_ZONE.
+settings.FOLLOW_UP_AGE_BUCKETS sets the bucket boundaries ([7, 14, 30] gives
+0-6, 7-13, 14-29 and 30+ days); the bucket of each row is worked out in SQL,
+so filtering, counting and sorting by bucket never loads the rows into Python. Every query here is on
+status = 'Pending' rows only and is served by the partial indexes on
+SalesEnquiry (age/date, value, client).
+
+digest() builds the whole daily digest - per-bucket counts and totals plus
+the largest enquiries in each bucket - in one query with window functions.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.contrib.auth.models import User
+from django.db.models import Case, Count, DateField, F, Func, IntegerField, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import SalesEnquiry
+
+
+class DaysSince(Func):
+    """<day> - <date column>: whole days, as an integer"""
+
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+    def __init__(self, day, expression, **extra):
+        super().__init__(Value(day, output_field=DateField()), expression, **extra)
+
+
+def buckets():
+    """[{'index', 'label', 'min_days', 'max_days' (None for the last)}] from FOLLOW_UP_AGE_BUCKETS"""
+    bounds = [0, *sorted(set(settings.FOLLOW_UP_AGE_BUCKETS))]
+    result = []
+    for index, min_days in enumerate(bounds):
+        max_days = bounds[index + 1] - 1 if index + 1 < len(bounds) else None
+        label = f'{min_days}-{max_days} days' if max_days is not None else f'{min_days}+ days'
+        result.append({'index': index, 'label': label, 'min_days': min_days, 'max_days': max_days})
+    return result
+
+
+def bucket_expression(today):
+    """The row's bucket index, computed by the database from its date"""
+    whens = [
+        When(date__lte=today - timedelta(days=bucket['min_days']), then=Value(bucket['index']))
+        for bucket in reversed(buckets()[1:])
+    ]
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def pending():
+    """Pending enquiries annotated with age_days and bucket (as of today in TIME_ZONE)"""
+    today = timezone.localdate()
+    return SalesEnquiry.objects.filter(status='Pending').annotate(
+        age_days=DaysSince(today, 'date'),
+        bucket=bucket_expression(today),
+    )
+
+
+def in_bucket(queryset, index):
+    """Narrow to one bucket with a date range, so the partial age index is used"""
+    bucket = buckets()[index]
+    today = timezone.localdate()
+    queryset = queryset.filter(date__lte=today - timedelta(days=bucket['min_days']))
+    if bucket['max_days'] is not None:
+        queryset = queryset.filter(date__gte=today - timedelta(days=bucket['max_days']))
+    return queryset
+
+
+def bucket_totals(queryset=None):
+    """Every bucket with its count and total value (zero for empty buckets), in one GROUP BY"""
+    queryset = pending() if queryset is None else queryset
+    rows = {
+        row['bucket']: row
+        for row in queryset.order_by().values('bucket').annotate(count=Count('id'), total_value=Sum('value'))
+    }
+    return [
+        {**bucket, 'count': rows.get(bucket['index'], {}).get('count', 0),
+         'total_value': rows.get(bucket['index'], {}).get('total_value') or 0}
+        for bucket in buckets()
+    ]
+
+
+def digest(rows_per_bucket=None):
+    """Per-bucket totals and each bucket's largest enquiries, from a single query
+
+    Returns the buckets (oldest first) with 'count', 'total_value' and
+    'enquiries'; totals come from window aggregates over every pending row,
+    so they are right even though only the top rows are returned.
+    """
+    rows_per_bucket = rows_per_bucket or settings.FOLLOW_UP_DIGEST_ROWS_PER_BUCKET
+    rows = (
+        pending()
+        .annotate(
+            bucket_count=Window(expression=Count('id'), partition_by=[F('bucket')]),
+            bucket_value=Window(expression=Sum('value'), partition_by=[F('bucket')]),
+            rank_in_bucket=Window(
+                expression=RowNumber(), partition_by=[F('bucket')], order_by=[F('value').desc(), F('id')]
+            ),
+        )
+        .filter(rank_in_bucket__lte=rows_per_bucket)
+        .order_by('-bucket', 'rank_in_bucket')
+        .only('id', 'job_number', 'date', 'value', 'client', 'client_contact', 'location')
+    )
+
+    result = {bucket['index']: {**bucket, 'count': 0, 'total_value': 0, 'enquiries': []} for bucket in buckets()}
+    for enquiry in rows:
+        entry = result[enquiry.bucket]
+        entry['count'], entry['total_value'] = enquiry.bucket_count, enquiry.bucket_value
+        entry['enquiries'].append(enquiry)
+    return [result[index] for index in sorted(result, reverse=True)]
+
+
+def digest_recipients():
+    if settings.FOLLOW_UP_DIGEST_RECIPIENTS:
+        return list(settings.FOLLOW_UP_DIGEST_RECIPIENTS)
+    return list(
+        User.objects.filter(is_active=True, is_staff=True).exclude(email='').values_list('email', flat=True)
+    )
+
+
+def send_digest():
+    """Email the follow-up digest; returns the number of pending enquiries it covered (0: nothing sent)"""
+    digest_buckets = digest()
+    total_count = sum(bucket['count'] for bucket in digest_buckets)
+    recipients = digest_recipients()
+    if not total_count or not recipients:
+        return 0
+
+    context = {
+        'buckets': digest_buckets,
+        'total_count': total_count,
+        'total_value': sum(bucket['total_value'] for bucket in digest_buckets),
+        'today': timezone.localdate(),
+        'queue_url': settings.SITE_URL.rstrip('/') + reverse('follow_up_queue'),
+    }
+    send_mail(
+        subject=f'Follow-up digest: {total_count} pending enquiries',
+        message=render_to_string('follow_up_digest.txt', context),
+        from_email=None,
+        recipient_list=recipients,
+    )
+    return total_count
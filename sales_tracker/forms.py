@@ -1,18 +1,46 @@
 from django import forms
+from psl_app_project.versioning import VersionedFormMixin
+from .job_numbers import job_exists, parse_job_number
 from .models import SalesEnquiry
 
 
+class InlineUpdateFormMixin:
+    """Lets a ModelForm accept partial posts from the inline row editors.
+
+    Fields missing from the submitted data keep the instance's current value,
+    so a row can post just the one field that changed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.is_bound:
+            data = self.data.copy()
+            for name in self.fields:
+                if name not in data and self.initial.get(name) is not None:
+                    data[name] = self.initial[name]
+            self.data = data
+
+
 class SalesEnquiryAddForm(forms.ModelForm):
-    """Form for adding new enquiries - excludes date, value, and status"""
+    """Form for adding new enquiries - excludes date, value, and status
+
+    The view allocates the job number: the next new job, or the next
+    revision of the job entered in revision_of.
+    """
+
+    revision_of = forms.CharField(
+        required=False,
+        label='Revision of Job',
+        widget=forms.TextInput(attrs={
+            'class': 'form-input',
+            'placeholder': 'Leave blank for a new job number'
+        }),
+    )
 
     class Meta:
         model = SalesEnquiry
-        fields = ['job_number', 'location', 'client', 'client_contact', 'email', 'phone', 'note']
+        fields = ['location', 'client', 'client_contact', 'email', 'phone', 'note']
         widgets = {
-            'job_number': forms.TextInput(attrs={
-                'class': 'form-input',
-                'placeholder': 'Enter job number'
-            }),
             'note': forms.Textarea(attrs={
                 'class': 'form-input',
                 'placeholder': 'Enter notes (optional)',
@@ -51,8 +79,21 @@ class SalesEnquiryAddForm(forms.ModelForm):
         self.fields['email'].required = False
         self.fields['phone'].required = False
 
+    def clean_revision_of(self):
+        """The major number of the job being revised ("12345" or "12345.2" both give 12345), or None"""
+        revision_of = self.cleaned_data['revision_of'].strip()
+        if not revision_of:
+            return None
+        parsed = parse_job_number(revision_of)
+        if parsed is None:
+            raise forms.ValidationError('Enter a job number such as 12345 or 12345.2.')
+        major = parsed[0]
+        if not job_exists(major):
+            raise forms.ValidationError(f'There is no job {major} on the sales tracker.')
+        return major
 
-class SalesEnquiryEditForm(forms.ModelForm):
+
+class SalesEnquiryEditForm(VersionedFormMixin, forms.ModelForm):
     """Form for editing enquiries - includes all fields"""
 
     class Meta:
@@ -113,4 +154,12 @@ class SalesEnquiryEditForm(forms.ModelForm):
         # Make email and phone not required
         self.fields['email'].required = False
         self.fields['phone'].required = False
-        self.fields['note'].required = False
\ No newline at end of file
+        self.fields['note'].required = False
+
+
+class SalesEnquiryInlineForm(InlineUpdateFormMixin, forms.ModelForm):
+    """Form for inline status/value updates from the sales tracker table"""
+
+    class Meta:
+        model = SalesEnquiry
+        fields = ['status', 'value']
@@ -0,0 +1,139 @@
+"""
+Job number allocation.
+
+New jobs take the next major number from a Postgres sequence
+(JOB_NUMBER_SEQUENCE); revisions of an existing job take the next ".minor"
+from that job's JobRevisionCounter row, bumped with a single upsert. Neither
+locks the enquiry table, and concurrent submissions never get the same
+number: nextval() is atomic, and the upsert row-locks just that job's
+counter until the transaction ends.
+
+The unique constraint on SalesEnquiry.job_number still has the final say -
+a number typed into the edit form can collide with one handed out here, so
+save_with_job_number() allocates again when that happens. Awards entered
+without an enquiry have job numbers the constraint does not cover, so both
+kinds of number are allocated past the ones on those awards too.
+"""
+import re
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+
+from monthly_awards.models import MonthlyAward
+
+from .models import JobRevisionCounter, SalesEnquiry
+
+JOB_NUMBER_SEQUENCE = 'sales_tracker_job_number_seq'
+
+# "12345" or "12345.3"
+JOB_NUMBER_PATTERN = re.compile(r'(\d+)(?:\.(\d+))?')
+
+# Allocation attempts before giving up on a run of hand-typed collisions
+MAX_ATTEMPTS = 5
+
+
+def parse_job_number(job_number):
+    """(major, minor) for "12345" / "12345.3" (minor 0 for the former), or None"""
+    match = JOB_NUMBER_PATTERN.fullmatch((job_number or '').strip())
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def _nextvals(count):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [JOB_NUMBER_SEQUENCE, count])
+        return [str(row[0]) for row in cursor.fetchall()]
+
+
+def next_majors(count):
+    """`count` unused major job numbers, as strings"""
+    numbers = _nextvals(count)
+    taken = set(
+        MonthlyAward.objects.filter(sale__isnull=True, job_number__in=numbers).values_list('job_number', flat=True)
+    )
+    if taken:
+        # Typed onto an award since the sequence was last synced - move past them all
+        sync_job_number_sequence()
+        numbers = [number for number in numbers if number not in taken] + _nextvals(len(taken))
+    return numbers
+
+
+def next_major():
+    """The next unused major job number, as a string"""
+    return next_majors(1)[0]
+
+
+def sync_job_number_sequence():
+    """Move the sequence past numbers saved without it (seeded, imported in bulk or typed onto awards)"""
+    enquiries = connection.ops.quote_name(SalesEnquiry._meta.db_table)
+    awards = connection.ops.quote_name(MonthlyAward._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT setval(%s, GREATEST(MAX(split_part(job_number, '.', 1)::bigint), nextval(%s)))
+            FROM (
+                SELECT job_number FROM {enquiries}
+                UNION ALL
+                SELECT job_number FROM {awards}
+            ) job_numbers
+            WHERE job_number ~ '^[0-9]{{1,18}}(\\.[0-9]+)?$'
+            """,
+            [JOB_NUMBER_SEQUENCE, JOB_NUMBER_SEQUENCE],
+        )
+
+
+def next_revision(major):
+    """The next ".minor" revision of job `major`, as a string like "12345.4"
+
+    Always past both the counter and the revisions already on the tracker
+    or on awards without an enquiry (typed by hand, before or since
+    allocation) - found through the job_number prefix indexes, so only this
+    job's rows are read. Call inside
+    the transaction that saves the enquiry, so the counter stays locked
+    until the number is in use.
+    """
+    table = connection.ops.quote_name(JobRevisionCounter._meta.db_table)
+    enquiries = connection.ops.quote_name(SalesEnquiry._meta.db_table)
+    awards = connection.ops.quote_name(MonthlyAward._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (major, last_minor)
+            SELECT %(major)s, COALESCE(MAX(split_part(job_number, '.', 2)::bigint), 0) + 1
+            FROM (
+                SELECT job_number FROM {enquiries} WHERE job_number LIKE %(revisions)s
+                UNION ALL
+                SELECT job_number FROM {awards} WHERE job_number LIKE %(revisions)s AND sale_id IS NULL
+            ) job_numbers
+            WHERE split_part(job_number, '.', 2) ~ '^[0-9]+$'
+            ON CONFLICT (major) DO UPDATE
+            SET last_minor = GREATEST({table}.last_minor + 1, EXCLUDED.last_minor)
+            RETURNING last_minor
+            """,
+            {'major': major, 'revisions': f'{major}.%'},
+        )
+        return f'{major}.{cursor.fetchone()[0]}'
+
+
+def job_exists(major):
+    """Whether job `major` or any revision of it is on the sales tracker"""
+    return SalesEnquiry.objects.filter(
+        Q(job_number=str(major)) | Q(job_number__startswith=f'{major}.')
+    ).exists()
+
+
+def save_with_job_number(enquiry, revision_of=None):
+    """Give `enquiry` a new job number - a revision of `revision_of` if set - and save it"""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                enquiry.job_number = next_revision(revision_of) if revision_of else next_major()
+                enquiry.save()
+                return enquiry
+        except IntegrityError:
+            # Only a clash on the job number is worth another try; the next
+            # attempt allocates past the number that is already taken
+            taken = SalesEnquiry.objects.filter(job_number=enquiry.job_number).exists()
+            if attempt == MAX_ATTEMPTS - 1 or not taken:
+                raise
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from sales_tracker.follow_up import digest_recipients, send_digest
+
+
+class Command(BaseCommand):
+    help = 'Email the follow-up digest of pending enquiries now (the worker also sends it on TASK_SCHEDULE)'
+
+    def handle(self, *args, **options):
+        count = send_digest()
+        if count:
+            self.stdout.write(self.style.SUCCESS(
+                f"Sent the digest of {count} pending enquiries to {', '.join(digest_recipients())}"
+            ))
+        else:
+            self.stdout.write('Nothing sent: no pending enquiries, or no recipients configured')
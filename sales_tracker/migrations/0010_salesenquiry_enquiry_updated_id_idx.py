@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_tracker', '0009_salesenquiry_note'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesenquiry',
+            index=models.Index(fields=['updated_at', 'id'], name='enquiry_updated_id_idx'),
+        ),
+    ]
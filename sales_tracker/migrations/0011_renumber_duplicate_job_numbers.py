@@ -0,0 +1,46 @@
+import re
+
+from django.db import migrations
+
+JOB_NUMBER_PATTERN = re.compile(r'(\d+)(?:\.(\d+))?')
+
+
+def renumber_duplicates(apps, schema_editor):
+    """Give every repeat of a job number but the oldest the next free revision
+
+    Needed before job_number can be unique. Numeric job numbers become the
+    next unused revision of their job ("12345" -> "12345.4"), anything else
+    gets a ".N" suffix; linked awards follow their enquiry.
+    """
+    SalesEnquiry = apps.get_model('sales_tracker', 'SalesEnquiry')
+    MonthlyAward = apps.get_model('monthly_awards', 'MonthlyAward')
+
+    taken = set(SalesEnquiry.objects.values_list('job_number', flat=True))
+    seen = set()
+    for enquiry in SalesEnquiry.objects.order_by('id').only('id', 'job_number'):
+        if enquiry.job_number not in seen:
+            seen.add(enquiry.job_number)
+            continue
+
+        match = JOB_NUMBER_PATTERN.fullmatch(enquiry.job_number)
+        base = match.group(1) if match else enquiry.job_number
+        minor = 1
+        while f'{base}.{minor}' in taken:
+            minor += 1
+        new_number = f'{base}.{minor}'
+        taken.add(new_number)
+
+        SalesEnquiry.objects.filter(pk=enquiry.pk).update(job_number=new_number)
+        MonthlyAward.objects.filter(sale_id=enquiry.pk).update(job_number=new_number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_tracker', '0010_salesenquiry_enquiry_updated_id_idx'),
+        ('monthly_awards', '0005_monthlyaward_award_updated_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+# New major job numbers continue from the highest numeric one in use on the
+# sales tracker or on manually entered awards
+CREATE_JOB_NUMBER_SEQUENCE = r"""
+CREATE SEQUENCE sales_tracker_job_number_seq AS bigint;
+SELECT setval('sales_tracker_job_number_seq', COALESCE(MAX(split_part(job_number, '.', 1)::bigint), 0) + 1, false)
+FROM (
+    SELECT job_number FROM sales_tracker_salesenquiry
+    UNION ALL
+    SELECT job_number FROM monthly_awards_monthlyaward
+) job_numbers
+WHERE job_number ~ '^[0-9]{1,18}(\.[0-9]+)?$';
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_tracker', '0011_renumber_duplicate_job_numbers'),
+        ('monthly_awards', '0005_monthlyaward_award_updated_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRevisionCounter',
+            fields=[
+                ('major', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('last_minor', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='salesenquiry',
+            index=models.Index(fields=['job_number'], name='enquiry_job_number_like_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='salesenquiry',
+            constraint=models.UniqueConstraint(fields=('job_number',), name='enquiry_job_number_unique'),
+        ),
+        migrations.RunSQL(CREATE_JOB_NUMBER_SEQUENCE, 'DROP SEQUENCE sales_tracker_job_number_seq;'),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_tracker', '0013_fiscal_period'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesenquiry',
+            index=models.Index(condition=models.Q(('status', 'Pending')), fields=['date', 'id'], name='enquiry_pending_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesenquiry',
+            index=models.Index(condition=models.Q(('status', 'Pending')), fields=['-value', 'id'], name='enquiry_pending_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesenquiry',
+            index=models.Index(condition=models.Q(('status', 'Pending')), fields=['client', 'date'], name='enquiry_pending_client_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_tracker', '0014_pending_follow_up_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesenquiry',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
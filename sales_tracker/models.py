@@ -1,17 +1,35 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.utils import timezone
+from psl_app_project.fiscal import FiscalPeriod, FiscalYear
+from psl_app_project.versioning import VersionedModel
 
 
-class SalesEnquiry(models.Model):
+class SalesEnquiry(VersionedModel):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
         ('Rejected', 'Rejected'),
         ('Awarded', 'Awarded'),
     ]
 
+    # Copied onto the enquiry's monthly awards by sync_linked_awards()
+    AWARD_FIELDS = ['job_number', 'location', 'client', 'client_contact', 'email', 'phone', 'value']
+
     job_number = models.CharField(max_length=20)
     date = models.DateField(default=timezone.now)
+    # Generated from date by the database - see psl_app_project/fiscal.py
+    fiscal_year = models.GeneratedField(
+        expression=FiscalYear('date', start_month=settings.FISCAL_YEAR_START_MONTH),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+    fiscal_period = models.GeneratedField(
+        expression=FiscalPeriod('date', start_month=settings.FISCAL_YEAR_START_MONTH),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
     value = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     note = models.TextField(blank=True, null=True)
     location = models.TextField()
@@ -28,6 +46,102 @@ class SalesEnquiry(models.Model):
         ordering = ['-date', '-created_at']
         verbose_name = 'Sales Enquiry'
         verbose_name_plural = 'Sales Enquiries'
+        indexes = [
+            # Incremental sync for the JSON API (updated_since + keyset on updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='enquiry_updated_id_idx'),
+            # LIKE '12345.%' - the revisions of one job, for job number allocation
+            models.Index(fields=['job_number'], name='enquiry_job_number_like_idx', opclasses=['varchar_pattern_ops']),
+            # Fiscal period filters and per-period rollups, rows in keyset order
+            models.Index(fields=['fiscal_year', 'fiscal_period', '-date', '-id'], name='enquiry_fiscal_idx'),
+            # Follow-up queue (sales_tracker/follow_up.py): pending rows only, by age, value and client
+            models.Index(fields=['date', 'id'], name='enquiry_pending_age_idx', condition=models.Q(status='Pending')),
+            models.Index(fields=['-value', 'id'], name='enquiry_pending_value_idx', condition=models.Q(status='Pending')),
+            models.Index(fields=['client', 'date'], name='enquiry_pending_client_idx', condition=models.Q(status='Pending')),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['job_number'], name='enquiry_job_number_unique'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.job_number} - {self.client}"
+
+    def clean(self):
+        # Changing an awarded enquiry changes its awards, which are frozen in closed months
+        if self.pk and not self._state.adding:
+            from periods.closing import check_linked_awards_writable
+            check_linked_awards_writable(self)
+
+    def sync_linked_awards(self, old_status, user):
+        """Keep linked monthly awards/invoices in step with this enquiry's status and values.
+
+        Returns the success message describing what changed.
+        """
+        from monthly_awards.models import MonthlyAward
+        from invoiced_jobs.models import InvoicedJob
+        from search import indexing as search_index
+        from forecast import cash_flow
+
+        # If status changed to "Awarded", create Monthly Award AND auto-create invoice
+        if old_status != 'Awarded' and self.status == 'Awarded':
+            award = MonthlyAward.objects.create(
+                sale=self,
+                job_number=self.job_number,
+                location=self.location,
+                client=self.client,
+                client_contact=self.client_contact,
+                email=self.email,
+                phone=self.phone,
+                value=self.value,
+                date=timezone.now().date(),
+                created_by=user
+            )
+
+            # ✅ AUTO-CREATE invoice only for sales tracker awards
+            InvoicedJob.objects.create(
+                award=award,
+                date=timezone.now().date(),
+                utility_value=0,
+                cad_value=0,
+                topo_value=0,
+                contractor_value=0,
+                status='Pending',
+                created_by=user
+            )
+
+            return 'Sales enquiry awarded! Monthly award and invoice created automatically.'
+
+        # If status changed FROM "Awarded", delete linked awards (cascade deletes invoices)
+        if old_status == 'Awarded' and self.status != 'Awarded':
+            deleted_count = MonthlyAward.objects.filter(sale=self).delete()[0]
+            if deleted_count > 0:
+                return f'Status updated. {deleted_count} linked award(s) and invoice(s) removed.'
+            return 'Sales enquiry updated successfully!'
+
+        # If status is still "Awarded", update linked awards (only those that differ)
+        if self.status == 'Awarded':
+            copied = {field: getattr(self, field) for field in self.AWARD_FIELDS}
+            award_ids = list(MonthlyAward.objects.filter(sale=self).exclude(**copied).values_list('id', flat=True))
+            MonthlyAward.objects.filter(id__in=award_ids).update(
+                **copied,
+                # update() skips auto_now, keep updated_at right for incremental sync
+                updated_at=timezone.now(),
+                # ... and the version check, so open award forms see the change
+                version=F('version') + 1
+            )
+            # update() sends no signals
+            search_index.reindex(MonthlyAward, award_ids)
+            if award_ids:
+                transaction.on_commit(cash_flow.invalidate)
+            return 'Sales enquiry and linked awards updated successfully!'
+
+        return 'Sales enquiry updated successfully!'
+
+
+class JobRevisionCounter(models.Model):
+    """Last ".minor" revision handed out for a job - see job_numbers.next_revision()"""
+
+    major = models.BigIntegerField(primary_key=True)
+    last_minor = models.PositiveIntegerField(default=0)
 
     def __str__(self):
-        return f"Job #{self.job_number} - {self.client}"
\ No newline at end of file
+        return f"Job #{self.major}: last revision .{self.last_minor}"
@@ -0,0 +1,9 @@
+from taskqueue.registry import task
+
+from .follow_up import send_digest
+
+
+@task(max_attempts=3, retry_delay=300)
+def send_follow_up_digest():
+    """Email the daily digest of pending enquiries by age (see FOLLOW_UP_* settings)"""
+    return {'enquiries': send_digest()}
@@ -1,14 +1,20 @@
 from django.urls import path
 from .views import (
     sales_tracker,
+    follow_up_queue,
+    sales_enquiry_text,
     add_sales_enquiry,
     edit_sales_enquiry,
-    delete_sales_enquiry
+    delete_sales_enquiry,
+    inline_update_sales_enquiry
 )
 
 urlpatterns = [
     path('', sales_tracker, name='sales_tracker'),
+    path('follow-up/', follow_up_queue, name='follow_up_queue'),
+    path('text/<int:pk>/<str:field>/', sales_enquiry_text, name='sales_enquiry_text'),
     path('add/', add_sales_enquiry, name='add_sales_enquiry'),
     path('edit/<int:pk>/', edit_sales_enquiry, name='edit_sales_enquiry'),
     path('delete/<int:pk>/', delete_sales_enquiry, name='delete_sales_enquiry'),
+    path('inline/<int:pk>/', inline_update_sales_enquiry, name='inline_update_sales_enquiry'),
 ]
\ No newline at end of file
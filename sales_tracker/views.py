@@ -1,48 +1,76 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.core.paginator import Paginator
 from django.urls import reverse
 from urllib.parse import urlencode
+import asyncio
+from asgiref.sync import sync_to_async
+from psl_app_project.concurrency import arender, run_concurrently
+from psl_app_project.pagination import offset_page
+from psl_app_project.projection import attach_previews, full_text, with_previews
+from psl_app_project.replica import use_replica
+from psl_app_project.versioning import CONFLICT_MESSAGE, EditConflict, rebase
+from periods import closing
+from search.models import SearchEntry
+from search.query import matching_ids
+from . import follow_up
+from .job_numbers import save_with_job_number
 from .models import SalesEnquiry
-from .forms import SalesEnquiryAddForm, SalesEnquiryEditForm
+from .forms import SalesEnquiryAddForm, SalesEnquiryEditForm, SalesEnquiryInlineForm
+
+
+# Columns the sales tracker table renders, and its long text columns: field -> words shown
+ENQUIRY_ROW_FIELDS = ['id', 'job_number', 'date', 'client', 'client_contact', 'value', 'status']
+ENQUIRY_ROW_PREVIEWS = {'location': 10, 'note': 8}
+
+
+def _enquiry_rows(enquiries):
+    """Enquiries narrowed to the columns the table renders"""
+    return with_previews(enquiries.only(*ENQUIRY_ROW_FIELDS), ENQUIRY_ROW_PREVIEWS)
+
+
+def _sorted_by_job_number(enquiries):
+    """ids of every matching enquiry, highest job number first (numeric where possible)"""
+    def sort_key(row):
+        job_num = row[1]
+        try:
+            if '.' in job_num:
+                parts = job_num.split('.')
+                return (0, int(parts[0]), int(parts[1]))
+            else:
+                return (0, int(job_num), 0)
+        except (ValueError, TypeError):
+            return (1, job_num, 0)
+
+    return [pk for pk, _ in sorted(enquiries.values_list('id', 'job_number'), key=sort_key, reverse=True)]
+
+
+def _rows_in_order(ids):
+    """Table rows for these enquiry ids, in the order given"""
+    rows = _enquiry_rows(SalesEnquiry.objects.filter(id__in=ids)).in_bulk()
+    return [rows[pk] for pk in ids if pk in rows]
 
 
 @login_required
-def sales_tracker(request):
-    """Sales tracker list view with pagination"""
+@use_replica
+async def sales_tracker(request):
+    """Sales tracker list view with pagination
+
+    The page's rows and the total count are fetched concurrently.
+    """
     enquiries = SalesEnquiry.objects.all()
 
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        from django.db.models import Q
-        enquiries = enquiries.filter(
-            Q(job_number__icontains=search_query) |
-            Q(location__icontains=search_query)
-        )
+        enquiries = enquiries.filter(id__in=matching_ids(search_query, SearchEntry.ENQUIRY))
 
     # Sort by filter
     sort_by = request.GET.get('sort_by', 'date')
 
-    if sort_by == 'job_number':
-        enquiries = list(enquiries)
-
-        def sort_key(enquiry):
-            job_num = enquiry.job_number
-            try:
-                if '.' in job_num:
-                    parts = job_num.split('.')
-                    return (0, int(parts[0]), int(parts[1]))
-                else:
-                    return (0, int(job_num), 0)
-            except (ValueError, TypeError):
-                return (1, job_num, 0)
-
-        enquiries = sorted(enquiries, key=sort_key, reverse=True)
-    else:
-        enquiries = enquiries.order_by('-date', '-created_at')
-
     # Get current page and per_page values
     current_page = request.GET.get('page', 1)
 
@@ -58,23 +86,92 @@ def sales_tracker(request):
         per_page = 10
 
     # Pagination
-    paginator = Paginator(enquiries, per_page)
-
-    try:
-        enquiries_page = paginator.page(current_page)
-    except PageNotAnInteger:
-        enquiries_page = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range, deliver last page
-        enquiries_page = paginator.page(paginator.num_pages)
+    if sort_by == 'job_number':
+        # Sorted in Python over every row's id and job number, then only the page's rows are fetched
+        ids = await sync_to_async(_sorted_by_job_number)(enquiries)
+        enquiries_page = Paginator(ids, per_page).get_page(current_page)
+        enquiries_page.object_list = await sync_to_async(_rows_in_order)(enquiries_page.object_list)
+    else:
+        enquiries_page = await offset_page(
+            _enquiry_rows(enquiries).order_by('-date', '-created_at'), current_page, per_page
+        )
+    for enquiry in enquiries_page:
+        attach_previews(enquiry, ENQUIRY_ROW_PREVIEWS)
 
     context = {
         'enquiries': enquiries_page,
         'sort_by': sort_by,
         'search_query': search_query,
         'per_page': per_page,
+        'status_choices': SalesEnquiry.STATUS_CHOICES,
+    }
+    return await arender(request, 'sales_tracker.html', context)
+
+
+# Follow-up queue orderings: key -> (label, order_by), each matching a partial index on pending rows
+FOLLOW_UP_SORTS = {
+    'age': ('Oldest first', ['date', 'id']),
+    'value': ('Highest value', ['-value', 'id']),
+    'client': ('Client', ['client', 'date', 'id']),
+}
+FOLLOW_UP_PER_PAGE = 50
+FOLLOW_UP_ROW_FIELDS = ['id', 'job_number', 'date', 'client', 'client_contact', 'email', 'phone', 'value']
+FOLLOW_UP_ROW_PREVIEWS = {'location': 8, 'note': 12}
+
+
+@login_required
+@use_replica
+async def follow_up_queue(request):
+    """Pending enquiries by age bucket, oldest first (or by value/client)
+
+    The page, its count and the per-bucket totals are fetched concurrently.
+    """
+    enquiries = follow_up.pending()
+
+    client = request.GET.get('client', '')
+    if client:
+        enquiries = enquiries.filter(client=client)
+
+    # Bucket tabs count every bucket for the client filter, whichever is selected
+    totals_query = enquiries
+
+    try:
+        bucket = int(request.GET.get('bucket', ''))
+        if bucket < 0:
+            raise IndexError(bucket)
+        enquiries = follow_up.in_bucket(enquiries, bucket)
+    except (ValueError, IndexError):
+        bucket = None
+
+    sort_by = request.GET.get('sort_by', 'age')
+    if sort_by not in FOLLOW_UP_SORTS:
+        sort_by = 'age'
+
+    rows = with_previews(enquiries.only(*FOLLOW_UP_ROW_FIELDS), FOLLOW_UP_ROW_PREVIEWS)
+    enquiries_page, [bucket_totals] = await asyncio.gather(
+        offset_page(rows.order_by(*FOLLOW_UP_SORTS[sort_by][1]), request.GET.get('page', 1), FOLLOW_UP_PER_PAGE),
+        run_concurrently(lambda: follow_up.bucket_totals(totals_query)),
+    )
+    for enquiry in enquiries_page:
+        attach_previews(enquiry, FOLLOW_UP_ROW_PREVIEWS)
+
+    context = {
+        'enquiries': enquiries_page,
+        'bucket_totals': bucket_totals,
+        'oldest_bucket': len(bucket_totals) - 1,
+        'selected_bucket': bucket,
+        'client': client,
+        'sort_by': sort_by,
+        'sort_options': [(key, label) for key, (label, _) in FOLLOW_UP_SORTS.items()],
     }
-    return render(request, 'sales_tracker.html', context)
+    return await arender(request, 'follow_up_queue.html', context)
+
+
+@login_required
+@use_replica
+def sales_enquiry_text(request, pk, field):
+    """Full text of one of a sales tracker row's previewed columns, as JSON"""
+    return full_text(SalesEnquiry.objects.all(), pk, field, ENQUIRY_ROW_PREVIEWS)
 
 
 @login_required
@@ -91,8 +188,8 @@ def add_sales_enquiry(request):
         if form.is_valid():
             enquiry = form.save(commit=False)
             enquiry.created_by = request.user
-            enquiry.save()
-            messages.success(request, 'Sales enquiry added successfully!')
+            save_with_job_number(enquiry, revision_of=form.cleaned_data['revision_of'])
+            messages.success(request, f'Sales enquiry added as job {enquiry.job_number}!')
             # Redirect back to the same page with filters
             params = {'page': page, 'sort_by': sort_by, 'per_page': per_page}
             if search_query:
@@ -126,74 +223,29 @@ def edit_sales_enquiry(request, pk):
     search_query = request.GET.get('search', '')
     per_page = request.GET.get('per_page', '10')
 
+    # Redirect back to the same page with filters
+    params = {'page': page, 'sort_by': sort_by, 'per_page': per_page}
+    if search_query:
+        params['search'] = search_query
+    redirect_url = f"{reverse('sales_tracker')}?{urlencode(params)}"
+
+    conflict = None
     if request.method == 'POST':
         form = SalesEnquiryEditForm(request.POST, instance=enquiry)
         if form.is_valid():
-            updated_enquiry = form.save()
-
-            from monthly_awards.models import MonthlyAward
-            from invoiced_jobs.models import InvoicedJob
-            from django.utils import timezone
-
-            # If status changed to "Awarded", create Monthly Award AND auto-create invoice
-            if old_status != 'Awarded' and updated_enquiry.status == 'Awarded':
-                award = MonthlyAward.objects.create(
-                    sale=updated_enquiry,
-                    job_number=updated_enquiry.job_number,
-                    location=updated_enquiry.location,
-                    client=updated_enquiry.client,
-                    client_contact=updated_enquiry.client_contact,
-                    email=updated_enquiry.email,
-                    phone=updated_enquiry.phone,
-                    value=updated_enquiry.value,
-                    date=timezone.now().date(),
-                    created_by=request.user
-                )
-
-                # ✅ AUTO-CREATE invoice only for sales tracker awards
-                InvoicedJob.objects.create(
-                    award=award,
-                    date=timezone.now().date(),
-                    utility_value=0,
-                    cad_value=0,
-                    topo_value=0,
-                    contractor_value=0,
-                    status='Pending',
-                    created_by=request.user
-                )
-
-                messages.success(request, 'Sales enquiry awarded! Monthly award and invoice created automatically.')
-
-            # If status changed FROM "Awarded", delete linked awards (cascade deletes invoices)
-            elif old_status == 'Awarded' and updated_enquiry.status != 'Awarded':
-                deleted_count = MonthlyAward.objects.filter(sale=updated_enquiry).delete()[0]
-                if deleted_count > 0:
-                    messages.success(request,
-                                     f'Status updated. {deleted_count} linked award(s) and invoice(s) removed.')
-                else:
-                    messages.success(request, 'Sales enquiry updated successfully!')
-
-            # If status is still "Awarded", update linked awards
-            elif updated_enquiry.status == 'Awarded':
-                MonthlyAward.objects.filter(sale=updated_enquiry).update(
-                    job_number=updated_enquiry.job_number,
-                    location=updated_enquiry.location,
-                    client=updated_enquiry.client,
-                    client_contact=updated_enquiry.client_contact,
-                    email=updated_enquiry.email,
-                    phone=updated_enquiry.phone,
-                    value=updated_enquiry.value
-                )
-                messages.success(request, 'Sales enquiry and linked awards updated successfully!')
+            try:
+                updated_enquiry = form.save()
+            except EditConflict:
+                rebased = rebase(form)
+                if rebased is None:
+                    messages.error(request, 'This sales enquiry was deleted by someone else while you were editing it.')
+                    return redirect(redirect_url)
+                form, conflict = rebased
+                enquiry = form.instance
             else:
-                messages.success(request, 'Sales enquiry updated successfully!')
-
-            # Redirect back to the same page with filters
-            params = {'page': page, 'sort_by': sort_by, 'per_page': per_page}
-            if search_query:
-                params['search'] = search_query
-            redirect_url = f"{reverse('sales_tracker')}?{urlencode(params)}"
-            return redirect(redirect_url)
+                message = updated_enquiry.sync_linked_awards(old_status, request.user)
+                messages.success(request, message)
+                return redirect(redirect_url)
     else:
         form = SalesEnquiryEditForm(instance=enquiry)
 
@@ -201,6 +253,7 @@ def edit_sales_enquiry(request, pk):
         'form': form,
         'action': 'Edit',
         'enquiry': enquiry,
+        'conflict': conflict,
         'is_add_form': False,
         'page': page,
         'sort_by': sort_by,
@@ -222,8 +275,12 @@ def delete_sales_enquiry(request, pk):
     per_page = request.GET.get('per_page', '10')
 
     if request.method == 'POST':
-        enquiry.delete()
-        messages.success(request, 'Sales enquiry deleted successfully!')
+        locked = closing.locked_reason(enquiry)
+        if locked:
+            messages.error(request, f'Sales enquiry not deleted. {locked}')
+        else:
+            enquiry.delete()
+            messages.success(request, 'Sales enquiry deleted successfully!')
         # Redirect back to the same page with filters
         params = {'page': page, 'sort_by': sort_by, 'per_page': per_page}
         if search_query:
@@ -238,4 +295,42 @@ def delete_sales_enquiry(request, pk):
         'search_query': search_query,
         'per_page': per_page,
     }
-    return render(request, 'sales_enquiry_confirm_delete.html', context)
\ No newline at end of file
+    return render(request, 'sales_enquiry_confirm_delete.html', context)
+
+
+@login_required
+@require_POST
+def inline_update_sales_enquiry(request, pk):
+    """Inline status/value update from the sales tracker table - returns the re-rendered row"""
+    enquiry = get_object_or_404(SalesEnquiry, pk=pk)
+    old_status = enquiry.status
+
+    form = SalesEnquiryInlineForm(request.POST, instance=enquiry)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    try:
+        saved = form.save()
+    except EditConflict:
+        return JsonResponse({'errors': {'__all__': [CONFLICT_MESSAGE]}}, status=409)
+    message = saved.sync_linked_awards(old_status, request.user)
+    updated_enquiry = attach_previews(_enquiry_rows(SalesEnquiry.objects.filter(pk=pk)).get(), ENQUIRY_ROW_PREVIEWS)
+
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'id': updated_enquiry.pk,
+            'status': updated_enquiry.status,
+            'value': str(updated_enquiry.value),
+            'message': message,
+        })
+
+    # List filters are passed through so the row's edit/delete links keep them
+    context = {
+        'enquiry': updated_enquiry,
+        'page': request.GET.get('page', '1'),
+        'sort_by': request.GET.get('sort_by', 'date'),
+        'search_query': request.GET.get('search', ''),
+        'per_page': request.GET.get('per_page', '10'),
+        'status_choices': SalesEnquiry.STATUS_CHOICES,
+    }
+    return render(request, 'sales_enquiry_row.html', context)
\ No newline at end of file
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Benchmark the WSGI and ASGI serving modes against each other.
+
+Starts gunicorn with gunicorn.conf.py once per mode (GUNICORN_SERVER_MODE=
+wsgi, then asgi) with the same worker count, runs scripts/loadtest.py
+against each with the same options, and prints the two reports side by side.
+Each mode's full report is kept as <output-prefix>-<mode>.json.
+
+Run from the project root with the database the app normally uses, after
+seeding it (python manage.py seed_loadtest_data):
+
+    python scripts/compare_serving_modes.py --workers 3 --concurrency 20 --duration 60
+    python scripts/compare_serving_modes.py --slow-clients 10 --only sales_tracker,monthly_awards_list
+
+Any option not listed below is passed through to loadtest.py.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+MODES = ['wsgi', 'asgi']
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+
+
+def wait_until_up(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/login/', timeout=2):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    raise RuntimeError(f'Server at {base_url} did not come up within {timeout}s')
+
+
+def run_mode(mode, args, loadtest_args):
+    """Serve the app in `mode`, load test it, and return the loadtest report"""
+    env = dict(
+        os.environ,
+        GUNICORN_SERVER_MODE=mode,
+        GUNICORN_BIND=f'127.0.0.1:{args.port}',
+        # Local HTTP: no HTTPS redirect or secure-only cookies
+        DEBUG=os.environ.get('DEBUG', 'True'),
+    )
+    if args.workers:
+        env['GUNICORN_WORKERS'] = str(args.workers)
+
+    output = f'{args.output_prefix}-{mode}.json'
+    base_url = f'http://127.0.0.1:{args.port}'
+    server = subprocess.Popen(['gunicorn'], cwd=PROJECT_DIR, env=env)
+    try:
+        wait_until_up(base_url, args.startup_timeout)
+        subprocess.run(
+            [sys.executable, os.path.join(SCRIPTS_DIR, 'loadtest.py'),
+             '--base-url', base_url, '--label', mode, '--output', output, *loadtest_args],
+            check=True,
+        )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    with open(output) as fh:
+        return json.load(fh)
+
+
+def print_comparison(reports):
+    names = sorted({name for report in reports.values() for name in report['endpoints']})
+    rows = [(name, {mode: report['endpoints'].get(name) for mode, report in reports.items()}) for name in names]
+    rows.append(('TOTAL', {mode: report['total'] for mode, report in reports.items()}))
+
+    header = f"{'endpoint':32}"
+    for mode in reports:
+        header += f" {mode + ' rps':>10} {'p50':>7} {'p95':>7} {'err':>5}"
+    print('\n' + header)
+    for name, by_mode in rows:
+        line = f'{name:32}'
+        for stats in by_mode.values():
+            if stats:
+                line += f" {stats['throughput_rps']:>10} {stats['p50_ms']:>7} {stats['p95_ms']:>7} {stats['errors']:>5}"
+            else:
+                line += f" {'-':>10} {'-':>7} {'-':>7} {'-':>5}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--port', type=int, default=8055)
+    parser.add_argument('--workers', type=int, help='Workers in both modes (default: gunicorn.conf.py auto-tuning)')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma separated, in run order')
+    parser.add_argument('--output-prefix', default='serving-mode')
+    parser.add_argument('--startup-timeout', type=float, default=30)
+    args, loadtest_args = parser.parse_known_args()
+
+    reports = {mode: run_mode(mode, args, loadtest_args) for mode in args.modes.split(',')}
+    print_comparison(reports)
+
+
+if __name__ == '__main__':
+    main()
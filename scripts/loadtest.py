@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+"""
+Load test for the PSL list and form views.
+
+Logs in with Django's login form, then runs a weighted mix of requests
+against the sales tracker (plain, search, job number sort, deep pages),
+monthly awards, invoiced jobs and the add/edit enquiry flows from
+--concurrency worker threads for --duration seconds.
+
+Per-endpoint throughput and p50/p95/p99 latencies are printed and written
+as JSON to --output, so runs before and after a change can be compared.
+
+--slow-clients N adds N connections that send their request headers a line
+at a time (like clients on a poor mobile link), from the moment the users
+have logged in until the end of the run, to show how the server copes when
+some clients tie up a connection.
+
+Only needs the standard library. Typical use against a local server:
+
+    python manage.py seed_loadtest_data --clear
+    gunicorn psl_app_project.wsgi:application --bind 127.0.0.1:8000
+    python scripts/loadtest.py --base-url http://127.0.0.1:8000 --concurrency 10 --duration 60
+"""
+import argparse
+import http.cookiejar
+import json
+import random
+import re
+import socket
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import date
+
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+ENQUIRY_EDIT_LINK = re.compile(r'/sales-trackeredit/(\d+)/')
+
+
+class Session:
+    """A logged-in browser-like session: cookies plus CSRF handling"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def request(self, path, data=None):
+        """GET (or POST when data is given) and return (status, body)"""
+        url = self.base_url + path
+        headers = {'Referer': url}
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token())
+            data = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(url, data=data, headers=headers)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read().decode('utf-8', 'replace')
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def login(self, username, password):
+        status, body = self.request('/login/')
+        if status != 200 or not CSRF_INPUT.search(body):
+            raise RuntimeError(f'Could not load login page (HTTP {status})')
+        status, body = self.request('/login/', {'username': username, 'password': password})
+        if 'name="password"' in body:
+            raise RuntimeError('Login failed - check --username/--password')
+
+
+def enquiry_form_data(job_number):
+    return {
+        'job_number': job_number,
+        'location': 'Load test location',
+        'client': 'Loadtest Client 0',
+        'client_contact': 'Load Tester',
+        'email': '',
+        'phone': '',
+        'note': '',
+    }
+
+
+# Scenario name -> (weight, function(session, state) returning (status, body))
+def sales_tracker(session, state):
+    return session.request('/sales-tracker')
+
+
+def sales_tracker_search(session, state):
+    term = random.choice(['90', '91', '9', 'Example', 'Survey Area 1'])
+    return session.request('/sales-tracker?' + urllib.parse.urlencode({'search': term}))
+
+
+def sales_tracker_sort_job_number(session, state):
+    return session.request('/sales-tracker?sort_by=job_number&per_page=25')
+
+
+def sales_tracker_deep_page(session, state):
+    page = random.randint(50, 400)
+    return session.request(f'/sales-tracker?page={page}&per_page=50')
+
+
+def monthly_awards_list(session, state):
+    month = random.randint(1, 12)
+    return session.request(f'/monthly-awards?year={date.today().year}&month={month}')
+
+
+def invoiced_jobs_list(session, state):
+    month = random.randint(1, 12)
+    return session.request(f'/invoiced-jobs?year={date.today().year}&month={month}')
+
+
+def add_enquiry(session, state):
+    status, body = session.request('/sales-trackeradd/')
+    if status != 200:
+        return status, body
+    return session.request('/sales-trackeradd/', enquiry_form_data(f'LT-{uuid.uuid4().hex[:8]}'))
+
+
+def edit_enquiry(session, state):
+    if not state['enquiry_ids']:
+        return 0, 'no enquiries to edit'
+    pk = random.choice(state['enquiry_ids'])
+    status, body = session.request(f'/sales-trackeredit/{pk}/')
+    if status != 200:
+        return status, body
+    data = dict(enquiry_form_data(f'LT-{pk}'), date=date.today().isoformat(),
+                value=f'{random.randint(100, 100000)}.00', status='Pending')
+    return session.request(f'/sales-trackeredit/{pk}/', data)
+
+
+SCENARIOS = {
+    'sales_tracker': (20, sales_tracker),
+    'sales_tracker_search': (15, sales_tracker_search),
+    'sales_tracker_sort_job_number': (10, sales_tracker_sort_job_number),
+    'sales_tracker_deep_page': (10, sales_tracker_deep_page),
+    'monthly_awards_list': (15, monthly_awards_list),
+    'invoiced_jobs_list': (15, invoiced_jobs_list),
+    'add_enquiry': (5, add_enquiry),
+    'edit_enquiry': (10, edit_enquiry),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def worker(args, scenarios, deadline, results, lock, errors, logged_in):
+    session = Session(args.base_url, args.timeout)
+    try:
+        session.login(args.username, args.password)
+    except Exception as exc:
+        errors.append(str(exc))
+        return
+    finally:
+        logged_in.release()
+
+    # Enquiries this worker may edit: the ones the seed command created
+    status, body = session.request('/sales-tracker?search=Example&per_page=100')
+    state = {'enquiry_ids': ENQUIRY_EDIT_LINK.findall(body)}
+
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            status, _ = scenarios[name][1](session, state)
+        except Exception:
+            status = 0
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            results.setdefault(name, []).append((elapsed_ms, status))
+
+
+def slow_client(args, deadline):
+    """Hold a connection open by trickling request headers until the deadline"""
+    url = urllib.parse.urlsplit(args.base_url)
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((url.hostname, url.port or 80), timeout=args.timeout) as sock:
+                sock.sendall(f'GET /login/ HTTP/1.1\r\nHost: {url.netloc}\r\n'.encode())
+                while time.monotonic() < deadline:
+                    time.sleep(args.slow_interval)
+                    sock.sendall(b'X-Slow-Client: 1\r\n')
+                sock.sendall(b'\r\n')
+        except OSError:
+            # Server gave up on us (timeout/limit) - reconnect, as a real client would retry
+            time.sleep(args.slow_interval)
+
+
+def summarise(results, wall_seconds):
+    endpoints = {}
+    for name, samples in sorted(results.items()):
+        latencies = sorted(ms for ms, _ in samples)
+        endpoints[name] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, status in samples if status == 0 or status >= 400),
+            'throughput_rps': round(len(samples) / wall_seconds, 2),
+            'mean_ms': round(statistics.fmean(latencies), 1),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+            'max_ms': round(latencies[-1], 1),
+        }
+
+    all_latencies = sorted(ms for samples in results.values() for ms, _ in samples)
+    total = {
+        'requests': len(all_latencies),
+        'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+        'throughput_rps': round(len(all_latencies) / wall_seconds, 2),
+        'p50_ms': round(percentile(all_latencies, 50), 1) if all_latencies else None,
+        'p95_ms': round(percentile(all_latencies, 95), 1) if all_latencies else None,
+        'p99_ms': round(percentile(all_latencies, 99), 1) if all_latencies else None,
+    }
+    return endpoints, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', default='loadtest')
+    parser.add_argument('--password', default='loadtest-password')
+    parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent logged-in users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run for')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--only', help='Comma separated scenario names to run (default: all)')
+    parser.add_argument('--slow-clients', type=int, default=0,
+                        help='Extra connections that send their headers slowly for the whole run')
+    parser.add_argument('--slow-interval', type=float, default=1.0,
+                        help='Seconds between header lines sent by each slow client')
+    parser.add_argument('--label', default='', help='Free text stored in the report, e.g. a commit or config')
+    parser.add_argument('--output', default='loadtest-results.json')
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.only:
+        unknown = set(args.only.split(',')) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+        scenarios = {name: SCENARIOS[name] for name in args.only.split(',')}
+
+    results, errors, lock, logged_in = {}, [], threading.Lock(), threading.Semaphore(0)
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args, scenarios, deadline, results, lock, errors, logged_in))
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    if args.slow_clients:
+        for _ in threads:
+            logged_in.acquire()
+        for _ in range(args.slow_clients):
+            threading.Thread(target=slow_client, args=(args, deadline), daemon=True).start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.monotonic() - started
+
+    if errors and not results:
+        sys.exit(f'All workers failed: {errors[0]}')
+
+    endpoints, total = summarise(results, wall_seconds)
+    report = {
+        'label': args.label,
+        'base_url': args.base_url,
+        'concurrency': args.concurrency,
+        'slow_clients': args.slow_clients,
+        'duration_seconds': round(wall_seconds, 1),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'total': total,
+        'endpoints': endpoints,
+        'worker_errors': errors,
+    }
+    with open(args.output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+    print(f"{'endpoint':32} {'reqs':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in list(endpoints.items()) + [('TOTAL', total)]:
+        print(f"{name:32} {stats['requests']:>6} {stats['errors']:>4} {stats['throughput_rps']:>7} "
+              f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+    print(f'\nReport written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -17,12 +17,6 @@ python manage.py migrate --noinput
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
-# Start Gunicorn
+# Start Gunicorn (app, workers, threads and recycling come from gunicorn.conf.py)
 echo "Starting Gunicorn..."
-exec gunicorn psl_app_project.wsgi:application \
-    --bind 0.0.0.0:8000 \
-    --workers 3 \
-    --timeout 120 \
-    --access-logfile /app/logs/access.log \
-    --error-logfile /app/logs/error.log \
-    --log-level info
\ No newline at end of file
+exec gunicorn
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Keeping the search index (SearchEntry) in step with enquiries, awards and invoices.
+
+Entries are written with one INSERT ... SELECT ... ON CONFLICT DO UPDATE per
+entity type, straight from the source tables, so indexing one saved row and
+rebuilding the whole index are the same statement with a different WHERE.
+
+Saves and deletes made through the ORM update the index from signals. Awards
+and invoices carry their enquiry's/award's details, so reindexing a row also
+reindexes the rows that copy from it. Writes that skip signals - update(),
+bulk_create(), bulk_update() - must call reindex() themselves (or leave it
+to `manage.py rebuild_search_index`).
+"""
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from invoiced_jobs.models import InvoicedJob
+from monthly_awards.models import MonthlyAward
+from sales_tracker.models import SalesEnquiry
+
+from .models import SearchEntry
+
+# Full-text configuration: no stemming or stop words - names, addresses and job numbers
+TEXT_SEARCH_CONFIG = 'simple'
+
+# entity type -> SELECT producing index rows; {where} narrows the rows indexed
+_ENTRY_SQL = {
+    SearchEntry.ENQUIRY: """
+        SELECT 'enquiry', e.id, e.job_number, e.client, e.location, e.date, e.value,
+               lower(concat_ws(' ', e.job_number, e.client, e.client_contact, e.location, e.email, e.phone, e.note)),
+               setweight(to_tsvector(%(config)s, e.job_number), 'A') ||
+               setweight(to_tsvector(%(config)s, concat_ws(' ', e.client, e.client_contact)), 'B') ||
+               setweight(to_tsvector(%(config)s, concat_ws(' ', e.location, e.email, e.phone, e.note)), 'C')
+        FROM sales_tracker_salesenquiry e
+        WHERE {where}
+    """,
+    SearchEntry.AWARD: """
+        SELECT 'award', a.id, a.job_number, a.client, a.location, a.date, a.value,
+               lower(concat_ws(' ', a.job_number, a.client, a.client_contact, a.location, a.email, a.phone)),
+               setweight(to_tsvector(%(config)s, a.job_number), 'A') ||
+               setweight(to_tsvector(%(config)s, concat_ws(' ', a.client, a.client_contact)), 'B') ||
+               setweight(to_tsvector(%(config)s, concat_ws(' ', a.location, a.email, a.phone)), 'C')
+        FROM monthly_awards_monthlyaward a
+        WHERE {where}
+    """,
+    SearchEntry.INVOICE: """
+        SELECT 'invoice', i.id, a.job_number, a.client, coalesce(nullif(i.description, ''), a.location), i.date,
+               i.utility_value + i.cad_value + i.topo_value + i.contractor_value,
+               lower(concat_ws(' ', a.job_number, a.client, a.client_contact, i.description, a.location)),
+               setweight(to_tsvector(%(config)s, a.job_number), 'A') ||
+               setweight(to_tsvector(%(config)s, concat_ws(' ', a.client, a.client_contact)), 'B') ||
+               setweight(to_tsvector(%(config)s, concat_ws(' ', i.description, a.location)), 'C')
+        FROM invoiced_jobs_invoicedjob i
+        JOIN monthly_awards_monthlyaward a ON a.id = i.award_id
+        WHERE {where}
+    """,
+}
+
+_UPSERT_SQL = """
+    INSERT INTO search_searchentry
+        (entity_type, object_id, job_number, title, detail, date, value, search_text, document, indexed_at)
+    SELECT entry.*, %(now)s FROM ({select}) entry
+    ON CONFLICT (entity_type, object_id) DO UPDATE SET
+        job_number = EXCLUDED.job_number,
+        title = EXCLUDED.title,
+        detail = EXCLUDED.detail,
+        date = EXCLUDED.date,
+        value = EXCLUDED.value,
+        search_text = EXCLUDED.search_text,
+        document = EXCLUDED.document,
+        indexed_at = EXCLUDED.indexed_at
+"""
+
+# What to reindex when rows of a model change: (entity type, WHERE on the ids)
+_AFFECTED = {
+    SalesEnquiry: [
+        (SearchEntry.ENQUIRY, 'e.id = ANY(%(ids)s)'),
+        (SearchEntry.AWARD, 'a.sale_id = ANY(%(ids)s)'),
+        (SearchEntry.INVOICE, 'a.sale_id = ANY(%(ids)s)'),
+    ],
+    MonthlyAward: [
+        (SearchEntry.AWARD, 'a.id = ANY(%(ids)s)'),
+        (SearchEntry.INVOICE, 'a.id = ANY(%(ids)s)'),
+    ],
+    InvoicedJob: [
+        (SearchEntry.INVOICE, 'i.id = ANY(%(ids)s)'),
+    ],
+}
+
+_ENTITY_TYPES = {
+    SalesEnquiry: SearchEntry.ENQUIRY,
+    MonthlyAward: SearchEntry.AWARD,
+    InvoicedJob: SearchEntry.INVOICE,
+}
+
+
+def _upsert(cursor, entity_type, where, params=None):
+    cursor.execute(
+        _UPSERT_SQL.format(select=_ENTRY_SQL[entity_type].format(where=where)),
+        {'config': TEXT_SEARCH_CONFIG, 'now': timezone.now(), **(params or {})},
+    )
+    return cursor.rowcount
+
+
+def reindex(model, ids):
+    """Refresh the entries of these enquiries/awards/invoices and of every row copying from them"""
+    ids = [int(pk) for pk in ids]
+    if not ids:
+        return
+    with connection.cursor() as cursor:
+        for entity_type, where in _AFFECTED[model]:
+            _upsert(cursor, entity_type, where, {'ids': ids})
+
+
+def remove(model, ids):
+    SearchEntry.objects.filter(entity_type=_ENTITY_TYPES[model], object_id__in=ids).delete()
+
+
+def rebuild():
+    """Rewrite the whole index from the source tables; returns {entity type: entries}
+
+    DELETE rather than TRUNCATE so searches keep reading the old entries
+    until the new ones are committed.
+    """
+    counts = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM search_searchentry')
+        for entity_type in _ENTRY_SQL:
+            counts[entity_type] = _upsert(cursor, entity_type, 'TRUE')
+    return counts
+
+
+def _saved(sender, instance, raw=False, **kwargs):
+    # raw: loaddata - related rows may not be loaded yet
+    if not raw:
+        reindex(sender, [instance.pk])
+
+
+def _deleted(sender, instance, **kwargs):
+    remove(sender, [instance.pk])
+
+
+def connect_signals():
+    for model in _AFFECTED:
+        post_save.connect(_saved, sender=model, dispatch_uid=f'search.saved.{model.__name__}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'search.deleted.{model.__name__}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from search.indexing import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the global search index from the enquiry, award and invoice tables'
+
+    def handle(self, *args, **options):
+        counts = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed ' + ', '.join(f'{count} {entity_type} rows' for entity_type, count in counts.items())
+        ))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:48
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('enquiry', 'Sales Enquiry'), ('award', 'Monthly Award'), ('invoice', 'Invoice')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('job_number', models.CharField(max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('detail', models.TextField(blank=True)),
+                ('date', models.DateField()),
+                ('value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('search_text', models.TextField()),
+                ('document', django.contrib.postgres.search.SearchVectorField()),
+                ('indexed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Search Entry',
+                'verbose_name_plural': 'Search Entries',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['document'], name='search_document_idx'), django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='search_text_trgm_idx', opclasses=['gin_trgm_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('entity_type', 'object_id'), name='search_entry_object_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# Index the rows already there (the same statements as search.indexing.rebuild()),
+# so searches find them as soon as this is deployed. DO NOTHING: rows an
+# earlier `manage.py rebuild_search_index` indexed are left as they are.
+_UPSERT = """
+INSERT INTO search_searchentry
+    (entity_type, object_id, job_number, title, detail, date, value, search_text, document, indexed_at)
+SELECT entry.*, now() FROM ({select}) entry
+ON CONFLICT (entity_type, object_id) DO NOTHING
+"""
+
+_ENQUIRIES = """
+SELECT 'enquiry', e.id, e.job_number, e.client, e.location, e.date, e.value,
+       lower(concat_ws(' ', e.job_number, e.client, e.client_contact, e.location, e.email, e.phone, e.note)),
+       setweight(to_tsvector('simple', e.job_number), 'A') ||
+       setweight(to_tsvector('simple', concat_ws(' ', e.client, e.client_contact)), 'B') ||
+       setweight(to_tsvector('simple', concat_ws(' ', e.location, e.email, e.phone, e.note)), 'C')
+FROM sales_tracker_salesenquiry e
+"""
+
+_AWARDS = """
+SELECT 'award', a.id, a.job_number, a.client, a.location, a.date, a.value,
+       lower(concat_ws(' ', a.job_number, a.client, a.client_contact, a.location, a.email, a.phone)),
+       setweight(to_tsvector('simple', a.job_number), 'A') ||
+       setweight(to_tsvector('simple', concat_ws(' ', a.client, a.client_contact)), 'B') ||
+       setweight(to_tsvector('simple', concat_ws(' ', a.location, a.email, a.phone)), 'C')
+FROM monthly_awards_monthlyaward a
+"""
+
+_INVOICES = """
+SELECT 'invoice', i.id, a.job_number, a.client, coalesce(nullif(i.description, ''), a.location), i.date,
+       i.utility_value + i.cad_value + i.topo_value + i.contractor_value,
+       lower(concat_ws(' ', a.job_number, a.client, a.client_contact, i.description, a.location)),
+       setweight(to_tsvector('simple', a.job_number), 'A') ||
+       setweight(to_tsvector('simple', concat_ws(' ', a.client, a.client_contact)), 'B') ||
+       setweight(to_tsvector('simple', concat_ws(' ', i.description, a.location)), 'C')
+FROM invoiced_jobs_invoicedjob i
+JOIN monthly_awards_monthlyaward a ON a.id = i.award_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('sales_tracker', '0013_fiscal_period'),
+        ('monthly_awards', '0006_fiscal_period'),
+        ('invoiced_jobs', '0009_fiscal_period'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [_UPSERT.format(select=select) for select in (_ENQUIRIES, _AWARDS, _INVOICES)], migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """One searchable enquiry, award or invoice - a denormalised copy kept by search/indexing.py
+
+    document is the weighted full-text vector (job number A, client and
+    contact B, everything else C); search_text is the same text lowercased,
+    for trigram matching of partial or misspelt terms.
+    """
+
+    ENQUIRY = 'enquiry'
+    AWARD = 'award'
+    INVOICE = 'invoice'
+    ENTITY_CHOICES = [
+        (ENQUIRY, 'Sales Enquiry'),
+        (AWARD, 'Monthly Award'),
+        (INVOICE, 'Invoice'),
+    ]
+
+    entity_type = models.CharField(max_length=10, choices=ENTITY_CHOICES)
+    object_id = models.BigIntegerField()
+
+    # Shown in results
+    job_number = models.CharField(max_length=20)
+    title = models.CharField(max_length=255)
+    detail = models.TextField(blank=True)
+    date = models.DateField()
+    value = models.DecimalField(max_digits=12, decimal_places=2)
+
+    # Matched against
+    search_text = models.TextField()
+    document = SearchVectorField()
+
+    indexed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Search Entry'
+        verbose_name_plural = 'Search Entries'
+        constraints = [
+            models.UniqueConstraint(fields=['entity_type', 'object_id'], name='search_entry_object_unique'),
+        ]
+        indexes = [
+            GinIndex(fields=['document'], name='search_document_idx'),
+            # word similarity (<%) and LIKE '%term%' on search_text
+            GinIndex(fields=['search_text'], name='search_text_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entity_type_display()} #{self.object_id}: {self.job_number} - {self.title}"
@@ -0,0 +1,59 @@
+"""
+Ranked lookups against the search index.
+
+One query over SearchEntry answers a search box: a row matches when every
+word of the search is a prefix of a word in its document (served by the GIN
+index on document), or when the search text appears inside, or is a close
+trigram match for part of, search_text (served by the trigram GIN index).
+Exact job numbers come first, then full-text rank plus trigram similarity.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .indexing import TEXT_SEARCH_CONFIG
+from .models import SearchEntry
+
+# Results shown for one search
+MAX_RESULTS = 50
+
+# Words as to_tsvector('simple') splits them, keeping "12345.2" and emails whole
+_WORD = re.compile(r'\w+(?:[.@-]\w+)*')
+
+
+def _prefix_query(text):
+    """tsquery matching rows with a word starting with each word of `text`, or None"""
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f"'{word}':*" for word in words), search_type='raw', config=TEXT_SEARCH_CONFIG)
+
+
+def matching(text, entity_type=None):
+    """SearchEntry rows matching `text`, best first (unsliced - callers take what they show)"""
+    # NUL can't go into a Postgres string
+    text = ' '.join(text.replace('\x00', ' ').lower().split())
+    if not text:
+        return SearchEntry.objects.none()
+
+    entries = SearchEntry.objects.all()
+    if entity_type:
+        entries = entries.filter(entity_type=entity_type)
+
+    query = _prefix_query(text)
+    found = Q(search_text__contains=text) | Q(search_text__trigram_word_similar=text)
+    rank = TrigramWordSimilarity(Value(text), 'search_text')
+    if query is not None:
+        found |= Q(document=query)
+        rank = rank + SearchRank(F('document'), query)
+
+    return entries.filter(found).annotate(
+        exact=Case(When(job_number__iexact=text, then=Value(1)), default=Value(0), output_field=IntegerField()),
+        rank=rank,
+    ).order_by('-exact', '-rank', '-date', '-object_id')
+
+
+def matching_ids(text, entity_type):
+    """ids of the `entity_type` rows matching `text` - for narrowing a model's own queryset"""
+    return matching(text, entity_type).values('object_id')
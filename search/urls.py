@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import global_search
+
+urlpatterns = [
+    path('', global_search, name='global_search'),
+]
@@ -0,0 +1,37 @@
+from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.urls import reverse
+from psl_app_project.replica import use_replica
+from .models import SearchEntry
+from .query import MAX_RESULTS, matching
+
+# Where each kind of result opens
+EDIT_VIEWS = {
+    SearchEntry.ENQUIRY: 'edit_sales_enquiry',
+    SearchEntry.AWARD: 'edit_monthly_award',
+    SearchEntry.INVOICE: 'edit_invoiced_job',
+}
+
+
+@login_required
+@use_replica
+def global_search(request):
+    """Enquiries, awards and invoices matching ?q=, best match first"""
+    # NUL can't go into a Postgres string
+    search_query = request.GET.get('q', '').replace('\x00', '').strip()
+    entity_type = request.GET.get('type', '')
+    if entity_type not in EDIT_VIEWS:
+        entity_type = ''
+
+    results = list(matching(search_query, entity_type)[:MAX_RESULTS]) if search_query else []
+    for entry in results:
+        entry.url = reverse(EDIT_VIEWS[entry.entity_type], args=[entry.object_id])
+
+    context = {
+        'search_query': search_query,
+        'entity_type': entity_type,
+        'entity_choices': SearchEntry.ENTITY_CHOICES,
+        'results': results,
+        'max_results': MAX_RESULTS,
+    }
+    return render(request, 'search_results.html', context)
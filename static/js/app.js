@@ -0,0 +1,106 @@
+// Inline row edits: a changed [data-inline-field] inside a row with
+// data-inline-url is posted on its own, and the row is swapped for the
+// re-rendered row the server sends back.
+document.addEventListener('change', function (event) {
+    var field = event.target.closest('[data-inline-field]');
+    var row = field && field.closest('tr[data-inline-url]');
+    if (!row) {
+        return;
+    }
+
+    var body = new FormData();
+    body.append(field.name, field.value);
+    var csrf = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+
+    row.classList.add('inline-saving');
+    fetch(row.dataset.inlineUrl, {
+        method: 'POST',
+        body: body,
+        credentials: 'same-origin',
+        headers: {'X-CSRFToken': csrf ? decodeURIComponent(csrf[1]) : ''}
+    }).then(function (response) {
+        if (!response.ok) {
+            return response.json().then(function (data) { throw data; });
+        }
+        return response.text();
+    }).then(function (html) {
+        var tbody = document.createElement('tbody');
+        tbody.innerHTML = html.trim();
+        row.replaceWith(tbody.firstElementChild);
+    }).catch(function (data) {
+        row.classList.remove('inline-saving');
+        var errors = data && data.errors ? Object.values(data.errors).join('\n') : 'Could not save change.';
+        alert(errors);
+    });
+});
+
+// Lazy-loaded rows: a row with data-next-url is replaced by the next
+// page of rows once it scrolls into view (or its button is clicked).
+function loadNextRows(sentinel) {
+    if (sentinel.dataset.loading) {
+        return;
+    }
+    sentinel.dataset.loading = '1';
+    fetch(sentinel.dataset.nextUrl, {credentials: 'same-origin'}).then(function (response) {
+        if (!response.ok) {
+            throw response;
+        }
+        return response.text();
+    }).then(function (html) {
+        var tbody = document.createElement('tbody');
+        tbody.innerHTML = html.trim();
+        sentinel.replaceWith.apply(sentinel, Array.from(tbody.children));
+        observeNextRows();
+    }).catch(function () {
+        delete sentinel.dataset.loading;
+    });
+}
+
+var nextRowsObserver = 'IntersectionObserver' in window ? new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+        if (entry.isIntersecting) {
+            nextRowsObserver.unobserve(entry.target);
+            loadNextRows(entry.target);
+        }
+    });
+}, {rootMargin: '400px'}) : null;
+
+function observeNextRows() {
+    if (nextRowsObserver) {
+        document.querySelectorAll('tr[data-next-url]').forEach(function (row) {
+            nextRowsObserver.observe(row);
+        });
+    }
+}
+
+document.addEventListener('click', function (event) {
+    var sentinel = event.target.closest('tr[data-next-url]');
+    if (sentinel && event.target.closest('button')) {
+        loadNextRows(sentinel);
+    }
+});
+
+observeNextRows();
+
+// Text previews: a "more" button with data-full-text-url swaps the preview
+// before it for the full text, fetched for that row only when asked for.
+document.addEventListener('click', function (event) {
+    var button = event.target.closest('button[data-full-text-url]');
+    if (!button || button.disabled) {
+        return;
+    }
+    button.disabled = true;
+    fetch(button.dataset.fullTextUrl, {credentials: 'same-origin'}).then(function (response) {
+        if (!response.ok) {
+            throw response;
+        }
+        return response.json();
+    }).then(function (data) {
+        var preview = button.previousElementSibling;
+        preview.textContent = data.text;
+        preview.classList.add('text-full');
+        button.remove();
+    }).catch(function () {
+        button.disabled = false;
+    });
+});
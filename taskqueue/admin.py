@@ -0,0 +1,62 @@
+from django.contrib import admin
+from .models import Task, ScheduledTask
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = [
+        'name',
+        'status',
+        'priority',
+        'attempts',
+        'run_at',
+        'created_at',
+        'finished_at'
+    ]
+
+    list_filter = [
+        'status',
+        'name'
+    ]
+
+    search_fields = [
+        'name',
+        'last_error'
+    ]
+
+    readonly_fields = [
+        'attempts',
+        'last_error',
+        'result',
+        'worker',
+        'heartbeat_at',
+        'created_at',
+        'started_at',
+        'finished_at'
+    ]
+
+    list_per_page = 25
+
+
+@admin.register(ScheduledTask)
+class ScheduledTaskAdmin(admin.ModelAdmin):
+    list_display = [
+        'key',
+        'name',
+        'cron',
+        'next_run_at',
+        'last_enqueued_at'
+    ]
+
+    # Rows mirror settings.TASK_SCHEDULE and are rewritten by the worker
+    readonly_fields = [
+        'key',
+        'name',
+        'cron',
+        'kwargs',
+        'next_run_at',
+        'last_enqueued_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,77 @@
+"""
+Minimal five-field cron expressions: minute hour day-of-month month day-of-week.
+
+Each field accepts *, numbers, ranges (1-5), lists (1,15) and steps (*/15,
+8-18/2). Day of week runs 0-6 from Sunday (7 is also Sunday). As in cron,
+when both day fields are restricted a day matching either one fires.
+Times are in the project TIME_ZONE.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+# (lowest, highest) value for each field
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+# How far ahead next_after() looks before giving up (covers 29 February)
+_MAX_DAYS = 366 * 4 + 1
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        part, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = end = int(part)
+            if step > 1:
+                end = high
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"'{text}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields")
+        try:
+            parsed = [_parse_field(field, *bounds) for field, bounds in zip(fields, _FIELD_RANGES)]
+        except ValueError as exc:
+            raise ValueError(f"Invalid cron expression '{expression}': {exc}") from None
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        # Python's weekday() is Monday=0, cron is Sunday=0
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment):
+        """The first matching time strictly after `moment` (an aware datetime)"""
+        local = timezone.localtime(moment).replace(second=0, microsecond=0, tzinfo=None)
+        day = local.date()
+        for _ in range(_MAX_DAYS):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = datetime.combine(day, time(hour, minute))
+                        if candidate > local:
+                            return timezone.make_aware(candidate)
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
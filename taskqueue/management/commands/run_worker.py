@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from taskqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks from the database queue until stopped (SIGTERM finishes the current task first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when no task is due instead of waiting')
+        parser.add_argument('--poll-interval', type=float, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--worker-id', help='Name recorded on claimed tasks (default: host:pid)')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            worker_id=options['worker_id'],
+            poll_interval=options['poll_interval'],
+        )
+        worker.run(once=options['once'])
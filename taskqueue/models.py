@@ -0,0 +1,94 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A unit of background work, run by `manage.py run_worker`.
+
+    Workers claim queued rows with SELECT ... FOR UPDATE SKIP LOCKED, so any
+    number of them can share the table without handing out a task twice.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Registered name of the @task function, e.g. 'taskqueue.tasks.purge_finished_tasks'
+    name = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not started before this time")
+
+    # Retries
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+
+    # Set while running; a worker that stops updating heartbeat_at is presumed dead
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The claim query: next queued task by priority then due time
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                name='task_ready_idx',
+                condition=Q(status='queued'),
+            ),
+            models.Index(
+                fields=['heartbeat_at'],
+                name='task_running_idx',
+                condition=Q(status='running'),
+            ),
+            models.Index(fields=['status', '-created_at'], name='task_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+    @property
+    def duration(self):
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+        return None
+
+
+class ScheduledTask(models.Model):
+    """Next run of a cron entry from settings.TASK_SCHEDULE.
+
+    Kept in the database so that with several workers each run is enqueued
+    exactly once: the worker that locks the due row enqueues the task and
+    moves next_run_at on.
+    """
+
+    key = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=200)
+    cron = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    next_run_at = models.DateTimeField()
+    last_enqueued_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_run_at']
+
+    def __str__(self):
+        return f"{self.key} ({self.cron})"
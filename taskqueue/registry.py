@@ -0,0 +1,83 @@
+"""
+Registering background task functions and adding them to the queue.
+
+    # sales_tracker/tasks.py
+    from taskqueue.registry import task
+
+    @task(max_attempts=5)
+    def export_enquiries(year):
+        ...
+
+    export_enquiries.enqueue(kwargs={'year': 2025})
+
+Tasks are plain rows in the database, so enqueuing inside a transaction only
+makes the task visible to workers once that transaction commits. Keyword
+arguments must be JSON serialisable.
+"""
+from django.utils import timezone
+
+_registry = {}
+
+
+class TaskDefinition:
+    def __init__(self, func, name, priority, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        # Seconds before the first retry, doubling on each one after
+        self.retry_delay = retry_delay
+
+    def retry_delay_for(self, attempts):
+        return self.retry_delay * 2 ** max(attempts - 1, 0)
+
+
+def task(func=None, *, name=None, priority=0, max_attempts=3, retry_delay=30):
+    """Register a function as a background task (usable with or without arguments)"""
+
+    def register(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        _registry[task_name] = TaskDefinition(func, task_name, priority, max_attempts, retry_delay)
+        func.task_name = task_name
+        func.enqueue = lambda **options: enqueue(task_name, **options)
+        return func
+
+    return register(func) if func else register
+
+
+def get_task(name):
+    """The TaskDefinition registered under `name`, or None"""
+    return _registry.get(name)
+
+
+def registered_tasks():
+    return dict(_registry)
+
+
+def enqueue(name, kwargs=None, run_at=None, priority=None, unique=False):
+    """
+    Add a task to the queue and return the Task row.
+
+    run_at delays it until then; priority overrides the task's default.
+    With unique=True an identical task that is still queued is returned
+    instead of adding another.
+    """
+    from .models import Task
+
+    definition = get_task(name)
+    if definition is None:
+        raise KeyError(f"No task registered as '{name}'")
+    kwargs = kwargs or {}
+
+    if unique:
+        existing = Task.objects.filter(name=name, kwargs=kwargs, status=Task.QUEUED).first()
+        if existing:
+            return existing
+
+    return Task.objects.create(
+        name=name,
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        priority=definition.priority if priority is None else priority,
+        max_attempts=definition.max_attempts,
+    )
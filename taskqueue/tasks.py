@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+from .models import Task
+from .registry import task
+
+# Expired sessions deleted per statement, so the cleanup never holds a long lock on django_session
+SESSION_CLEANUP_BATCH = 5000
+
+
+@task(priority=-10)
+def purge_finished_tasks():
+    """Delete succeeded/failed tasks older than TASK_RETENTION_DAYS"""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'TASK_RETENTION_DAYS', 14))
+    deleted, _ = Task.objects.filter(
+        status__in=[Task.SUCCEEDED, Task.FAILED], created_at__lt=cutoff
+    ).delete()
+    return {'deleted': deleted}
+
+
+@task(priority=-10)
+def clear_expired_sessions():
+    """Delete expired rows from django_session in batches - `manage.py clearsessions` without one long DELETE
+
+    Runs in every SESSION_MODE: with signed cookies it clears out rows left from the database modes.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        batch = list(
+            Session.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:SESSION_CLEANUP_BATCH]
+        )
+        if not batch:
+            return {'deleted': deleted}
+        count, _ = Session.objects.filter(pk__in=batch).delete()
+        deleted += count
@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import (
+    task_queue,
+    retry_task
+)
+
+urlpatterns = [
+    path('', task_queue, name='task_queue'),
+    path('<int:pk>/retry/', retry_task, name='retry_task'),
+]
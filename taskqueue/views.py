@@ -0,0 +1,57 @@
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from .models import Task, ScheduledTask
+
+TASKS_SHOWN = 100
+
+
+@staff_member_required
+def task_queue(request):
+    """Queue depth, cron schedule and recent tasks, optionally filtered by status"""
+    now = timezone.now()
+    counts = Task.objects.aggregate(
+        queued=Count('id', filter=Q(status=Task.QUEUED)),
+        due=Count('id', filter=Q(status=Task.QUEUED, run_at__lte=now)),
+        running=Count('id', filter=Q(status=Task.RUNNING)),
+        succeeded=Count('id', filter=Q(status=Task.SUCCEEDED)),
+        failed=Count('id', filter=Q(status=Task.FAILED)),
+        oldest_due=Min('run_at', filter=Q(status=Task.QUEUED, run_at__lte=now)),
+    )
+
+    status = request.GET.get('status', '')
+    tasks = Task.objects.all()
+    if status in dict(Task.STATUS_CHOICES):
+        tasks = tasks.filter(status=status)
+
+    context = {
+        'counts': counts,
+        'schedules': ScheduledTask.objects.all(),
+        'tasks': tasks.defer('kwargs', 'result')[:TASKS_SHOWN],
+        'status': status,
+        'status_choices': Task.STATUS_CHOICES,
+    }
+    return render(request, 'task_queue.html', context)
+
+
+@staff_member_required
+@require_POST
+def retry_task(request, pk):
+    """Put a failed task back on the queue with a fresh set of attempts"""
+    task = get_object_or_404(Task, pk=pk)
+    if task.status != Task.FAILED:
+        messages.error(request, f'Task #{task.pk} is {task.get_status_display().lower()}, only failed tasks can be retried.')
+    else:
+        Task.objects.filter(pk=task.pk, status=Task.FAILED).update(
+            status=Task.QUEUED, attempts=0, run_at=timezone.now(), finished_at=None, worker=''
+        )
+        messages.success(request, f'Task #{task.pk} ({task.name}) queued again.')
+
+    url = reverse('task_queue')
+    if request.POST.get('status') in dict(Task.STATUS_CHOICES):
+        url += f"?status={request.POST['status']}"
+    return redirect(url)
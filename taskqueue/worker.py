@@ -0,0 +1,204 @@
+"""
+The worker loop behind `manage.py run_worker`.
+
+Each pass it enqueues due cron entries, requeues tasks whose worker stopped
+sending heartbeats, then claims the next queued task:
+
+    SELECT ... FROM taskqueue_task
+    WHERE status = 'queued' AND run_at <= now()
+    ORDER BY priority DESC, run_at, id
+    LIMIT 1 FOR UPDATE SKIP LOCKED
+
+The claim is committed before the task runs, so no row lock is held for the
+task's duration; a heartbeat thread keeps heartbeat_at fresh instead.
+"""
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cron import CronSchedule
+from .models import Task, ScheduledTask
+from .registry import get_task
+
+logger = logging.getLogger('psl.taskqueue')
+
+
+def sync_schedules():
+    """Create/update ScheduledTask rows to match settings.TASK_SCHEDULE"""
+    schedule = getattr(settings, 'TASK_SCHEDULE', {})
+    now = timezone.now()
+    for key, entry in schedule.items():
+        cron = CronSchedule(entry['cron'])
+        if get_task(entry['task']) is None:
+            raise KeyError(f"TASK_SCHEDULE['{key}'] refers to unregistered task '{entry['task']}'")
+        row, created = ScheduledTask.objects.get_or_create(
+            key=key,
+            defaults={
+                'name': entry['task'],
+                'cron': entry['cron'],
+                'kwargs': entry.get('kwargs', {}),
+                'next_run_at': cron.next_after(now),
+            },
+        )
+        if not created and (row.name, row.cron, row.kwargs) != (entry['task'], entry['cron'], entry.get('kwargs', {})):
+            row.name, row.cron, row.kwargs = entry['task'], entry['cron'], entry.get('kwargs', {})
+            row.next_run_at = cron.next_after(now)
+            row.save()
+    ScheduledTask.objects.exclude(key__in=list(schedule)).delete()
+
+
+def enqueue_due_schedules():
+    """Enqueue each due cron entry once, however many workers are running"""
+    now = timezone.now()
+    with transaction.atomic():
+        due = ScheduledTask.objects.select_for_update(skip_locked=True).filter(next_run_at__lte=now)
+        for row in due:
+            definition = get_task(row.name)
+            Task.objects.create(
+                name=row.name,
+                kwargs=row.kwargs,
+                priority=definition.priority,
+                max_attempts=definition.max_attempts,
+            )
+            # Runs missed while no worker was up collapse into this one
+            row.next_run_at = CronSchedule(row.cron).next_after(now)
+            row.last_enqueued_at = now
+            row.save(update_fields=['next_run_at', 'last_enqueued_at'])
+
+
+def requeue_stale_tasks():
+    """Give tasks whose worker died back to the queue (or fail them if out of attempts)"""
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'TASK_STALE_AFTER_SECONDS', 300))
+    stale = Task.objects.filter(status=Task.RUNNING, heartbeat_at__lt=stale_before)
+    message = 'Worker stopped responding while running this task.'
+
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Task.QUEUED, worker='', run_at=timezone.now(), last_error=message
+    )
+    failed = stale.update(status=Task.FAILED, worker='', finished_at=timezone.now(), last_error=message)
+    if requeued or failed:
+        logger.warning('Recovered stale tasks: %s requeued, %s failed', requeued, failed)
+
+
+def claim_task(worker_id):
+    """Mark the next due task as running for this worker and return it, or None"""
+    now = timezone.now()
+    with transaction.atomic():
+        task = (
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.QUEUED, run_at__lte=now)
+            .order_by('-priority', 'run_at', 'id')
+            .first()
+        )
+        if task is None:
+            return None
+        task.status = Task.RUNNING
+        task.attempts += 1
+        task.worker = worker_id
+        task.started_at = now
+        task.heartbeat_at = now
+        task.save(update_fields=['status', 'attempts', 'worker', 'started_at', 'heartbeat_at'])
+    return task
+
+
+def _drop_broken_connection():
+    """Reconnect only if a query error left the connection unusable
+
+    (close_old_connections() would reconnect on every poll with CONN_MAX_AGE=0)
+    """
+    if connection.errors_occurred:
+        if connection.is_usable():
+            connection.errors_occurred = False
+        else:
+            connection.close()
+
+
+def _json_result(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+class Worker:
+    def __init__(self, worker_id=None, poll_interval=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval or getattr(settings, 'TASK_POLL_INTERVAL_SECONDS', 2)
+        self.heartbeat_interval = getattr(settings, 'TASK_HEARTBEAT_SECONDS', 30)
+        self.stopping = threading.Event()
+
+    def stop(self, *args):
+        """Finish the current task, then exit"""
+        self.stopping.set()
+
+    def run(self, once=False):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        sync_schedules()
+        logger.info('Worker %s started', self.worker_id)
+        while not self.stopping.is_set():
+            _drop_broken_connection()
+            enqueue_due_schedules()
+            requeue_stale_tasks()
+
+            task = claim_task(self.worker_id)
+            if task is None:
+                if once:
+                    break
+                self.stopping.wait(self.poll_interval)
+                continue
+            self.execute(task)
+        connection.close()
+        logger.info('Worker %s stopped', self.worker_id)
+
+    def _heartbeat(self, task, done):
+        try:
+            while not done.wait(self.heartbeat_interval):
+                Task.objects.filter(pk=task.pk, worker=self.worker_id).update(heartbeat_at=timezone.now())
+        finally:
+            connection.close()
+
+    def execute(self, task):
+        definition = get_task(task.name)
+        ours = Task.objects.filter(pk=task.pk, worker=self.worker_id, status=Task.RUNNING)
+        if definition is None:
+            ours.update(status=Task.FAILED, finished_at=timezone.now(),
+                        last_error=f"No task registered as '{task.name}'.")
+            return
+
+        logger.info('Running %s #%s (attempt %s/%s)', task.name, task.pk, task.attempts, task.max_attempts)
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task, done), daemon=True)
+        heartbeat.start()
+        try:
+            result, error = definition.func(**task.kwargs), None
+        except Exception:
+            result, error = None, traceback.format_exc()
+        finally:
+            done.set()
+            heartbeat.join()
+
+        # The task may have left its connection broken
+        _drop_broken_connection()
+        if error is None:
+            ours.update(status=Task.SUCCEEDED, finished_at=timezone.now(), result=_json_result(result))
+            logger.info('%s #%s succeeded', task.name, task.pk)
+        elif task.attempts < task.max_attempts:
+            retry_at = timezone.now() + timedelta(seconds=definition.retry_delay_for(task.attempts))
+            ours.update(status=Task.QUEUED, worker='', run_at=retry_at, last_error=error)
+            logger.info('%s #%s failed, retrying at %s', task.name, task.pk, retry_at.isoformat())
+        else:
+            ours.update(status=Task.FAILED, finished_at=timezone.now(), last_error=error)
+            logger.error('Task %s #%s failed after %s attempts:\n%s', task.name, task.pk, task.attempts, error)